@@ -0,0 +1,140 @@
+# backend_client.py
+# Общий HTTP-клиент Flet-приложения: один httpx.AsyncClient на всё время работы приложения
+# (keep-alive пул соединений, HTTP/2 при наличии пакета h2), таймауты и ограниченные повторы.
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from core import encoding, lazy_import
+
+# httpx загружается при первом запросе, а не при импорте клиента (старт интерфейса быстрее)
+httpx = lazy_import("httpx")
+
+try:
+    import h2  # noqa: F401 — нужен httpx для HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# ответы, после которых запрос имеет смысл повторить
+RETRY_STATUSES = {502, 503, 504}
+
+
+class BackendClient:
+    def __init__(self, base_url: str, retries: int = 3, backoff: float = 0.2,
+                 timeout: Optional[httpx.Timeout] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout or httpx.Timeout(10.0, connect=3.0)
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # клиент создаётся лениво в том цикле событий, где его используют
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._retire(self._client, self._loop)
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=HTTP2_AVAILABLE and self._transport is None,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+                transport=self._transport,
+            )
+            self._loop = loop
+        return self._client
+
+    @staticmethod
+    def _retire(client: Optional[httpx.AsyncClient], loop: Optional[asyncio.AbstractEventLoop]):
+        # клиент прежнего цикла событий закрывается в том цикле, где открывались его соединения
+        # (Flet запускает обработчики в нескольких циклах); остановленный цикл закрыть его уже не может
+        if client is None or client.is_closed or loop is None or not loop.is_running():
+            return
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    async def request(self, method: str, path: str, idempotent: Optional[bool] = None, **kwargs) -> httpx.Response:
+        # Повторяем только идемпотентные запросы: при ошибке соединения/таймауте и на 502/503/504,
+        # с экспоненциальной паузой между попытками
+        if idempotent is None:
+            idempotent = method.upper() in ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+        attempts = self.retries + 1 if idempotent else 1
+        for attempt in range(attempts):
+            try:
+                response = await self.client.request(method, path, **kwargs)
+            except (httpx.TransportError, httpx.TimeoutException):
+                if attempt == attempts - 1:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                    response.raise_for_status()
+                    return response
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+        raise RuntimeError("unreachable")
+
+    async def get_json(self, path: str, **kwargs) -> Any:
+        return (await self.request("GET", path, **kwargs)).json()
+
+    async def gather(self, *requests) -> list:
+        # независимые запросы уходят одновременно по соединениям из пула:
+        # строка — GET этого пути (JSON), иначе — уже готовый awaitable (например, fetch_data())
+        return list(await asyncio.gather(*(self.get_json(r) if isinstance(r, str) else r for r in requests)))
+
+    async def fetch_data(self, tables: Optional[Iterable[str]] = None) -> Dict[str, list]:
+        # текущие данные сервера без перезагрузки seed (колоночный JSON, если сервер его отдаёт);
+        # tables — только эти таблицы
+        params = {"tables": ",".join(tables)} if tables else {}
+        response = await self.request(
+            "GET", "/data", params=params, headers={"Accept": f"{encoding.COLUMNAR}, application/json;q=0.5"},
+        )
+        return encoding.decode(response.content, response.headers.get("content-type", encoding.JSON))
+
+    async def load_and_fetch(self, tables: Optional[Iterable[str]] = None) -> Dict[str, list]:
+        # /load_seed?include_data=true: загрузка и получение данных за один запрос.
+        # Повтор безопасен — сервер просто перечитывает seed.
+        params = {"include_data": "true", **({"tables": ",".join(tables)} if tables else {})}
+        response = await self.request(
+            "POST", "/load_seed", idempotent=True, params=params,
+            headers={"Accept": f"{encoding.COLUMNAR}, application/json;q=0.5"},
+        )
+        return encoding.decode(response.content, response.headers.get("content-type", encoding.JSON))
+
+    async def fetch_class_ids(self) -> List[str]:
+        # id всех занятий (GET /classes/ids) — клиент держит лишь страницу таблицы
+        return await self.get_json("/classes/ids")
+
+    async def post_event(self, name: str, payload: dict) -> int:
+        #Событие frp на сервер; возвращает версию данных после его применения
+        response = await self.request("POST", "/events", json={"name": name, "payload": payload})
+        return response.json()["version"]
+
+    async def iter_changes(self, **filters) -> AsyncIterator[dict]:
+        # Поток изменений (SSE /changes/stream): кадры {"type": ..., "version": ..., "events": [...]}.
+        # Соединение живёт долго, поэтому таймаут чтения отключён.
+        params = {k: v for k, v in filters.items() if v}
+        async with self.client.stream("GET", "/changes/stream", params=params,
+                                      timeout=httpx.Timeout(None, connect=3.0)) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("data: "):
+                    yield json.loads(line[len("data: "):])
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+_backends: Dict[str, BackendClient] = {}
+
+
+def get_backend(base_url: str) -> BackendClient:
+    # один клиент на адрес сервера на всё время жизни приложения
+    backend = _backends.get(base_url)
+    if backend is None:
+        backend = _backends[base_url] = BackendClient(base_url)
+    return backend
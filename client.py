@@ -1,19 +1,25 @@
 # client.py
 import asyncio
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 from typing import Optional, List, Dict, Any
 
 import flet as ft
-import httpx
 
+from backend_client import get_backend
+from paged_table import PagedClassesTable
+from view_model import view_model
 from core import transforms, memo
 from core import service as svc
-from core.domain import *
-from core.async_schedule import *
-from core.frp import *
-from core.transforms import *
+from core.domain import Class, Slot
+from core.async_schedule import generate_period_report
+from core.frp import EventBus, add_class, add_room, assign_room, assign_slot, cancel_class, move_class
+from core.term import term_weeks, iter_occurrences, iter_week_reports, aggregate_term
 
-BACKEND_URL = "http://127.0.0.1:8000"
+# адрес сервера задаёт launch.py (--host/--port); по умолчанию — локальный uvicorn
+BACKEND_URL = os.environ.get("TIMETABLE_BACKEND_URL", "http://127.0.0.1:8000")
 
 MENU = [
     "Overview",
@@ -37,13 +43,41 @@ MENU_ICONS = [
     ft.Icons.INFO,
 ]
 
-state = {}  # тут будут ключи: buildings, rooms, teachers, groups, courses, slots, classes, constraints
+state = {}  # тут будут ключи: buildings, rooms, teachers, groups, courses, slots, constraints
+# справочники клиент держит целиком; занятия — только страницами /classes (таблица Overview),
+# а всё расписание (state["classes"]) — лишь пока открыта вкладка, которая считает по нему целиком
+REFERENCE_TABLES = ("buildings", "rooms", "teachers", "groups", "courses", "slots", "constraints")
+FULL_TIMETABLE_SECTIONS = ("Pipelines", "Async/FRP", "Reports")
+CLASS_EVENTS = ("ASSIGN_SLOT", "ASSIGN_ROOM", "MOVE_CLASS", "CANCEL_CLASS", "ADD_CLASS")
 
 bus = EventBus()
 bus.subscribe("ASSIGN_SLOT", assign_slot)
+bus.subscribe("ASSIGN_ROOM", assign_room)
 bus.subscribe("MOVE_CLASS", move_class)
 bus.subscribe("CANCEL_CLASS", cancel_class)
 bus.subscribe("ADD_ROOM", add_room)
+bus.subscribe("ADD_CLASS", add_class)
+
+# расчёт расписания по дням идёт в отдельных потоках, чтобы не замораживать интерфейс
+schedule_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="schedule")
+
+
+
+async def fetch_classes_page(params):
+    # единственный источник строк таблицы — страницы сервера
+    return await get_backend(BACKEND_URL).get_json("/classes", params=params)
+
+
+async def fill_class_options(dropdown):
+    # в таблице только текущая страница: список занятий для выбора берётся с сервера целиком
+    try:
+        ids = await get_backend(BACKEND_URL).fetch_class_ids()
+    except Exception as ex:
+        dropdown.error_text = f"Не удалось загрузить занятия: {ex}"
+    else:
+        dropdown.options = [ft.DropdownOption(key=class_id) for class_id in ids]
+    dropdown.update()
+
 
 def map_by_id(items, id_field="id", name_field="name"):
     return {it[id_field]: it[name_field] for it in items}
@@ -111,13 +145,119 @@ def main_page(page: ft.Page):
     def map_by_id(items, id_field="id", name_field="name"):
         return {it[id_field]: it[name_field] for it in items}
 
+    # ---------------------- живые изменения с сервера ----------------------
+    # версии, которые получились из наших собственных событий, — их уже применили локально
+    own_versions = set()
+    # последняя версия из потока изменений: более старые свои версии уже не придут (их событие
+    # было в кадре или объединено с другими), поэтому в own_versions не хранятся
+    last_seen = {"version": 0}
+    # чем перерисовать открытую вкладку после чужого изменения (задаёт сама вкладка)
+    # remote=True — fn только запрашивает сервер и не зависит от state (таблица Overview)
+    live_refresh = {"fn": None, "remote": False}
+    listener = {"task": None}
+
+    def remember_own(version):
+        if version > last_seen["version"]:
+            own_versions.add(version)
+
+    async def send_event(event_name, payload):
+        try:
+            remember_own(await get_backend(BACKEND_URL).post_event(event_name, payload))
+        except Exception:
+            pass  # сервер недоступен — изменение остаётся локальным
+
+    async def send_event_checked(event_name, payload) -> bool:
+        # правки Overview применяет только сервер (локальной копии занятий нет) — ошибку показываем
+        try:
+            remember_own(await get_backend(BACKEND_URL).post_event(event_name, payload))
+        except Exception as ex:
+            failed = ft.Banner(
+                bgcolor=ft.Colors.AMBER_100,
+                leading=ft.Icon(ft.Icons.WARNING_AMBER_ROUNDED, color=ft.Colors.AMBER, size=40),
+                content=ft.Text(value=f"Сервер не принял изменение: {ex}", color=ft.Colors.BLACK),
+                actions=[ft.TextButton(text="Хорошо", on_click=lambda _: page.close(failed))],
+            )
+            page.open(failed)
+            return False
+        return True
+
+    async def listen_for_changes():
+        # чужие события применяются тем же EventBus, что и свои; кадр уже объединяет пачку событий
+        while True:
+            try:
+                backend = get_backend(BACKEND_URL)
+                async for frame in backend.iter_changes():
+                    refreshed = False
+                    events = frame.get("events", ())
+                    # событие, для которого у клиента нет обработчика (например, REPAIR с сервера), —
+                    # как resync: данные перечитываются целиком, события кадра в них уже учтены
+                    unknown = any(e["name"] not in bus.subscribers and e["version"] not in own_versions for e in events)
+                    if frame.get("type") == "resync" or unknown:
+                        # данные перечитываются без перезагрузки seed; страница таблицы от state
+                        # не зависит, поэтому запрашивается одновременно с ними
+                        tables = REFERENCE_TABLES + (("classes",) if "classes" in state else ())
+                        if live_refresh["remote"] and live_refresh["fn"] is not None:
+                            data, _ = await backend.gather(backend.fetch_data(tables), live_refresh["fn"]())
+                            refreshed = True
+                        else:
+                            data = await backend.fetch_data(tables)
+                        state.update(data)
+                        events = ()
+                    for event in events:
+                        if event["version"] in own_versions:
+                            own_versions.discard(event["version"])
+                            continue
+                        if event["name"] == "ADD_ROOM" and event["payload"].get("id") in view_model(state).rooms_by_id:
+                            continue  # своё событие пришло раньше ответа на POST
+                        if event["name"] in CLASS_EVENTS and "classes" not in state:
+                            continue  # занятий локально нет — таблица перечитает страницу с сервера
+                        if event["name"] == "ADD_CLASS" and event["payload"].get("id") in view_model(state).classes_by_id:
+                            continue
+                        state.update(bus.publish(event["name"], event["payload"], dict(state)))
+                    if frame.get("type") == "hello":
+                        last_seen["version"] = frame.get("version", 0)  # после перезапуска сервера нумерация новая
+                    else:
+                        last_seen["version"] = max(last_seen["version"], frame.get("version", 0))
+                    own_versions.difference_update([v for v in own_versions if v <= last_seen["version"]])
+                    if frame.get("type") != "hello" and not refreshed and live_refresh["fn"] is not None:
+                        await live_refresh["fn"]()
+            except Exception:
+                await asyncio.sleep(2)  # переподключение
+
+    def start_listening():
+        if listener["task"] is None:
+            listener["task"] = page.run_task(listen_for_changes)
+
     def switch_section(name: str):
+        live_refresh["fn"], live_refresh["remote"] = None, False
+        state.pop("classes", None)  # всё расписание нужно только вкладке, с которой уходим
         section_name.value = name
         update_section()
 
+    async def open_with_classes(name: str, show):
+        # вкладки, считающие по всему расписанию, загружают занятия при открытии
+        try:
+            data = await get_backend(BACKEND_URL).fetch_data(("classes",))
+        except Exception as ex:
+            section_content.controls.clear()
+            section_content.controls.append(ft.Text(f"Ошибка при загрузке занятий: {ex}", color=ft.Colors.RED))
+            page.update()
+            return
+        if section_name.value != name:
+            return  # пока шёл запрос, пользователь ушёл с вкладки
+        state.update(data)
+        section_content.controls.clear()
+        show()
+        page.update()
+
     def update_section():
         section_content.controls.clear()
-        if section_name.value == "Overview":
+        if section_name.value in FULL_TIMETABLE_SECTIONS and state.get("buildings"):
+            show = {"Pipelines": show_pipelines_section, "Async/FRP": show_async_frp_section,
+                    "Reports": show_reports_section}[section_name.value]
+            section_content.controls.append(ft.Text("Загрузка занятий...", color=ft.Colors.BLACK87))
+            page.run_task(open_with_classes, section_name.value, show)
+        elif section_name.value == "Overview":
             show_overview()
         elif section_name.value == "Data":
             show_data_section()
@@ -152,14 +292,6 @@ def main_page(page: ft.Page):
             page.update()
             return
 
-        # prepare mapping dicts
-        courses_by_code = {c["code"]: c for c in state["courses"]}
-        teachers_map = map_by_id(state["teachers"])
-        groups_map = map_by_id(state["groups"])
-        rooms_map = {r["id"]: r for r in state["rooms"]}
-        buildings_map = map_by_id(state["buildings"], id_field="id", name_field="name")
-        slots_map = {s["id"]: s for s in state["slots"]}
-
         # initial filter values (None => no filter)
         selected_day: Optional[str] = None
         selected_teacher: Optional[str] = None
@@ -196,7 +328,7 @@ def main_page(page: ft.Page):
                 enable_filter=True,
                 menu_height=250,
                 label="Занятие",
-                options=get_options("classes")
+                options=[]
             )
             room_select = ft.Dropdown(
                 editable=True,
@@ -206,7 +338,7 @@ def main_page(page: ft.Page):
                 options=get_options("rooms")
             )
             back_button = ft.ElevatedButton("Назад", on_click=lambda _: show_overview())
-            submit_button = ft.ElevatedButton("Продолжить", on_click=lambda _: tryassign_room())
+            submit_button = ft.ElevatedButton("Продолжить", on_click=lambda _: page.run_task(tryassign_room))
 
             section_content.controls.append(ft.Text("Выберите занятие, для которого хотите изменить аудиторию:"))
             section_content.controls.append(cls_select)
@@ -215,7 +347,8 @@ def main_page(page: ft.Page):
             section_content.controls.append(submit_button)
             section_content.controls.append(back_button)
             page.update()
-            def tryassign_room():
+            page.run_task(fill_class_options, cls_select)
+            async def tryassign_room():
                 if not cls_select.value or not room_select.value:
                      missing = ft.Banner(
                                         bgcolor=ft.Colors.AMBER_100,
@@ -232,9 +365,8 @@ def main_page(page: ft.Page):
                                             )
                      page.open(missing) 
                      return             
-                new_classes = transforms.assign_room(state["classes"], cls_select.value, room_select.value)
-                state["classes"] = list(transforms.serialize_tuple(new_classes))
-                show_overview()
+                if await send_event_checked("ASSIGN_ROOM", {"class_id": cls_select.value, "new_room": room_select.value}):
+                    show_overview()
 
         def assign_slot():
             def get_options(mahkey):
@@ -259,7 +391,7 @@ def main_page(page: ft.Page):
                 enable_filter=True,
                 menu_height=250,
                 label="Занятие",
-                options=get_options("classes")
+                options=[]
             )
             slot_select = ft.Dropdown(
                 editable=True,
@@ -269,7 +401,7 @@ def main_page(page: ft.Page):
                 options=get_options("slots")
             )
             back_button = ft.ElevatedButton("Назад", on_click=lambda _: show_overview())
-            submit_button = ft.ElevatedButton("Продолжить", on_click=lambda _: tryassign_slot())
+            submit_button = ft.ElevatedButton("Продолжить", on_click=lambda _: page.run_task(tryassign_slot))
 
             section_content.controls.append(ft.Text("Выберите занятие, для которого хотите изменить слот:"))
             section_content.controls.append(cls_select)
@@ -278,7 +410,8 @@ def main_page(page: ft.Page):
             section_content.controls.append(submit_button)
             section_content.controls.append(back_button)
             page.update()
-            def tryassign_slot():
+            page.run_task(fill_class_options, cls_select)
+            async def tryassign_slot():
                 if not cls_select.value or not slot_select.value:
                      missing = ft.Banner(
                                         bgcolor=ft.Colors.AMBER_100,
@@ -295,9 +428,8 @@ def main_page(page: ft.Page):
                                             )
                      page.open(missing) 
                      return             
-                new_classes = transforms.assign_slot(state["classes"], cls_select.value, slot_select.value)
-                state["classes"] = list(transforms.serialize_tuple(new_classes))
-                show_overview()
+                if await send_event_checked("ASSIGN_SLOT", {"class_id": cls_select.value, "slot_id": slot_select.value}):
+                    show_overview()
 
         def add_new_class():
             def get_options(mahkey):
@@ -360,7 +492,7 @@ def main_page(page: ft.Page):
                 options=get_options("rooms")
             )
             back_button = ft.ElevatedButton("Назад", on_click=lambda _: show_overview())
-            submit_button = ft.ElevatedButton("Продолжить", on_click=lambda _: tryadd_new_class())
+            submit_button = ft.ElevatedButton("Продолжить", on_click=lambda _: page.run_task(tryadd_new_class))
 
             section_content.controls.append(ft.Text("Введите данные нового занятия"))
             section_content.controls.append(cls_id)
@@ -374,7 +506,7 @@ def main_page(page: ft.Page):
             section_content.controls.append(back_button)
             page.update()
 
-            def tryadd_new_class():
+            async def tryadd_new_class():
                  if not cls_id.value or not cls_course.value:
                      missing_cls = ft.Banner(
                                         bgcolor=ft.Colors.AMBER_100,
@@ -394,32 +526,25 @@ def main_page(page: ft.Page):
                  new_c = Class(id = cls_id.value, 
                                 course_id = cls_course.value,
                                 needs = "",
-                                teacher_id = cls_teacher.value,
-                                group_id = cls_group.value,
-                                slot_id = cls_slot.value,
-                                room_id = cls_room.value,
-                                status = cls_status.value)
-                 new_classes = transforms.add_class(state["classes"], new_c)
-                 state["classes"] = list(transforms.serialize_tuple(new_classes))
-                 show_overview()
+                                teacher_id = cls_teacher.value or "",
+                                group_id = cls_group.value or "",
+                                slot_id = cls_slot.value or "",
+                                room_id = cls_room.value or "",
+                                status = cls_status.value or "planned")
+                 if await send_event_checked("ADD_CLASS", transforms.serialize_tuple((new_c,))[0]):
+                     show_overview()
             
 
         # UI controls
         def get_capacity():
             global capacity_text
-            total_capacity = transforms.total_room_capacity(tuple(state["rooms"]))
+            total_capacity = transforms.total_room_capacity(view_model(state).entities["rooms"])
             capacity_text = ft.Text(f"Общая вместимость: {total_capacity}")
             section_content.controls[1] = capacity_text
             page.update() 
                 
         def make_days_options():
-            days = []
-            seen = set()
-            for s in state["slots"]:
-                if s["day"] not in seen:
-                    days.append(s["day"])
-                    seen.add(s["day"])
-            return ["(все)"] + days
+            return ["(все)"] + list(view_model(state).days)
 
         day_dropdown = ft.Dropdown(
             label="День",
@@ -449,102 +574,42 @@ def main_page(page: ft.Page):
             value="(все)",
         )
 
-        clear_button = ft.ElevatedButton("Сбросить фильтры", on_click=lambda _: on_clear())
+        clear_button = ft.ElevatedButton("Сбросить фильтры")
 
-        # table for classes
-        classes_table = ft.DataTable(
-            columns=[
-                ft.DataColumn(ft.Text("ID")),
-                ft.DataColumn(ft.Text("Дисциплина")),
-                ft.DataColumn(ft.Text("Группа")),
-                ft.DataColumn(ft.Text("Преподаватель")),
-                ft.DataColumn(ft.Text("День / Время")),
-                ft.DataColumn(ft.Text("Аудитория")),
-                ft.DataColumn(ft.Text("Корпус")),
-            ],
-            rows=[],
-            border=ft.border.all(1, ft.Colors.BLACK12),
-            heading_row_color="#358FC1",
-            heading_text_style=ft.TextStyle(weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE),
-            expand=True,
-        )
+        # table for classes: только текущая страница, строки приходят с сервера
+        def show_table_error(ex):
+            section_content.controls.append(ft.Text(f"Ошибка при загрузке занятий: {ex}", color=ft.Colors.RED))
+            page.update()
 
-        def build_classes_rows(filtered_classes):
-            rows = []
-            for cl in filtered_classes:
-                course = courses_by_code.get(cl["course_id"], {"title": cl["course_id"]})
-                slot = slots_map.get(cl["slot_id"], None)
-                slot_text = f"{slot['day']} {slot['start']}-{slot['end']}" if slot else ""
-                room = rooms_map.get(cl["room_id"], None)
-                building_name = buildings_map.get(room["building_id"], "") if room else ""
-                teacher_name = teachers_map.get(cl["teacher_id"], "")
-                group_name = groups_map.get(cl["group_id"], "")
-                rows.append(
-                    ft.DataRow(
-                        cells=[
-                            ft.DataCell(ft.Text(cl["id"], color=ft.Colors.BLACK87)),
-                            ft.DataCell(ft.Text(course.get("title", cl["course_id"]), color=ft.Colors.BLACK87)),
-                            ft.DataCell(ft.Text(group_name, color=ft.Colors.BLACK87)),
-                            ft.DataCell(ft.Text(teacher_name, color=ft.Colors.BLACK87)),
-                            ft.DataCell(ft.Text(slot_text, color=ft.Colors.BLACK87)),
-                            ft.DataCell(ft.Text(room["name"] if room else "", color=ft.Colors.BLACK87)),
-                            ft.DataCell(ft.Text(building_name, color=ft.Colors.BLACK87)),
-                        ]
-                    )
-                )
-            return rows
+        classes_table = PagedClassesTable(fetch_classes_page, page_size=50, on_error=show_table_error)
 
-        # filtering logic
-        def apply_filters():
-            nonlocal classes_table
-            filtered = state["classes"]
-
-            # day filter
-            if day_dropdown.value and day_dropdown.value != "(все)":
-                target_day = day_dropdown.value
-                # find slot ids for that day
-                slot_ids = {s["id"] for s in state["slots"] if s["day"] == target_day}
-                filtered = [c for c in filtered if c["slot_id"] in slot_ids]
-
-            # teacher filter
-            if teacher_dropdown.value and teacher_dropdown.value != "(все)":
-                tid = teacher_dropdown.value
-                filtered = [c for c in filtered if c["teacher_id"] == tid]
-
-            # group filter
-            if group_dropdown.value and group_dropdown.value != "(все)":
-                gid = group_dropdown.value
-                filtered = [c for c in filtered if c["group_id"] == gid]
-
-            # building filter -> need rooms in building
-            if building_dropdown.value and building_dropdown.value != "(все)":
-                bid = building_dropdown.value
-                room_ids = {r["id"] for r in state["rooms"] if r["building_id"] == bid}
-                filtered = [c for c in filtered if c["room_id"] in room_ids]
-
-            # rebuild table rows
-            classes_table.rows = build_classes_rows(filtered)
-            page.update()
+        # filtering logic: фильтры уходят в запрос, таблица обновляет только изменившиеся строки
+        async def apply_filters():
+            await classes_table.set_filters(
+                day=day_dropdown.value,
+                teacher_id=teacher_dropdown.value,
+                group_id=group_dropdown.value,
+                building_id=building_dropdown.value,
+            )
 
-        def on_clear():
+        async def on_clear():
             day_dropdown.value = "(все)"
             teacher_dropdown.value = "(все)"
             group_dropdown.value = "(все)"
             building_dropdown.value = "(все)"
-            apply_filters()
+            filters_row.update()
+            await apply_filters()
 
         # attach handlers
-        def dropdown_changed(e):
-            apply_filters()
+        async def dropdown_changed(e):
+            await apply_filters()
 
+        clear_button.on_click = on_clear
         day_dropdown.on_change = dropdown_changed
         teacher_dropdown.on_change = dropdown_changed
         group_dropdown.on_change = dropdown_changed
         building_dropdown.on_change = dropdown_changed
 
-        # initial fill
-        apply_filters()
-
         # assemble UI
         filters_row = ft.Row(
             [
@@ -565,8 +630,11 @@ def main_page(page: ft.Page):
         section_content.controls.append(ft.Text("Фильтры по предикатам", size=18, weight=ft.FontWeight.BOLD))
         section_content.controls.append(filters_row)
         section_content.controls.append(ft.Divider())
-        section_content.controls.append(classes_table)
+        section_content.controls.append(classes_table.control)
         page.update()
+        # initial fill
+        page.run_task(classes_table.refresh)
+        live_refresh["fn"], live_refresh["remote"] = classes_table.refresh, True
 
     # ---------------------- Data tab ----------------------
     def show_data_section():
@@ -575,12 +643,11 @@ def main_page(page: ft.Page):
             section_content.controls.append(ft.Text("Загрузка...", color=ft.Colors.BLACK87))
             page.update()
             try:
-                async with httpx.AsyncClient() as client:
-                    await client.post(f"{BACKEND_URL}/load_seed", timeout=10.0)
-                    r = await client.get(f"{BACKEND_URL}/data", timeout=10.0)
-                    data = r.json()
-                    # update global state
-                    state.update(data)
+                # один запрос через общий пул соединений: загрузка seed + справочники в колоночном JSON;
+                # занятия не загружаются — таблица Overview получает их страницами
+                data = await get_backend(BACKEND_URL).load_and_fetch(REFERENCE_TABLES)
+                state.update(data)
+                start_listening()
                 section_content.controls.clear()
                 section_content.controls.append(ft.Text("Данные успешно загружены!", color=ft.Colors.GREEN))
                 section_content.controls.append(ft.ElevatedButton("Перейти на Overview", on_click=lambda e: switch_section("Overview")))
@@ -625,7 +692,8 @@ def main_page(page: ft.Page):
             ))
         page.update()
         def compute_conflicts():
-            result = memo.compute_timetable_stats("допустим", transforms.to_tuple(Class, state["classes"]), transforms.to_tuple(Slot, state["slots"]))
+            tables = view_model(state).entities
+            result = memo.compute_timetable_stats("допустим", tables["classes"], tables["slots"])
             colisions = result[0][1]
             windows = result[1][1]
             if isinstance(section_content.controls[-1], ft.Text):
@@ -656,13 +724,17 @@ def main_page(page: ft.Page):
             state.update(new_state)
             room_table.rows = build_room_table_rows()
             page.update()
+            page.run_task(send_event, event_name, payload)
+
+        async def refresh_rooms():
+            room_table.rows = build_room_table_rows()
+            room_table.update()
 
         # ASSIGN_SLOT
         section_content.controls.append(ft.Text("Назначить слот занятию (ASSIGN_SLOT)"))
         assign_class_dropdown = create_dropdown("Выберите занятие", state["classes"])
-        assign_slot_dropdown = create_dropdown(
-            "Выберите слот", state["slots"], text_func=lambda s: f"{s['day']} {s['start']}-{s['end']}"
-        )
+        vm = view_model(state)
+        assign_slot_dropdown = create_dropdown("Выберите слот", state["slots"], text_func=vm.slot_label)
         assign_slot_button = ft.ElevatedButton(
             "Назначить слот",
             on_click=lambda e: publish_event_safe(
@@ -678,7 +750,7 @@ def main_page(page: ft.Page):
         move_room_dropdown = create_dropdown(
             "Выберите аудиторию",
             state["rooms"],
-            text_func=lambda r: f"{r['name']} ({next(b['name'] for b in state['buildings'] if b['id']==r['building_id'])})"
+            text_func=vm.room_label
         )
         move_class_button = ft.ElevatedButton(
             "Переместить занятие",
@@ -735,14 +807,12 @@ def main_page(page: ft.Page):
         section_content.controls.append(room_table)
 
         def build_room_table_rows():
+            # представление пересобирается один раз после события, дальше — поиск по словарям
+            vm = view_model(state)
             rows = []
-            for room in state["rooms"]:
-                building_name = next((b["name"] for b in state["buildings"] if b["id"] == room["building_id"]), "")
-                scheduled_classes = [
-                    f"{c['id']} ({c.get('status','')})"
-                    for c in state["classes"]
-                    if c.get("room_id") == room["id"] and c.get("status") in ("scheduled", "moved")
-                ]
+            for room in vm.rooms:
+                building_name = vm.building_name(room["building_id"])
+                scheduled_classes = [f"{c['id']} ({c.get('status','')})" for c in vm.room_occupancy(room["id"])]
                 rows.append(
                     ft.DataRow(
                         cells=[
@@ -756,6 +826,7 @@ def main_page(page: ft.Page):
             return rows
 
         room_table.rows = build_room_table_rows()
+        live_refresh["fn"] = refresh_rooms
         page.update()
 
     def show_reports_section():
@@ -772,6 +843,7 @@ def main_page(page: ft.Page):
             options=[
                 ft.dropdown.Option("week", text="Неделя"),
                 ft.dropdown.Option("month", text="Месяц"),
+                ft.dropdown.Option("term", text="Семестр (16 недель)"),
                 ft.dropdown.Option("custom", text="Выбор дней"),
             ],
             value="week",
@@ -787,13 +859,14 @@ def main_page(page: ft.Page):
         status_text = ft.Text("", color=ft.Colors.BLACK87)
         out_area = ft.Column()
 
+        # число недель для развёртки недельного шаблона по календарю
+        period_weeks = {"week": 1, "month": 4, "term": 16, "custom": 1}
+
         def build_days_list() -> List[str]:
             kind = period_dropdown.value
-            if kind == "week":
-                return ["monday", "tuesday", "wednesday", "thursday", "friday"]
-            if kind == "month":
-                return ["monday", "tuesday", "wednesday", "thursday", "friday"]
-            return [k for k, cb in day_checkboxes.items() if cb.value]
+            if kind == "custom":
+                return [k for k, cb in day_checkboxes.items() if cb.value]
+            return ["monday", "tuesday", "wednesday", "thursday", "friday"]
 
         async def run_period_report(e):
             generate_button.disabled = True
@@ -802,11 +875,7 @@ def main_page(page: ft.Page):
             page.update()
 
             kind = period_dropdown.value
-
-            if kind == "custom":
-                selected_days = [k for k, cb in day_checkboxes.items() if cb.value]
-            else:
-                selected_days = build_days_list()
+            selected_days = build_days_list()
 
             if not selected_days:
                 status_text.value = "Ни один день не выбран."
@@ -815,16 +884,9 @@ def main_page(page: ft.Page):
                 return
 
             try:
-                weeks_results = []
-                if kind == "month":
-                    for week_index in range(4):
-                        status_text.value = f"Генерация: неделя {week_index+1}..."
-                        page.update()
-                        week_result = await generate_period_report(selected_days, state.get("classes", ()), state.get("rooms", ()), state.get("slots", ()), state.get("groups", ()))
-                        weeks_results.append(week_result)
-                else:
-                    single = await generate_period_report(selected_days, state.get("classes", ()), state.get("rooms", ()), state.get("slots", ()), state.get("groups", ()))
-                    weeks_results.append(single)
+                # планирование выполняется один раз для недельного шаблона
+                tables = view_model(state).entities
+                period_result = await generate_period_report(selected_days, tables["classes"], tables["rooms"], tables["slots"], tables["groups"], executor=schedule_pool)
             except Exception as ex:
                 status_text.value = f"Ошибка при генерации: {ex}"
                 generate_button.disabled = False
@@ -832,65 +894,66 @@ def main_page(page: ft.Page):
                 return
 
             updated_by_id: Dict[str, Any] = {}
-            for week_res in weeks_results:
-                for day_res in week_res.get("days", []):
-                    for c in day_res.get("classes", ()):
-                        if hasattr(c, "__dict__") and not isinstance(c, dict):
-                            updated_by_id[getattr(c, "id")] = c.__dict__
-                        else:
-                            updated_by_id[c["id"]] = c
+            for day_res in period_result.get("days", []):
+                for c in day_res.get("classes", ()):
+                    if not isinstance(c, dict):
+                        updated_by_id[c.id] = transforms.serialize_tuple((c,))[0]
+                    else:
+                        updated_by_id[c["id"]] = c
 
-            existing = {c["id"]: c for c in state.get("classes", [])}
-            merged = dict(existing)
+            merged = dict(view_model(state).classes_by_id)
             merged.update(updated_by_id)
 
             state["classes"] = list(merged.values())
 
             out_area.controls.clear()
 
-            for wi, week_res in enumerate(weeks_results):
-                out_area.controls.append(ft.Text(f"Отчёт за неделю {wi+1}", weight=ft.FontWeight.BOLD))
-                for day_res in week_res.get("days", []):
-                    rep = day_res.get("report", {})
-                    out_area.controls.append(ft.Text(f"  День: {day_res.get('day')}", weight=ft.FontWeight.BOLD))
-                    out_area.controls.append(ft.Text(f"    Запланировано (slot_id present): {rep.get('scheduled_count')}"))
-                    out_area.controls.append(ft.Text(f"    Назначено в этом запуске: {rep.get('assigned_this_run')}"))
-                    out_area.controls.append(ft.Text(f"    Не назначено: {rep.get('unscheduled_count')}"))
-                    out_area.controls.append(ft.Text(f"    Коллизий: {len(rep.get('collisions', []))}"))
-                    if rep.get('collisions'):
-                        for coll in rep.get('collisions', []):
-                            if coll.get('type') == 'room_conflict':
-                                out_area.controls.append(ft.Text(f"      Конфликт аудитории {coll.get('room_id')}: {coll.get('classes')}"))
-                            else:
-                                out_area.controls.append(ft.Text(f"      Конфликт преподавателя {coll.get('teacher_id')}: {coll.get('classes')}"))
-                    if rep.get('assigned_ids'):
-                        out_area.controls.append(ft.Text(f"    Назначенные занятия (ids): {', '.join(rep.get('assigned_ids'))}"))
-                    if rep.get('unassigned_ids'):
-                        out_area.controls.append(ft.Text(f"    Неназначенные занятия (ids): {', '.join(rep.get('unassigned_ids'))}"))
-                    out_area.controls.append(ft.Divider())
-
-            total_agg = {
-                'total_days': 0,
-                'total_scheduled': 0,
-                'total_assigned_this_run': 0,
-                'total_unscheduled': 0,
-                'total_collisions': 0,
-            }
-            for week_res in weeks_results:
-                agg = week_res.get('aggregated', {})
-                total_agg['total_days'] += agg.get('total_days', 0)
-                total_agg['total_scheduled'] += agg.get('total_scheduled', 0)
-                total_agg['total_assigned_this_run'] += agg.get('total_assigned_this_run', 0)
-                total_agg['total_unscheduled'] += agg.get('total_unscheduled', 0)
-                total_agg['total_collisions'] += agg.get('total_collisions', 0)
-
+            out_area.controls.append(ft.Text("Недельный шаблон", weight=ft.FontWeight.BOLD))
+            for day_res in period_result.get("days", []):
+                rep = day_res.get("report", {})
+                out_area.controls.append(ft.Text(f"  День: {day_res.get('day')}", weight=ft.FontWeight.BOLD))
+                out_area.controls.append(ft.Text(f"    Запланировано (slot_id present): {rep.get('scheduled_count')}"))
+                out_area.controls.append(ft.Text(f"    Назначено в этом запуске: {rep.get('assigned_this_run')}"))
+                out_area.controls.append(ft.Text(f"    Не назначено: {rep.get('unscheduled_count')}"))
+                out_area.controls.append(ft.Text(f"    Коллизий: {len(rep.get('collisions', []))}"))
+                if rep.get('collisions'):
+                    for coll in rep.get('collisions', []):
+                        if coll.get('type') == 'room_conflict':
+                            out_area.controls.append(ft.Text(f"      Конфликт аудитории {coll.get('room_id')}: {coll.get('classes')}"))
+                        else:
+                            out_area.controls.append(ft.Text(f"      Конфликт преподавателя {coll.get('teacher_id')}: {coll.get('classes')}"))
+                if rep.get('assigned_ids'):
+                    out_area.controls.append(ft.Text(f"    Назначенные занятия (ids): {', '.join(rep.get('assigned_ids'))}"))
+                if rep.get('unassigned_ids'):
+                    out_area.controls.append(ft.Text(f"    Неназначенные занятия (ids): {', '.join(rep.get('unassigned_ids'))}"))
+                out_area.controls.append(ft.Divider())
+
+            # развёртка шаблона по датам: отчёты по неделям без повторного планирования
+            term = term_weeks(date.today(), period_weeks.get(kind, 1))
+            template_slots = [s for s in state.get("slots", []) if s["day"] in selected_days]
+            occurrences = iter_occurrences(
+                term, view_model(state).entities["classes"], transforms.to_tuple(Slot, template_slots)
+            )
+            week_reports = []
+            for week_rep in iter_week_reports(occurrences, term):
+                week_reports.append(week_rep)
+                out_area.controls.append(ft.Text(
+                    f"Неделя {week_rep['week']} ({week_rep['start']:%d.%m}–{week_rep['end']:%d.%m}, "
+                    f"{'нечётная' if week_rep['parity'] == 'odd' else 'чётная'}): "
+                    f"занятий {week_rep['held']}, отменено {week_rep['cancelled']}"
+                ))
+            term_totals = aggregate_term(week_reports)
+
+            agg = period_result.get('aggregated', {})
+            out_area.controls.append(ft.Divider())
             out_area.controls.append(ft.Text("Итоговый сводный отчёт:", weight=ft.FontWeight.BOLD))
-            out_area.controls.append(ft.Text(f"  Всего недель: {len(weeks_results)}"))
-            out_area.controls.append(ft.Text(f"  Всего дней: {total_agg.get('total_days')}"))
-            out_area.controls.append(ft.Text(f"  Всего запланировано: {total_agg.get('total_scheduled')}"))
-            out_area.controls.append(ft.Text(f"  Всего назначено: {total_agg.get('total_assigned_this_run')}"))
-            out_area.controls.append(ft.Text(f"  Всего не назначено: {total_agg.get('total_unscheduled')}"))
-            out_area.controls.append(ft.Text(f"  Всего коллизий: {total_agg.get('total_collisions')}"))
+            out_area.controls.append(ft.Text(f"  Всего недель: {term_totals['weeks']}"))
+            out_area.controls.append(ft.Text(f"  Всего дней в шаблоне: {agg.get('total_days')}"))
+            out_area.controls.append(ft.Text(f"  Всего запланировано: {agg.get('total_scheduled')}"))
+            out_area.controls.append(ft.Text(f"  Всего назначено: {agg.get('total_assigned_this_run')}"))
+            out_area.controls.append(ft.Text(f"  Всего не назначено: {agg.get('total_unscheduled')}"))
+            out_area.controls.append(ft.Text(f"  Всего коллизий: {agg.get('total_collisions')}"))
+            out_area.controls.append(ft.Text(f"  Проведённых занятий за период: {term_totals['held']}"))
             out_area.controls.append(ft.Divider())
 
             status_text.value = "Готово."
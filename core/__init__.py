@@ -0,0 +1,41 @@
+# core/__init__.py
+# `import core` ничего не загружает: подмодули подгружаются при первом обращении к атрибуту
+# (core.search, core.db, core.export, ... — PEP 562). Так точки входа платят только за то, чем
+# действительно пользуются; тяжёлые части (решатели, SQLite, экспорт, профилирование) загружаются
+# при первом запросе, которому они нужны.
+import importlib
+import importlib.util
+import sys
+
+_SUBMODULES = frozenset({
+    "async_schedule", "bench", "broadcast", "compose", "conflict_graph", "constraints", "db", "domain", "encoding",
+    "export", "frp", "ftypes", "jobs", "lazy", "matching", "memo", "metrics", "profiling", "query",
+    "recursion", "repair", "search", "service", "startup", "store", "term", "timeline", "transforms", "windows",
+})
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES)
+
+
+def lazy_import(name: str):
+    #Модуль, который выполнится при первом обращении к его атрибуту (для тяжёлых сторонних
+    #зависимостей вроде httpx); уже загруженный модуль возвращается как есть
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
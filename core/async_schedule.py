@@ -1,44 +1,14 @@
 # core/async_schedule.py
 import asyncio
+from concurrent.futures import Executor
 from dataclasses import asdict
-from typing import Tuple, Callable, Dict, Any
+from typing import Tuple, Callable, Dict, Any, Optional
 from functools import reduce
 
-from core.domain import Building, Room, Teacher, Group, Course, Slot, Class, Constraint
-
-# небольшие хелперы — совместимы со стилем из примеров
-def to_tuple(type_, items):
-    if items is None:
-        return tuple()
-    # If already dataclass instances, leave them
-    if items and isinstance(items[0], type_):
-        return tuple(items)
-    return tuple(type_(**it) for it in items)
-
-
-def _ensure_rooms(rooms):
-    if not rooms:
-        return tuple()
-    if not isinstance(rooms[0], Room):
-        return to_tuple(Room, rooms)
-    return rooms
-
-
-def _ensure_slots(slots):
-    if not slots:
-        return tuple()
-    if not isinstance(slots[0], Slot):
-        return to_tuple(Slot, slots)
-    return slots
-
-
-def _ensure_classes(classes):
-    if not classes:
-        return tuple()
-    if not isinstance(classes[0], Class):
-        return to_tuple(Class, classes)
-    return classes
-
+from core.domain import Building, Room, Teacher, Group, Course, Slot, Class, Constraint, EntityTuple, entities
+from core.conflict_graph import ConflictGraph, dsatur
+from core.matching import hopcroft_karp
+from core.metrics import instrument
 
 # Простая логика совместимости комнаты и занятия:
 def _room_matches_needs(room: Room, needs: Any) -> bool:
@@ -69,35 +39,86 @@ def _group_size_ok(room: Room, group: Group) -> bool:
     return room.capacity >= group.size
 
 
-def _find_slot_room_combination(
-    class_obj: Class, groups: Tuple[Group, ...], day_slots: Tuple[Slot, ...], rooms: Tuple[Room, ...], taken_combos: set
-):
+def _assign_by_slots(pending, groups, day_slots, rooms, taken_combos, taken_teacher_slot, taken_group_slot):
     """
-    Ищет первую подходящую пару (slot_id, room_id) для class_obj на этом дне,
-    учитывая уже занятые комбинации (slot_id, room_id).
-    Возвращает (slot_id, room_id) или (None, None).
+    Расставляет pending по слотам дня. В каждом слоте занятия-кандидаты (не больше одного на
+    преподавателя и на группу) сопоставляются свободным аудиториям алгоритмом Хопкрофта — Карпа:
+    занимается максимум аудиторий, крупные группы получают самые тесные из подходящих.
+    Возвращает {class_id: (slot_id, room_id)}; множества taken_* дополняются.
     """
-    # получим группу по id
-    group = None
-    for g in groups:
-        if g.id == class_obj.group_id:
-            group = g
-            break
+    size = {g.id: g.size for g in groups}
+    rooms_by_capacity = sorted(rooms, key=lambda r: (r.capacity, r.id))
+    # занятия с одинаковыми (needs, размер группы) подходят одним и тем же аудиториям —
+    # список подходящих аудиторий считается один раз на такой «вид»
+    kind_rooms = {}
+    kinds = {}
+    for c in pending:
+        needs = tuple(c.needs) if isinstance(c.needs, (list, tuple)) else c.needs
+        kind = kinds[c.id] = (needs, size.get(c.group_id, 0))
+        if kind not in kind_rooms:
+            kind_rooms[kind] = [r.id for r in rooms_by_capacity
+                                if r.capacity >= kind[1] and _room_matches_needs(r, c.needs)]
+    # крупные группы первыми: в жадной части паросочетания они выбирают раньше
+    queue = sorted((c for c in pending if kind_rooms[kinds[c.id]]), key=lambda c: -kinds[c.id][1])
 
+    by_id = {c.id: c for c in queue}
+    placed = {}
     for slot in day_slots:
-        for room in rooms:
-            combo = (slot.id, room.id)
-            if combo in taken_combos:
+        free = {kind: [r for r in ids if (slot.id, r) not in taken_combos] for kind, ids in kind_rooms.items()}
+        # одинаковые по виду занятия взаимозаменяемы: больше кандидатов, чем свободных аудиторий вида, не нужно
+        quota = {kind: len(ids) for kind, ids in free.items()}
+        teachers, groups_in_slot = set(), set()
+        candidates = []
+        for c in queue:
+            kind = kinds[c.id]
+            if c.id in placed or not quota[kind]:
                 continue
-            if not _room_matches_needs(room, class_obj.needs):
+            if (c.teacher_id, slot.id) in taken_teacher_slot or c.teacher_id in teachers:
                 continue
-            if group and not _group_size_ok(room, group):
+            if (c.group_id, slot.id) in taken_group_slot or c.group_id in groups_in_slot:
                 continue
-            return slot.id, room.id
-    return None, None
+            candidates.append(c.id)
+            teachers.add(c.teacher_id)
+            groups_in_slot.add(c.group_id)
+            quota[kind] -= 1
+        if not candidates:
+            continue
+        matched = hopcroft_karp(candidates, {cid: free[kinds[cid]] for cid in candidates})
+        for class_id, room_id in matched.items():
+            c = by_id[class_id]
+            placed[class_id] = (slot.id, room_id)
+            taken_combos.add((slot.id, room_id))
+            taken_teacher_slot.add((c.teacher_id, slot.id))
+            taken_group_slot.add((c.group_id, slot.id))
+    return placed
 
 
-async def schedule_batch(day: str, classes, rooms, slots, groups) -> dict:
+def _assign_by_coloring(pending, classes, groups, day_slots, rooms, taken_combos, taken_teacher_slot,
+                        taken_group_slot):
+    """
+    Предварительный проход: DSATUR раскрашивает граф конфликтов слотами дня (ёмкость слота —
+    число свободных аудиторий), затем в каждом слоте аудитории распределяются паросочетанием
+    только между занятиями этого цвета.
+    """
+    day_slot_ids = [s.id for s in day_slots]
+    graph = ConflictGraph([c for c in classes if not c.slot_id or c.slot_id in day_slot_ids])
+    fixed = {c.id: c.slot_id for c in classes if c.slot_id in day_slot_ids}
+    capacity = {s: sum(1 for r in rooms if (s, r.id) not in taken_combos) + sum(1 for v in fixed.values() if v == s)
+                for s in day_slot_ids}
+    colors = dsatur(graph, day_slot_ids, capacity, fixed, only=[c.id for c in pending])
+    by_color = {}
+    for c in pending:
+        if c.id in colors:
+            by_color.setdefault(colors[c.id], []).append(c)
+    placed = {}
+    for slot in day_slots:
+        if slot.id in by_color:
+            placed.update(_assign_by_slots(by_color[slot.id], groups, (slot,), rooms,
+                                           taken_combos, taken_teacher_slot, taken_group_slot))
+    return placed
+
+
+async def schedule_batch(day: str, classes, rooms, slots, groups, executor: Optional[Executor] = None) -> dict:
     """
     Асинхронно планирует (на заданный день) все занятия, которые ещё не имеют slot_id.
     Возвращает словарь с ключами:
@@ -106,65 +127,80 @@ async def schedule_batch(day: str, classes, rooms, slots, groups) -> dict:
       - report: dict (scheduled, unscheduled, collisions, details)
     Параллельность достигается тем, что функция является coroutine и generate_period_report
     вызывает её через asyncio.gather для нескольких дней одновременно.
+    Если передан executor, расчёт (schedule_day) выполняется в нём и не блокирует цикл событий.
     """
+    if executor is not None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, schedule_day, day, classes, rooms, slots, groups)
     # tiny await чтобы показать, что это coroutine (симуляция I/O/CPU-bound)
     await asyncio.sleep(0)
+    return schedule_day(day, classes, rooms, slots, groups)
+
 
-    classes = _ensure_classes(classes)
-    rooms = _ensure_rooms(rooms)
-    slots = _ensure_slots(slots)
-    groups = to_tuple(Group, groups) if groups and not isinstance(groups[0], Group) else groups
+@instrument("schedule", items=lambda r: len(r["classes"]))
+def schedule_day(day: str, classes, rooms, slots, groups, coloring: bool = True) -> dict:
+    """
+    Синхронное ядро schedule_batch: чистая функция без обращения к циклу событий,
+    поэтому её можно выполнять в пуле потоков или процессов (см. core/jobs.py).
+    Сначала слоты выбираются раскраской графа конфликтов (core/conflict_graph.py), затем аудитории
+    распределяются внутри каждого слота; не раскрашенные занятия идут обычным путём.
+    coloring=False — без раскраски, только распределение по слотам подряд.
+    """
+    # единственное приведение типов; для уже приведённых кортежей — без копирования
+    classes = entities(Class, classes)
+    rooms = entities(Room, rooms)
+    slots = entities(Slot, slots)
+    groups = entities(Group, groups)
 
     # слоты только для этого дня
     day_slots = tuple(s for s in slots if s.day.lower() == day.lower())
 
     # набор занятых комбинаций (slot_id, room_id) на этом дне — учтём уже запланированные занятия
+    day_slot_ids = {s.id for s in day_slots}
     taken_combos = set()
     taken_teacher_slot = set()  # (teacher_id, slot_id) занятые
+    taken_group_slot = set()  # (group_id, slot_id) занятые
     for c in classes:
-        if c.slot_id and c.room_id:
-            # проверяем, что slot принадлежит дню
-            slot_objs = tuple(filter(lambda s: s.id == c.slot_id, day_slots))
-            if slot_objs:
-                taken_combos.add((c.slot_id, c.room_id))
-                taken_teacher_slot.add((c.teacher_id, c.slot_id))
+        if c.slot_id and c.room_id and c.slot_id in day_slot_ids:
+            taken_combos.add((c.slot_id, c.room_id))
+            taken_teacher_slot.add((c.teacher_id, c.slot_id))
+            taken_group_slot.add((c.group_id, c.slot_id))
 
+    # назначаем только занятия с пустым slot_id: слот за слотом, аудитории внутри слота —
+    # максимальным паросочетанием (core/matching.py), а не «первая подходящая первому в очереди»
+    pending = [c for c in classes if not c.slot_id]
+    placed = {}
+    if coloring and pending:
+        placed = _assign_by_coloring(pending, classes, groups, day_slots, rooms,
+                                     taken_combos, taken_teacher_slot, taken_group_slot)
+        pending = [c for c in pending if c.id not in placed]
+    placed.update(_assign_by_slots(
+        pending, groups, day_slots, rooms,
+        taken_combos, taken_teacher_slot, taken_group_slot,
+    ))
     updated = []
     assigned = []
     unassigned = []
-    # итерация по занятиям: назначаем только те, у кого пустой slot_id
     for c in classes:
-        if c.slot_id:  # уже запланировано — копируем как есть
+        target = placed.get(c.id)
+        if target is None:
             updated.append(c)
-            continue
-        # ищем первую подходящую (slot, room)
-        slot_id, room_id = _find_slot_room_combination(c, groups, day_slots, rooms, taken_combos)
-        if slot_id and room_id:
-            # проверяем конфликт по преподавателю (один преподаватель в один слот)
-            if (c.teacher_id, slot_id) in taken_teacher_slot:
-                # нельзя назначить в этот слот — считаем, что нет подходящего
+            if not c.slot_id:
                 unassigned.append(c)
-                updated.append(c)
-                continue
-            # сформируем обновлённый класс (иммутабельно)
-            updated_c = Class(
-                id=c.id,
-                course_id=c.course_id,
-                needs=c.needs,
-                teacher_id=c.teacher_id,
-                group_id=c.group_id,
-                slot_id=slot_id,
-                room_id=room_id,
-                status="scheduled",
-            )
-            updated.append(updated_c)
-            assigned.append(updated_c)
-            taken_combos.add((slot_id, room_id))
-            taken_teacher_slot.add((c.teacher_id, slot_id))
-        else:
-            # не удалось назначить
-            unassigned.append(c)
-            updated.append(c)
+            continue
+        # сформируем обновлённый класс (иммутабельно)
+        updated_c = Class(
+            id=c.id,
+            course_id=c.course_id,
+            needs=c.needs,
+            teacher_id=c.teacher_id,
+            group_id=c.group_id,
+            slot_id=target[0],
+            room_id=target[1],
+            status="scheduled",
+        )
+        updated.append(updated_c)
+        assigned.append(updated_c)
 
     # Детекция коллизий: те же (slot_id, room_id) или (teacher_id, slot_id) дублируются => коллизии
     collisions = []
@@ -211,10 +247,11 @@ async def schedule_batch(day: str, classes, rooms, slots, groups) -> dict:
         "unassigned_ids": [c.id for c in unassigned],
     }
 
-    return {"day": day, "classes": tuple(updated), "report": report}
+    return {"day": day, "classes": EntityTuple(updated, Class), "report": report}
 
 
-async def generate_period_report(days: list[str], classes, rooms, slots, groups) -> dict:
+async def generate_period_report(days: list[str], classes, rooms, slots, groups,
+                                 executor: Optional[Executor] = None) -> dict:
     """
     Параллельно вызывает schedule_batch для списка дней и агрегирует отчёты.
     Возвращает dict:
@@ -224,17 +261,20 @@ async def generate_period_report(days: list[str], classes, rooms, slots, groups)
     # build tasks
     tasks = []
     for d in days:
-        tasks.append(schedule_batch(d, classes, rooms, slots, groups))
+        tasks.append(schedule_batch(d, classes, rooms, slots, groups, executor=executor))
 
     # одновременно выполняем по дням
     results = await asyncio.gather(*tasks)
 
-    aggregated = {
+    return {"days": results, "aggregated": aggregate_days(results)}
+
+
+def aggregate_days(results) -> dict:
+    #Итоги по результатам schedule_day за несколько дней
+    return {
         "total_days": len(results),
         "total_scheduled": sum(r["report"]["scheduled_count"] for r in results),
         "total_assigned_this_run": sum(r["report"]["assigned_this_run"] for r in results),
         "total_unscheduled": sum(r["report"]["unscheduled_count"] for r in results),
         "total_collisions": sum(len(r["report"]["collisions"]) for r in results),
     }
-
-    return {"days": results, "aggregated": aggregated}
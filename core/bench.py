@@ -0,0 +1,66 @@
+# core/bench.py
+# Замер загрузки занятий: разбор JSON + построение Class через transforms.to_tuple,
+# время загрузки и память, которую удерживают загруженные занятия.
+#
+# Запуск:
+#   python -m core.bench --classes 100000
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from core import transforms
+from core.domain import Class
+
+
+@dataclass(frozen=True)
+class LoadReport:
+    classes: int
+    load_ms: float
+    bytes_per_class: float
+
+    def to_dict(self) -> dict:
+        return {"classes": self.classes, "load_ms": round(self.load_ms, 2),
+                "bytes_per_class": round(self.bytes_per_class, 1)}
+
+
+def class_rows(n: int) -> list:
+    return [
+        {"id": f"C{i}", "course_id": f"CS{i % 50}", "needs": "", "teacher_id": f"T{i % 500:03d}",
+         "group_id": f"G{i % 800:03d}", "slot_id": f"MON{i % 5 + 1}", "room_id": f"R{i % 100:02d}",
+         "status": "scheduled"}
+        for i in range(n)
+    ]
+
+
+def measure_load(n: int = 100_000) -> LoadReport:
+    payload = json.dumps({"classes": class_rows(n)})
+
+    start = time.perf_counter()
+    classes = transforms.to_tuple(Class, json.loads(payload)["classes"])
+    load_ms = (time.perf_counter() - start) * 1000
+    del classes
+
+    tracemalloc.start()
+    try:
+        classes = transforms.to_tuple(Class, json.loads(payload)["classes"])
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return LoadReport(n, load_ms, retained / n)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load time and memory per class.")
+    parser.add_argument("--classes", type=int, default=100_000)
+    args = parser.parse_args(argv)
+    report = measure_load(args.classes)
+    print(f"{report.classes} classes: {report.load_ms:.1f} ms, {report.bytes_per_class:.1f} bytes per class")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# core/broadcast.py
+# Рассылка изменений расписания подписчикам (WebSocket/SSE).
+# Изменение — событие frp.Event (name, payload) + версия данных + темы (корпус, преподаватель, группа),
+# которых оно касается. Подписчик получает только изменения своих тем; события, пришедшие в течение
+# окна coalesce, отправляются одним кадром, а повторные изменения одной сущности в кадре схлопываются.
+# Медленный подписчик не тормозит остальных: при переполнении его очереди кадры отбрасываются и
+# вместо них приходит {"type": "resync"} — сигнал перечитать данные целиком.
+import asyncio
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, FrozenSet, List, Mapping, Optional, Set
+
+TOPIC_KINDS = ("building", "teacher", "group")
+
+
+@dataclass(frozen=True)
+class Change:
+    name: str                                       #имя события frp (ASSIGN_SLOT, MOVE_CLASS, ...)
+    payload: dict
+    version: int                                    #версия данных после изменения
+    topics: Mapping[str, FrozenSet[str]]            #вид темы -> id, которых касается изменение
+
+    def key(self):
+        #Изменения одной сущности в пределах кадра заменяют друг друга
+        entity = self.payload.get("class_id") or self.payload.get("id")
+        return (self.name, entity) if entity else (self.name, id(self))
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "payload": self.payload, "version": self.version}
+
+
+def topics_for(name: str, payload: dict, classes, rooms) -> Dict[str, FrozenSet[str]]:
+    #Темы изменения по данным до и после него: переезд занятия касается обоих корпусов
+    building_of = {r.id: r.building_id for r in rooms}
+    found: Dict[str, Set[str]] = {kind: set() for kind in TOPIC_KINDS}
+    class_id = payload.get("class_id")
+    if class_id:
+        for c in classes:
+            if c.id == class_id:
+                found["teacher"].add(c.teacher_id)
+                found["group"].add(c.group_id)
+                if c.room_id in building_of:
+                    found["building"].add(building_of[c.room_id])
+    if name == "ADD_CLASS":
+        # новое занятие: темы берутся из самого события
+        found["teacher"].add(payload.get("teacher_id") or "")
+        found["group"].add(payload.get("group_id") or "")
+        if payload.get("room_id") in building_of:
+            found["building"].add(building_of[payload["room_id"]])
+    room_id = payload.get("new_room")
+    if room_id in building_of:
+        found["building"].add(building_of[room_id])
+    if payload.get("building_id"):
+        found["building"].add(payload["building_id"])
+    return {kind: frozenset(ids - {""}) for kind, ids in found.items()}
+
+
+@dataclass
+class Subscription:
+    filters: Mapping[str, FrozenSet[str]]           #пусто — все изменения
+    window: float
+    frames: asyncio.Queue
+    pending: Dict[tuple, Change] = field(default_factory=dict)
+    flush_handle: Optional[asyncio.TimerHandle] = None
+    dropped: int = 0
+
+    def wants(self, change: Change) -> bool:
+        if not self.filters:
+            return True
+        return any(self.filters[kind] & change.topics.get(kind, frozenset()) for kind in self.filters)
+
+
+class Broadcaster:
+    def __init__(self, window: float = 0.05, queue_size: int = 64):
+        self.window = window
+        self.queue_size = queue_size
+        self.subscriptions: List[Subscription] = []
+        self.published = 0
+        self.frames_sent = 0
+
+    def subscribe(self, building_id=(), teacher_id=(), group_id=()) -> Subscription:
+        filters = {kind: frozenset(ids) for kind, ids in
+                   (("building", building_id), ("teacher", teacher_id), ("group", group_id)) if ids}
+        sub = Subscription(filters, self.window, asyncio.Queue(self.queue_size))
+        self.subscriptions.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        if sub.flush_handle is not None:
+            sub.flush_handle.cancel()
+        if sub in self.subscriptions:
+            self.subscriptions.remove(sub)
+
+    def publish(self, change: Change):
+        #Вызывается из цикла событий; отправка откладывается до конца окна coalesce
+        self.published += 1
+        loop = asyncio.get_running_loop()
+        for sub in self.subscriptions:
+            if not sub.wants(change):
+                continue
+            sub.pending.pop(change.key(), None)
+            sub.pending[change.key()] = change
+            if sub.flush_handle is None:
+                sub.flush_handle = loop.call_later(sub.window, self._flush, sub)
+
+    async def frames(self, sub: Subscription) -> AsyncIterator[dict]:
+        try:
+            while True:
+                yield await sub.frames.get()
+        finally:
+            self.unsubscribe(sub)
+
+    def _flush(self, sub: Subscription):
+        sub.flush_handle = None
+        if not sub.pending:
+            return
+        changes = list(sub.pending.values())
+        sub.pending.clear()
+        frame = {"type": "changes", "version": changes[-1].version, "events": [c.to_dict() for c in changes]}
+        try:
+            sub.frames.put_nowait(frame)
+        except asyncio.QueueFull:
+            # подписчик не успевает: старые кадры бесполезны, просим перечитать данные
+            sub.dropped += sub.frames.qsize() + 1
+            while not sub.frames.empty():
+                sub.frames.get_nowait()
+            sub.frames.put_nowait({"type": "resync", "version": frame["version"]})
+        self.frames_sent += 1
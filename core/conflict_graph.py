@@ -0,0 +1,118 @@
+# core/conflict_graph.py
+# Граф конфликтов занятий: вершины — занятия, ребро — общий преподаватель или общая группа
+# (такие занятия нельзя ставить в один слот). Хранится множествами смежности; занятия одного
+# преподавателя/группы образуют клику, по ним граф и строится.
+#
+# dsatur — раскраска графа слотами (цвет = слот) по правилу DSATUR: следующей красится вершина
+# с наибольшим числом разных цветов у соседей (при равенстве — с наибольшей степенью) в первый
+# допустимый цвет. У каждого цвета есть ёмкость (свободные аудитории слота); вершины, которым не
+# осталось цвета, не красятся. Используется как предварительный проход перед распределением
+# аудиторий в schedule_day (включён по умолчанию; coloring=False — без него).
+#
+# stats — характеристики графа для планирования: распределение степеней и клики (самая большая
+# клика — нижняя граница числа слотов, нужных без конфликтов).
+import heapq
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from core.domain import Class
+
+
+class ConflictGraph:
+    def __init__(self, classes: Iterable[Class]):
+        self.ids: List[str] = []
+        self.adj: Dict[str, Set[str]] = {}
+        self.cliques: Dict[Tuple[str, str], List[str]] = {}     #("teacher"|"group", id) -> занятия
+        for c in classes:
+            if c.status == "cancelled":
+                continue
+            self.ids.append(c.id)
+            self.adj[c.id] = set()
+            for key in (("teacher", c.teacher_id), ("group", c.group_id)):
+                if key[1]:
+                    self.cliques.setdefault(key, []).append(c.id)
+        for members in self.cliques.values():
+            for u in members:
+                self.adj[u].update(members)
+        for u, neighbours in self.adj.items():
+            neighbours.discard(u)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def degree(self, class_id: str) -> int:
+        return len(self.adj[class_id])
+
+    @property
+    def edges(self) -> int:
+        return sum(len(n) for n in self.adj.values()) // 2
+
+    def max_clique(self) -> List[str]:
+        #Нижняя оценка наибольшей клики: крупнейшая клика преподавателя/группы, дополненная жадно
+        if not self.ids:
+            return []
+        members = max(self.cliques.values(), key=len, default=[self.ids[0]])
+        clique = list(members)
+        common = set.intersection(*(self.adj[u] for u in clique)) if clique else set()
+        for v in sorted(common, key=lambda v: -self.degree(v)):
+            if v in common:
+                clique.append(v)
+                common &= self.adj[v]
+        return clique
+
+    def stats(self, top: int = 5) -> dict:
+        degrees = [self.degree(u) for u in self.ids]
+        distribution: Dict[int, int] = {}
+        for d in degrees:
+            distribution[d] = distribution.get(d, 0) + 1
+        largest = sorted(self.cliques.items(), key=lambda kv: -len(kv[1]))[:top]
+        return {
+            "vertices": len(self.ids),
+            "edges": self.edges,
+            "max_degree": max(degrees, default=0),
+            "mean_degree": round(sum(degrees) / len(degrees), 3) if degrees else 0.0,
+            "degree_distribution": dict(sorted(distribution.items())),
+            "max_clique": len(self.max_clique()),
+            "largest_cliques": [{"kind": kind, "id": entity, "size": len(members)}
+                                for (kind, entity), members in largest],
+        }
+
+
+def dsatur(graph: ConflictGraph, colors: Sequence[str], capacity: Optional[Mapping[str, int]] = None,
+           fixed: Optional[Mapping[str, str]] = None, only: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    #Раскраска вершин only (по умолчанию всех нефиксированных) цветами colors.
+    #fixed — уже окрашенные вершины (занятия, стоящие в слотах дня), они учитываются у соседей
+    #и занимают ёмкость цвета. Возвращает {class_id: цвет} только для новых вершин.
+    fixed = {u: c for u, c in (fixed or {}).items() if u in graph.adj}
+    left = dict(capacity) if capacity is not None else {c: len(graph) for c in colors}
+    for color in fixed.values():
+        if color in left:
+            left[color] -= 1
+    neighbour_colors: Dict[str, Set[str]] = {}
+    for u, color in fixed.items():
+        for v in graph.adj[u]:
+            neighbour_colors.setdefault(v, set()).add(color)
+    todo = [u for u in (only if only is not None else graph.ids) if u in graph.adj and u not in fixed]
+    position = {u: i for i, u in enumerate(todo)}
+    heap = [(-len(neighbour_colors.get(u, ())), -graph.degree(u), position[u], u) for u in todo]
+    heapq.heapify(heap)
+    result: Dict[str, str] = {}
+    done: Set[str] = set()
+    while heap:
+        saturation, _degree, _pos, u = heapq.heappop(heap)
+        if u in done or -saturation != len(neighbour_colors.get(u, ())):
+            continue                        # устаревшая запись кучи
+        done.add(u)
+        forbidden = neighbour_colors.get(u, set())
+        color = next((c for c in colors if c not in forbidden and left.get(c, 0) > 0), None)
+        if color is None:
+            continue
+        result[u] = color
+        left[color] -= 1
+        for v in graph.adj[u]:
+            seen = neighbour_colors.setdefault(v, set())
+            if v in position and v not in done and color not in seen:
+                seen.add(color)
+                heapq.heappush(heap, (-len(seen), -graph.degree(v), position[v], v))
+            else:
+                seen.add(color)
+    return result
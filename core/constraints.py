@@ -0,0 +1,264 @@
+# core/constraints.py
+# Мягкие ограничения из таблицы constraints (domain.Constraint: kind + payload) и штраф расписания.
+#
+# Каждый вид ограничения — плагин, зарегистрированный в PLUGINS декоратором @register(kind).
+# Плагины двух видов:
+#   ClassRule — штраф считается по одному занятию (предпочтительные корпуса, недоступность
+#               преподавателя); изменение штрафа при переносе — разность двух значений;
+#   DayRule   — штраф считается по занятиям одной группы/преподавателя за один день (окна,
+#               пары подряд, переезды между корпусами); при переносе пересчитываются только
+#               затронутые дни — не больше числа пар в дне, независимо от размера расписания.
+# Scoring хранит штрафы по этим частям и оценивает перенос занятия (delta) без полного пересчёта.
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple, Type
+
+from core.domain import Class, Constraint, Room, Slot
+from core.timeline import SlotIndex, SlotTime, slot_index
+
+SCOPES = ("group", "teacher")
+
+
+@dataclass(frozen=True)
+class Context:
+    index: SlotIndex
+    building_of: Dict[str, str]                     #room_id -> building_id
+
+
+@dataclass(frozen=True)
+class Placed:                                       #Занятие в составе дня: время и корпус
+    class_id: str
+    slot: SlotTime
+    building_id: str
+
+
+def _ids(payload: dict, key: str) -> Optional[FrozenSet[str]]:
+    #"teacher_id": "T01" или "teacher_id": ["T01", "T02"]; нет ключа — ограничение для всех
+    value = payload.get(key)
+    if value is None or value == "":
+        return None
+    return frozenset([value] if isinstance(value, str) else value)
+
+
+class Rule(ABC):
+    def __init__(self, constraint: Constraint):
+        payload = constraint.payload if isinstance(constraint.payload, dict) else {}
+        self.id = constraint.id
+        self.payload = payload
+        self.weight = float(payload.get("weight", 1))
+
+
+class ClassRule(Rule):
+    @abstractmethod
+    def penalty(self, c: Class, ctx: Context) -> float:
+        ...
+
+
+class DayRule(Rule):
+    def __init__(self, constraint: Constraint):
+        super().__init__(constraint)
+        default = "teacher" if "teacher_id" in self.payload else "group"
+        self.scope = self.payload.get("scope", default)
+        if self.scope not in SCOPES:
+            raise ValueError(f"Constraint {self.id}: unknown scope {self.scope!r}")
+        self.entities = _ids(self.payload, f"{self.scope}_id")
+
+    def applies(self, entity: str) -> bool:
+        return self.entities is None or entity in self.entities
+
+    @abstractmethod
+    def penalty(self, day: List[Placed], ctx: Context) -> float:
+        #day — занятия одной сущности за день, отсортированные по времени
+        ...
+
+
+PLUGINS: Dict[str, Type[Rule]] = {}
+
+
+def register(kind: str) -> Callable[[Type[Rule]], Type[Rule]]:
+    def decorator(cls: Type[Rule]) -> Type[Rule]:
+        PLUGINS[kind] = cls
+        return cls
+    return decorator
+
+
+# ---------------------- плагины ----------------------
+
+@register("max_windows_per_day")
+class MaxWindowsPerDay(DayRule):
+    #payload: max (по умолчанию 0), group_id | teacher_id, weight
+    def penalty(self, day, ctx):
+        extra = ctx.index.windows(p.slot.id for p in day) - int(self.payload.get("max", 0))
+        return self.weight * extra if extra > 0 else 0.0
+
+
+@register("max_consecutive")
+class MaxConsecutive(DayRule):
+    #payload: max (по умолчанию 3) — пар подряд без окна; штраф за каждую пару сверх лимита
+    def penalty(self, day, ctx):
+        limit = int(self.payload.get("max", 3))
+        total, run = 0, 0
+        for prev, cur in zip([None] + day, day):
+            adjacent = prev is not None and not _window_between(prev, cur, ctx)
+            run = run + 1 if adjacent else 1
+            if run > limit:
+                total += 1
+        return self.weight * total
+
+
+@register("building_travel")
+class BuildingTravel(DayRule):
+    #payload: minutes (по умолчанию 15) — перерыв, нужный на переезд между корпусами
+    def penalty(self, day, ctx):
+        minutes = int(self.payload.get("minutes", 15))
+        total = sum(1 for prev, cur in zip(day, day[1:])
+                    if prev.building_id and cur.building_id and prev.building_id != cur.building_id
+                    and cur.slot.start - prev.slot.end < minutes)
+        return self.weight * total
+
+
+@register("preferred_buildings")
+class PreferredBuildings(ClassRule):
+    #payload: buildings, group_id | teacher_id (нет — для всех занятий), weight
+    def __init__(self, constraint):
+        super().__init__(constraint)
+        self.buildings = frozenset(self.payload.get("buildings", ()))
+        self.teachers = _ids(self.payload, "teacher_id")
+        self.groups = _ids(self.payload, "group_id")
+
+    def penalty(self, c, ctx):
+        if not c.room_id or c.status == "cancelled" or (self.teachers is not None and c.teacher_id not in self.teachers) \
+                or (self.groups is not None and c.group_id not in self.groups):
+            return 0.0
+        return 0.0 if ctx.building_of.get(c.room_id) in self.buildings else self.weight
+
+
+@register("teacher_unavailable")
+class TeacherUnavailable(ClassRule):
+    #payload: teacher_id, slot_ids и/или day
+    def __init__(self, constraint):
+        super().__init__(constraint)
+        self.teachers = _ids(self.payload, "teacher_id") or frozenset()
+        self.slot_ids = frozenset(self.payload.get("slot_ids", ()))
+        self.day = str(self.payload.get("day", "")).lower()
+
+    def penalty(self, c, ctx):
+        if c.teacher_id not in self.teachers or not c.slot_id or c.status == "cancelled":
+            return 0.0
+        blocked = c.slot_id in self.slot_ids or (self.day and ctx.index.day_of(c.slot_id) == self.day)
+        return self.weight if blocked else 0.0
+
+
+def _window_between(prev: Placed, cur: Placed, ctx: Context) -> bool:
+    return ctx.index.days[cur.slot.day].windows_between(prev.slot.end, cur.slot.start) > 0
+
+
+def build_rules(constraints: Iterable[Constraint]) -> Tuple[List[Rule], List[str]]:
+    #Плагины для известных видов; id ограничений неизвестных видов возвращаются отдельно
+    rules, unknown = [], []
+    for constraint in constraints:
+        plugin = PLUGINS.get(constraint.kind)
+        if plugin is None:
+            unknown.append(constraint.id)
+        else:
+            rules.append(plugin(constraint))
+    return rules, unknown
+
+
+# ---------------------- инкрементальная оценка ----------------------
+
+Bucket = Tuple[str, str, str]                       #(scope, entity, day)
+
+
+class Scoring:
+    def __init__(self, constraints: Iterable[Constraint], classes: Iterable[Class], slots: Iterable[Slot],
+                 rooms: Iterable[Room]):
+        self.ctx = Context(slot_index(slots), {r.id: r.building_id for r in rooms})
+        self.rules, self.unknown = build_rules(constraints)
+        self.class_rules = [r for r in self.rules if isinstance(r, ClassRule)]
+        self.day_rules = {scope: [r for r in self.rules if isinstance(r, DayRule) and r.scope == scope]
+                          for scope in SCOPES}
+        self.classes: Dict[str, Class] = {}
+        self.days: Dict[Bucket, Dict[str, Placed]] = {}
+        self.by_rule: Dict[str, float] = {r.id: 0.0 for r in self.rules}
+        self._bucket_penalty: Dict[Bucket, Dict[str, float]] = {}
+        for c in classes:
+            self.classes[c.id] = c
+            for rule in self.class_rules:
+                self.by_rule[rule.id] += rule.penalty(c, self.ctx)
+            for bucket in self._buckets(c):
+                self.days.setdefault(bucket, {})[c.id] = self._placed(c)
+        for bucket, items in self.days.items():
+            penalties = self._bucket_penalty[bucket] = self._bucket_penalties(bucket, items)
+            for rule_id, p in penalties.items():
+                self.by_rule[rule_id] += p
+
+    @property
+    def total(self) -> float:
+        return sum(self.by_rule.values())
+
+    def delta(self, class_id: str, slot_id: str, room_id: str) -> float:
+        #Изменение штрафа, если занятие перенести в (slot_id, room_id); состояние не меняется
+        return sum(self._changes(class_id, slot_id, room_id)[0].values())
+
+    def apply(self, class_id: str, slot_id: str, room_id: str) -> float:
+        #Переносит занятие и возвращает новый штраф
+        by_rule, buckets, moved = self._changes(class_id, slot_id, room_id)
+        for rule_id, d in by_rule.items():
+            self.by_rule[rule_id] += d
+        for bucket, (items, penalties) in buckets.items():
+            if items:
+                self.days[bucket], self._bucket_penalty[bucket] = items, penalties
+            else:
+                self.days.pop(bucket, None)
+                self._bucket_penalty.pop(bucket, None)
+        self.classes[class_id] = moved
+        return self.total
+
+    def _changes(self, class_id: str, slot_id: str, room_id: str):
+        old = self.classes[class_id]
+        new = Class(old.id, old.course_id, old.needs, old.teacher_id, old.group_id, slot_id, room_id, old.status)
+        by_rule = {r.id: 0.0 for r in self.rules}
+        for rule in self.class_rules:
+            by_rule[rule.id] += rule.penalty(new, self.ctx) - rule.penalty(old, self.ctx)
+        buckets = {}
+        placed = self._placed(new)
+        new_buckets = set(self._buckets(new))
+        for bucket in set(self._buckets(old)) | new_buckets:
+            items = dict(self.days.get(bucket, {}))
+            items.pop(class_id, None)
+            if bucket in new_buckets:
+                items[class_id] = placed
+            penalties = self._bucket_penalties(bucket, items)
+            before = self._bucket_penalty.get(bucket, {})
+            for rule_id, p in penalties.items():
+                by_rule[rule_id] += p - before.get(rule_id, 0.0)
+            buckets[bucket] = (items, penalties)
+        return by_rule, buckets, new
+
+    def _buckets(self, c: Class) -> List[Bucket]:
+        day = self.ctx.index.day_of(c.slot_id) if c.slot_id and c.status != "cancelled" else None
+        if day is None:
+            return []
+        return [(scope, entity, day) for scope, entity in (("group", c.group_id), ("teacher", c.teacher_id))
+                if entity and self.day_rules[scope]]
+
+    def _placed(self, c: Class) -> Optional[Placed]:
+        s = self.ctx.index.get(c.slot_id)
+        return Placed(c.id, s, self.ctx.building_of.get(c.room_id, "")) if s else None
+
+    def _bucket_penalties(self, bucket: Bucket, items: Dict[str, Placed]) -> Dict[str, float]:
+        scope, entity, _day = bucket
+        day = sorted(items.values(), key=lambda p: (p.slot.start, p.slot.end, p.class_id))
+        return {rule.id: rule.penalty(day, self.ctx) for rule in self.day_rules[scope] if rule.applies(entity)}
+
+
+def score(constraints: Iterable[Constraint], classes: Iterable[Class], slots: Iterable[Slot],
+          rooms: Iterable[Room]) -> dict:
+    #Полный штраф расписания с разбивкой по ограничениям
+    scoring = Scoring(constraints, classes, slots, rooms)
+    return {
+        "total": scoring.total,
+        "by_constraint": scoring.by_rule,
+        "unknown": scoring.unknown,
+    }
@@ -0,0 +1,388 @@
+# core/db.py
+# Хранилище состояния в SQLite: данные переживают перезапуск сервера и не обязаны целиком
+# помещаться в память. WAL-журнал (читатели не блокируют писателя), индексы по слоту, аудитории,
+# преподавателю и группе, загрузка seed через executemany в одной транзакции.
+# Постраничная выборка, конфликты и свободные слоты считаются запросами SQL, без чтения всех занятий.
+#
+# Интерфейс тот же, что у хранилищ из core/store.py (snapshot/apply/close), поэтому сервер
+# включает его переменной окружения TIMETABLE_DB=<путь к файлу базы>.
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core import transforms
+from core.domain import (Building, Class, Constraint, Course, EntityTuple, Group, Room, Slot, Teacher, entities,
+                         field_names)
+from core.query import MAX_PAGE_SIZE
+from core.store import EVENT_BUS, MUTATIONS, Snapshot, TABLES, apply_mutation
+from core.timeline import parse_slot
+
+ENTITIES = dict(zip(TABLES, (Building, Room, Teacher, Group, Course, Slot, Class, Constraint)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS buildings (id TEXT PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS rooms (
+    id TEXT PRIMARY KEY, building_id TEXT, name TEXT, capacity INTEGER, features TEXT
+);
+CREATE TABLE IF NOT EXISTS teachers (id TEXT PRIMARY KEY, name TEXT, dept TEXT);
+CREATE TABLE IF NOT EXISTS "groups" (id TEXT PRIMARY KEY, name TEXT, size INTEGER, track TEXT);
+CREATE TABLE IF NOT EXISTS courses (code TEXT PRIMARY KEY, title TEXT, dept TEXT, hours_per_week INTEGER);
+CREATE TABLE IF NOT EXISTS slots (
+    id TEXT PRIMARY KEY, day TEXT, start TEXT, "end" TEXT,
+    day_key TEXT, start_min INTEGER, end_min INTEGER
+);
+CREATE TABLE IF NOT EXISTS classes (
+    pos INTEGER PRIMARY KEY, id TEXT NOT NULL, course_id TEXT, needs TEXT, teacher_id TEXT,
+    group_id TEXT, slot_id TEXT, room_id TEXT, status TEXT
+);
+CREATE TABLE IF NOT EXISTS constraints (pos INTEGER PRIMARY KEY, id TEXT, kind TEXT, payload TEXT);
+CREATE INDEX IF NOT EXISTS rooms_building ON rooms (building_id);
+CREATE INDEX IF NOT EXISTS slots_day ON slots (day_key, start_min);
+CREATE INDEX IF NOT EXISTS classes_id ON classes (id);
+CREATE INDEX IF NOT EXISTS classes_slot ON classes (slot_id);
+CREATE INDEX IF NOT EXISTS classes_room ON classes (room_id, slot_id);
+CREATE INDEX IF NOT EXISTS classes_teacher ON classes (teacher_id, slot_id);
+CREATE INDEX IF NOT EXISTS classes_group ON classes (group_id, slot_id);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+"""
+
+#Конфликт: слоты одного дня пересекаются по времени и совпадает аудитория или преподаватель
+#(то же правило, что в timeline.find_conflicts). Два соединения по индексам вместо
+#перебора всех пар; pos — порядок занятий в исходных данных.
+CONFLICTS_SQL = """
+SELECT a.pos AS a, b.pos AS b FROM classes a
+JOIN classes b ON b.room_id = a.room_id AND b.pos > a.pos
+JOIN slots sa ON sa.id = a.slot_id
+JOIN slots sb ON sb.id = b.slot_id
+WHERE a.room_id != '' AND sa.day_key = sb.day_key AND sa.start_min < sb.end_min AND sb.start_min < sa.end_min
+UNION
+SELECT a.pos, b.pos FROM classes a
+JOIN classes b ON b.teacher_id = a.teacher_id AND b.pos > a.pos
+JOIN slots sa ON sa.id = a.slot_id
+JOIN slots sb ON sb.id = b.slot_id
+WHERE a.teacher_id != '' AND sa.day_key = sb.day_key AND sa.start_min < sb.end_min AND sb.start_min < sa.end_min
+"""
+
+#Слоты, в которые у аудитории нет ни одного занятия с пересекающимся временем
+FREE_SLOTS_SQL = """
+SELECT s.id, s.day, s.start, s."end" FROM slots s
+WHERE (:day IS NULL OR s.day_key = lower(:day)) AND s.start_min IS NOT NULL
+  AND NOT EXISTS (
+    SELECT 1 FROM classes c JOIN slots o ON o.id = c.slot_id
+    WHERE c.room_id = :room_id AND o.day_key = s.day_key
+      AND o.start_min < s.end_min AND s.start_min < o.end_min
+  )
+ORDER BY s.rowid
+"""
+
+ROW_SQL = """
+SELECT c.id, c.course_id, coalesce(co.title, ''), c.group_id, coalesce(g.name, ''),
+       c.teacher_id, coalesce(t.name, ''), coalesce(s.day, ''), coalesce(s.start, ''),
+       coalesce(s."end", ''), c.slot_id, c.room_id, coalesce(r.name, ''), coalesce(b.name, ''), c.status
+FROM classes c
+LEFT JOIN courses co ON co.code = c.course_id
+LEFT JOIN "groups" g ON g.id = c.group_id
+LEFT JOIN teachers t ON t.id = c.teacher_id
+LEFT JOIN slots s ON s.id = c.slot_id
+LEFT JOIN rooms r ON r.id = c.room_id
+LEFT JOIN buildings b ON b.id = r.building_id
+"""
+
+ROW_COLUMNS = (
+    "id", "course_id", "course_title", "group_id", "group_name", "teacher_id", "teacher_name",
+    "day", "start", "end", "slot_id", "room_id", "room_name", "building_name", "status",
+)
+
+
+#Событие frp -> (таблица, поле payload с id строки): обработчику передаются только строки с этим id,
+#изменённые он возвращает на тех же местах, новые — в конце
+EVENT_ROWS = {
+    "ASSIGN_SLOT": ("classes", "class_id"),
+    "ASSIGN_ROOM": ("classes", "class_id"),
+    "MOVE_CLASS": ("classes", "class_id"),
+    "CANCEL_CLASS": ("classes", "class_id"),
+    "ADD_CLASS": ("classes", "id"),
+    "ADD_ROOM": ("rooms", "id"),
+}
+
+
+def _quoted(name: str) -> str:
+    return f'"{name}"'
+
+
+def _insert_sql(table: str) -> str:
+    columns = field_names(ENTITIES[table])
+    if table == "slots":
+        columns += ("day_key", "start_min", "end_min")
+    names = ", ".join(_quoted(c) for c in columns)
+    return f"INSERT INTO {_quoted(table)} ({names}) VALUES ({', '.join('?' * len(columns))})"
+
+
+def _key(table: str) -> str:
+    #Ключ строки: у занятий и ограничений id может повторяться, порядок задаёт pos
+    return "pos" if table in ("classes", "constraints") else "rowid"
+
+
+def _select_sql(table: str, where: str = "", with_key: bool = False) -> str:
+    columns = ", ".join(_quoted(c) for c in field_names(ENTITIES[table]))
+    key = _key(table)
+    if with_key:
+        columns = f"{key}, {columns}"
+    return f"SELECT {columns} FROM {_quoted(table)}{where} ORDER BY {key}"
+
+
+def _update_sql(table: str) -> str:
+    columns = field_names(ENTITIES[table])
+    if table == "slots":
+        columns += ("day_key", "start_min", "end_min")
+    assignments = ", ".join(f"{_quoted(c)} = ?" for c in columns)
+    return f"UPDATE {_quoted(table)} SET {assignments} WHERE {_key(table)} = ?"
+
+
+def _entity(table: str, row: tuple):
+    type_ = ENTITIES[table]
+    if table == "rooms":
+        return type_(*row[:-1], frozenset(json.loads(row[-1] or "[]")))
+    if table == "constraints":
+        return type_(*row[:-1], json.loads(row[-1]))
+    return type_(*row)
+
+
+def _rows(table: str, items: Iterable) -> Iterator[tuple]:
+    #Доменные объекты -> кортежи параметров для executemany (генератор, без промежуточного списка)
+    names = field_names(ENTITIES[table])
+    for it in items:
+        row = tuple(getattr(it, n) for n in names)
+        if table == "rooms":
+            row = row[:-1] + (json.dumps(sorted(it.features), ensure_ascii=False),)
+        elif table == "slots":
+            row += _slot_time(it)
+        elif table == "constraints":
+            row = row[:-1] + (json.dumps(it.payload, ensure_ascii=False),)
+        yield row
+
+
+def _slot_time(slot) -> tuple:
+    #(day_key, start_min, end_min); у слота с неразборчивым временем — NULL, в запросы по времени
+    #он не попадает (как и в timeline.SlotIndex)
+    try:
+        parsed = parse_slot(slot)
+    except ValueError:
+        return (None, None, None)
+    return (parsed.day, parsed.start, parsed.end)
+
+
+class _LazySnapshot(Snapshot):
+    #Результат записи: номер версии известен сразу, таблицы читаются из базы только при обращении к ним
+    #(и уже с учётом записей, сделанных после этой)
+    __slots__ = ("_store",)
+
+    def __init__(self, version: int, store: "SqliteStore"):
+        self.version = version
+        self._store = store
+
+    @property
+    def tables(self) -> Dict[str, Tuple]:
+        return self._store.snapshot().tables
+
+
+class SqliteStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []     #все открытые соединения (для close)
+        self._cached: Optional[Snapshot] = None
+        self._cache_lock = threading.Lock()
+        self.connection().executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        # у каждого потока своё соединение; подготовленные выражения кешируются в нём.
+        # check_same_thread=False — только чтобы close() мог закрыть соединения других потоков
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, cached_statements=256, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._cache_lock:
+                self._connections.append(conn)
+        return conn
+
+    @property
+    def version(self) -> int:
+        return self.connection().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def is_loaded(self) -> bool:
+        return self.version > 0
+
+    def event_rows(self, payload: dict) -> Tuple[Tuple[Class, ...], Tuple[Room, ...]]:
+        #Занятие события и упомянутые им аудитории (проверка и темы рассылки) — выборкой по id, без чтения таблиц
+        conn = self.connection()
+        classes: Tuple[Class, ...] = ()
+        if isinstance(payload.get("class_id"), str):
+            rows = conn.execute(_select_sql("classes", " WHERE id = ?"), (payload["class_id"],))
+            classes = tuple(_entity("classes", row) for row in rows)
+        mentioned = {c.room_id for c in classes} | {payload.get("new_room"), payload.get("room_id")}
+        room_ids = sorted(r for r in mentioned if isinstance(r, str) and r)
+        rooms: Tuple[Room, ...] = ()
+        if room_ids:
+            rows = conn.execute(_select_sql("rooms", f" WHERE id IN ({', '.join('?' * len(room_ids))})"), room_ids)
+            rooms = tuple(_entity("rooms", row) for row in rows)
+        return classes, rooms
+
+    # ---------------------- интерфейс хранилища ----------------------
+
+    def snapshot(self) -> Snapshot:
+        #Все таблицы в виде доменных кортежей (для эндпоинтов, которым нужны данные целиком)
+        version = self.version
+        cached = self._cached
+        if cached is not None and cached.version == version:
+            return cached
+        with self._cache_lock:
+            if self._cached is None or self._cached.version != version:
+                self._cached = self._read(version) if version else Snapshot(0, {})
+            return self._cached
+
+    def apply(self, op: str, **kwargs) -> Snapshot:
+        # события и замена таблиц пишут только затронутые строки; все таблицы не читаются
+        if op not in MUTATIONS:
+            raise ValueError(f"Unknown mutation: {op}")
+        try:
+            if op == "event":
+                version = self.apply_event(**kwargs)
+            elif op == "replace":
+                version = self.update(apply_mutation({}, op, kwargs))
+            elif op == "update_classes":
+                version = self.update_classes(entities(Class, kwargs["classes"]))
+            elif op == "load_seed":
+                version = self.write(apply_mutation({}, op, kwargs))
+            else:
+                version = self.write(apply_mutation(self.snapshot().tables, op, kwargs))
+        except sqlite3.IntegrityError as ex:
+            # например, ADD_ROOM с уже существующим id: ошибка данных, как у остальных хранилищ
+            raise ValueError(f"Constraint violated: {ex}") from ex
+        return _LazySnapshot(version, self)
+
+    def close(self):
+        # соединения всех потоков, а не только вызывающего
+        with self._cache_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    # ---------------------- запись ----------------------
+
+    def write(self, tables: Dict[str, Iterable]) -> int:
+        #Полная замена переданных таблиц в одной транзакции; возвращает новую версию
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for table, items in tables.items():
+                conn.execute(f"DELETE FROM {_quoted(table)}")
+                conn.executemany(_insert_sql(table), _rows(table, items))
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return self.version
+
+    def update(self, tables: Dict[str, Iterable]) -> int:
+        #Замена таблиц построчно: изменившиеся строки — UPDATE, лишние — DELETE, новые — INSERT
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for table, items in tables.items():
+                old = conn.execute(_select_sql(table, with_key=True)).fetchall()
+                self._store_rows(conn, table, old, [_entity(table, row[1:]) for row in old], list(items))
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return self.version
+
+    def update_classes(self, classes: Iterable[Class]) -> int:
+        #Замена занятий по id — UPDATE только этих строк
+        columns = field_names(Class)
+        sql = f"UPDATE classes SET {', '.join(f'{_quoted(c)} = ?' for c in columns)} WHERE id = ?"
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for c in classes:
+                if conn.execute(sql, (*(getattr(c, n) for n in columns), c.id)).rowcount == 0:
+                    raise ValueError(f"Unknown classes: {[c.id]}")
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return self.version
+
+    def apply_event(self, name: str, payload: dict) -> int:
+        #Событие frp над строками с id из payload: тот же обработчик, что у MemoryStore, но без чтения таблиц
+        if name not in EVENT_BUS.subscribers:
+            raise ValueError(f"Unknown event: {name}")
+        table, field = EVENT_ROWS[name]
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            found = conn.execute(_select_sql(table, " WHERE id = ?", with_key=True), (payload[field],)).fetchall()
+            current = [_entity(table, row[1:]) for row in found]
+            state = {"classes": [], "rooms": [], table: transforms.serialize_tuple(current)}
+            new_rows = EVENT_BUS.publish(name, payload, state)[table]
+            self._store_rows(conn, table, found, current, entities(ENTITIES[table], new_rows))
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return self.version
+
+    @staticmethod
+    def _store_rows(conn: sqlite3.Connection, table: str, old: List[tuple], current: List, new: List):
+        #old — строки (ключ, поля...) в порядке ключа, current — они же сущностями, new — новое содержимое:
+        #изменившиеся строки — UPDATE, лишние — DELETE, новые — INSERT (ключ новых строк — после последнего)
+        changed = [(*row, old[i][0]) for i, row in enumerate(_rows(table, new[:len(old)])) if new[i] != current[i]]
+        conn.executemany(_update_sql(table), changed)
+        if len(old) > len(new):
+            conn.executemany(f"DELETE FROM {_quoted(table)} WHERE {_key(table)} = ?", [r[:1] for r in old[len(new):]])
+        conn.executemany(_insert_sql(table), _rows(table, new[len(old):]))
+
+    # ---------------------- чтение ----------------------
+
+    def _read(self, version: int) -> Snapshot:
+        conn = self.connection()
+        tables = {}
+        for table, type_ in ENTITIES.items():
+            rows = conn.execute(_select_sql(table))
+            tables[table] = EntityTuple((_entity(table, row) for row in rows), type_)
+        return Snapshot(version, tables)
+
+    def query_page(self, offset: int = 0, limit: int = 50, day: Optional[str] = None,
+                   teacher_id: Optional[str] = None, group_id: Optional[str] = None,
+                   building_id: Optional[str] = None) -> dict:
+        #То же, что query.query_page, но фильтрация, подсчёт и LIMIT/OFFSET выполняются в SQL
+        if offset < 0 or limit < 1:
+            raise ValueError(f"Invalid page: offset={offset}, limit={limit}")
+        limit = min(limit, MAX_PAGE_SIZE)
+        where, params = [], []
+        if day:
+            where.append("c.slot_id IN (SELECT id FROM slots WHERE day_key = lower(?))")
+            params.append(day)
+        if teacher_id:
+            where.append("c.teacher_id = ?")
+            params.append(teacher_id)
+        if group_id:
+            where.append("c.group_id = ?")
+            params.append(group_id)
+        if building_id:
+            where.append("c.room_id IN (SELECT id FROM rooms WHERE building_id = ?)")
+            params.append(building_id)
+        condition = f" WHERE {' AND '.join(where)}" if where else ""
+        conn = self.connection()
+        total = conn.execute(f"SELECT count(*) FROM classes c{condition}", params).fetchone()[0]
+        rows = conn.execute(f"{ROW_SQL}{condition} ORDER BY c.pos LIMIT ? OFFSET ?", (*params, limit, offset))
+        items = [dict(zip(ROW_COLUMNS, row)) for row in rows]
+        return {"total": total, "offset": offset, "limit": limit, "items": items}
+
+    def class_ids(self) -> List[str]:
+        #id всех занятий в порядке таблицы (списки выбора в клиенте)
+        return [row[0] for row in self.connection().execute("SELECT id FROM classes ORDER BY pos")]
+
+    def conflicts(self) -> List[Tuple[str, str]]:
+        #Пары id конфликтующих занятий
+        sql = f"SELECT a.id, b.id FROM ({CONFLICTS_SQL}) p JOIN classes a ON a.pos = p.a JOIN classes b ON b.pos = p.b ORDER BY p.a, p.b"
+        return list(self.connection().execute(sql))
+
+    def free_slots(self, room_id: str, day: Optional[str] = None) -> List[Dict[str, Any]]:
+        rows = self.connection().execute(FREE_SLOTS_SQL, {"room_id": room_id, "day": day})
+        return [dict(zip(("id", "day", "start", "end"), row)) for row in rows]
@@ -1,49 +1,60 @@
 # Модели, с которыми работает программа.
 # Авторы: Дильшат Сембаев.
 
-from dataclasses import dataclass
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Building:                     #Корпус
     id: str                         #Идентификатор корпуса
     name: str                       #Наименование здания
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Room:                         #Аудитория
     id: str                         #Идентификатор аудитории
     building_id: str                #Идентификатор корпуса, в котором находится аудитория
     name: str                       #Наименование (или номер) аудитории
     capacity: int                   #Количество мест
-    features: tuple[str, ...]       #Особенности (например: projector, lab, accessibility)
+    features: frozenset[str]        #Особенности (например: projector, lab, accessibility)
 
-@dataclass(frozen=True)
+    def __post_init__(self):
+        #features храним как frozenset: быстрая проверка вхождения и хешируемость;
+        #одна строка — одна особенность, а не набор её символов
+        features = self.features
+        if isinstance(features, str):
+            features = (features,) if features else ()
+        if not isinstance(features, frozenset):
+            object.__setattr__(self, "features", frozenset(features or ()))
+
+@dataclass(frozen=True, slots=True)
 class Teacher:                      #Преподаватель
     id: str                         #Идентификатор преподавателя
     name: str                       #ФИО преподавателя
     dept: str                       #Кафедра, к которой относится преподаватель
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Group:                        #Группа
     id: str                         #Идентификатор группы
     name: str                       #Наименование группы
     size: int                       #Количество студентов в группе
     track: str                      #Учебное направление
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Course:                       #Дисциплина
     code: str                       #Код дисциплины
     title: str                      #Наименование дисциплины
     dept: str                       #Кафедра, к которой относится дисциплина
     hours_per_week: int             #Количество часо в в неделю
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Slot:                         #Слот (место в расписании)
     id: str                         #Идентификатор слота
     day: str                        #День недели
     start: str                      #Начало пары
     end: str                        #Конец пары
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Class:                        #Пара
     id: str                         #Идентификатор пары
     course_id: str                  #Идентификатор дисциплины
@@ -54,8 +65,94 @@ class Class:                        #Пара
     room_id: str                    #Идентификатор аудитории
     status: str                     #Статус занятия (например: planned/scheduled/moved/cancelled)
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Constraint:                   #Ограничение
     id: str                         #Идентификатор ограничения
     kind: str                       #Тип ограничения (например: max windows per day, preferred buildings и т.п.) 
-    payload: dict                   #Дополнительные сведения (например: "teacher_id": "T01")
\ No newline at end of file
+    payload: dict                   #Дополнительные сведения (например: "teacher_id": "T01")
+
+#Поля-идентификаторы, значения которых интернируются при загрузке:
+#одинаковые slot_id/room_id/teacher_id у тысяч занятий ссылаются на одну строку
+def _id_fields(type_) -> tuple[str, ...]:
+    return tuple(f.name for f in fields(type_) if f.name in ("id", "code") or f.name.endswith("_id"))
+
+_FIELD_NAMES = {}
+
+def field_names(type_) -> tuple[str, ...]:
+    names = _FIELD_NAMES.get(type_)
+    if names is None:
+        names = _FIELD_NAMES[type_] = tuple(f.name for f in fields(type_))
+    return names
+
+_FACTORIES = {}
+
+def _factory(type_):
+    #Функция dict -> сущность: значения берутся по именам полей и передаются позиционно,
+    #идентификаторы проходят через sys.intern. Лишние ключи (len не совпал) отдаются type_(**it),
+    #который отклоняет их TypeError, как раньше; нет ключа — KeyError, вызывающий делает так же
+    factory = _FACTORIES.get(type_)
+    if factory is None:
+        ids = frozenset(_id_fields(type_))
+        plan = tuple((name, name in ids) for name in field_names(type_))
+        size = len(plan)
+        intern = sys.intern
+
+        def make(it):
+            if len(it) != size:
+                return type_(**it)
+            return type_(*[intern(it[name]) if is_id else it[name] for name, is_id in plan])
+
+        factory = _FACTORIES[type_] = make
+    return factory
+
+def from_dicts(type_, items) -> "EntityTuple":
+    #Быстрый путь построения сущностей из словарей. Если у записи нет поля или id не строка,
+    #используем обычный type_(**it) — ошибки остаются теми же, что и раньше.
+    make = _factory(type_)
+    result = []
+    append = result.append
+    for it in items:
+        try:
+            append(make(it))
+        except (KeyError, TypeError):
+            append(type_(**it))
+    return EntityTuple(result, type_)
+
+#Единая граница приведения типов: всё, что попадает в ядро (загрузка, хранилище, состояние клиента),
+#проходит через entities() один раз, дальше функции получают EntityTuple и не копируют данные.
+class EntityTuple(tuple):           #Кортеж сущностей одного типа, уже проверенный целиком
+    def __new__(cls, items, type_):
+        self = super().__new__(cls, items)
+        self.type = type_
+        return self
+
+    def __reduce__(self):
+        return EntityTuple, (tuple(self), self.type)
+
+#Уже приведённый кортеж возвращается как есть; любой другой вход (список словарей и т.п.)
+#приводится заново при каждом вызове: повторное приведение одних и тех же списков кешируется
+#на границе клиента (view_model.ViewModel.entities), а не здесь
+def entities(type_, items) -> EntityTuple:
+    if isinstance(items, EntityTuple) and items.type is type_:
+        return items
+    if not items:
+        return EntityTuple((), type_)
+    return _convert(type_, items)
+
+def _convert(type_, items) -> EntityTuple:
+    #Проверяется каждый элемент, а не только первый: смешанные входы тоже приводятся
+    if all(type(it) is type_ for it in items):
+        return EntityTuple(items, type_)
+    make = _factory(type_)
+    result = []
+    for it in items:
+        if type(it) is type_:
+            result.append(it)
+        elif isinstance(it, Mapping):
+            try:
+                result.append(make(it))
+            except (KeyError, TypeError):
+                result.append(type_(**it))
+        else:
+            raise TypeError(f"Expected {type_.__name__} or dict, got {type(it).__name__}")
+    return EntityTuple(result, type_)
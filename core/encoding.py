@@ -0,0 +1,104 @@
+# core/encoding.py
+# Компактные представления набора данных для API.
+# columnar: для каждой таблицы ключи записываются один раз, значения — массивами по столбцам;
+# msgpack: то же колоночное представление в бинарном виде (если установлен пакет msgpack).
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import msgpack
+except ImportError:  # необязательная зависимость
+    msgpack = None
+
+JSON = "application/json"
+COLUMNAR = "application/vnd.timetable.columnar+json"
+MSGPACK = "application/msgpack"
+
+COLUMNAR_VERSION = 1
+
+
+def to_columnar(tables: Dict[str, List[dict]]) -> Dict[str, Any]:
+    #{"rooms": [{"id": ..., "name": ...}, ...]} -> {"rooms": {"length": n, "columns": {"id": [...], ...}}}
+    return {
+        "format": "columnar",
+        "version": COLUMNAR_VERSION,
+        "tables": {name: {"length": len(rows), "columns": _columns(rows)} for name, rows in tables.items()},
+    }
+
+
+def _columns(rows: List[dict]) -> Dict[str, list]:
+    # быстрый путь: у всех записей те же ключи, что и у первой
+    keys = tuple(rows[0]) if rows else ()
+    if all(len(row) == len(keys) for row in rows):
+        try:
+            return {k: [row[k] for row in rows] for k in keys}
+        except KeyError:
+            pass
+    # записи с разным набором полей: отсутствующие значения — None
+    columns: Dict[str, list] = {}
+    for i, row in enumerate(rows):
+        for key, value in row.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [None] * i
+            column.append(value)
+        for column in columns.values():
+            if len(column) <= i:
+                column.append(None)
+    return columns
+
+
+def from_columnar(payload: Dict[str, Any]) -> Dict[str, List[dict]]:
+    #Обратное преобразование: таблицы снова становятся списками словарей
+    if payload.get("format") != "columnar":
+        raise ValueError("Not a columnar payload")
+    tables = {}
+    for name, table in payload["tables"].items():
+        columns = table["columns"]
+        keys = tuple(columns)
+        tables[name] = [dict(zip(keys, values)) for values in zip(*(columns[k] for k in keys))] \
+            if keys else [{} for _ in range(table["length"])]
+    return tables
+
+
+def negotiate(accept: Optional[str]) -> str:
+    #Выбор представления по заголовку Accept с учётом q-весов; по умолчанию — обычный JSON
+    available = {JSON, COLUMNAR}
+    if msgpack is not None:
+        available |= {MSGPACK, "application/x-msgpack"}
+    best, best_q = JSON, 0.0
+    for part in (accept or "").split(","):
+        media, _, params = part.strip().partition(";")
+        media = media.strip().lower()
+        q = 1.0
+        for p in params.split(";"):
+            k, _, v = p.strip().partition("=")
+            if k == "q":
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+        if media in available and q > best_q:
+            best, best_q = media, q
+    return MSGPACK if best == "application/x-msgpack" else best
+
+
+def encode(tables: Dict[str, List[dict]], media_type: str) -> bytes:
+    if media_type == COLUMNAR:
+        return json.dumps(to_columnar(tables), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if media_type == MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        return msgpack.packb(to_columnar(tables), use_bin_type=True)
+    return json.dumps(tables, ensure_ascii=False).encode("utf-8")
+
+
+def decode(body: bytes, media_type: str) -> Dict[str, List[dict]]:
+    media_type = (media_type or JSON).partition(";")[0].strip().lower()
+    if media_type == COLUMNAR:
+        return from_columnar(json.loads(body))
+    if media_type in (MSGPACK, "application/x-msgpack"):
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        return from_columnar(msgpack.unpackb(body, raw=False))
+    return json.loads(body)
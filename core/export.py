@@ -0,0 +1,194 @@
+# core/export.py
+# Потоковый экспорт расписания: NDJSON, CSV и iCalendar.
+# Все функции — генераторы строк: занятия читаются по одному, поэтому память не зависит
+# от размера выгрузки, а первые байты можно отдавать клиенту сразу.
+import csv
+import io
+import json
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+from urllib.parse import quote
+
+from core.domain import Building, Class, Course, Group, Room, Slot, Teacher
+from core.term import WEEKDAYS, Term, term_weeks
+from core.timeline import parse_time, slot_index
+
+COLUMNS = (
+    "id", "course_id", "course_title", "group_id", "group_name", "teacher_id", "teacher_name",
+    "day", "start", "end", "slot_id", "room_id", "room_name", "building_name", "status",
+)
+
+
+def iter_rows(
+    classes: Iterable[Class],
+    slots: Iterable[Slot],
+    rooms: Iterable[Room] = (),
+    teachers: Iterable[Teacher] = (),
+    groups: Iterable[Group] = (),
+    courses: Iterable[Course] = (),
+    buildings: Iterable[Building] = (),
+    teacher_id: Optional[str] = None,
+    group_id: Optional[str] = None,
+) -> Iterator[Dict[str, str]]:
+    #Плоские строки экспорта; справочники небольшие и строятся один раз, занятия идут потоком
+    slots_by_id = {s.id: s for s in slots}
+    rooms_by_id = {r.id: r for r in rooms}
+    teacher_names = {t.id: t.name for t in teachers}
+    group_names = {g.id: g.name for g in groups}
+    course_titles = {c.code: c.title for c in courses}
+    building_names = {b.id: b.name for b in buildings}
+
+    for c in classes:
+        if teacher_id and c.teacher_id != teacher_id:
+            continue
+        if group_id and c.group_id != group_id:
+            continue
+        slot = slots_by_id.get(c.slot_id)
+        room = rooms_by_id.get(c.room_id)
+        yield {
+            "id": c.id,
+            "course_id": c.course_id,
+            "course_title": course_titles.get(c.course_id, ""),
+            "group_id": c.group_id,
+            "group_name": group_names.get(c.group_id, ""),
+            "teacher_id": c.teacher_id,
+            "teacher_name": teacher_names.get(c.teacher_id, ""),
+            "day": slot.day if slot else "",
+            "start": slot.start if slot else "",
+            "end": slot.end if slot else "",
+            "slot_id": c.slot_id,
+            "room_id": c.room_id,
+            "room_name": room.name if room else "",
+            "building_name": building_names.get(room.building_id, "") if room else "",
+            "status": c.status,
+        }
+
+
+def invalid_slots(classes: Iterable[Class], slots: Iterable[Slot], teacher_id: Optional[str] = None,
+                  group_id: Optional[str] = None) -> Dict[str, str]:
+    #Слоты выгружаемых занятий с неразборчивым временем: {slot_id: причина}.
+    #Проверяется до начала потоковой отдачи, чтобы ошибка не обрывала файл на середине
+    invalid = slot_index(slots).invalid
+    if not invalid:
+        return {}
+    used: Set[str] = {c.slot_id for c in classes
+                      if (not teacher_id or c.teacher_id == teacher_id) and (not group_id or c.group_id == group_id)}
+    return {slot_id: reason for slot_id, reason in invalid.items() if slot_id in used}
+
+
+_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def content_disposition(filename: str) -> str:
+    #attachment с ASCII-именем (небезопасные символы заменены на "_") и точным именем по RFC 5987
+    fallback = _UNSAFE_FILENAME.sub("_", filename).strip("._") or "export"
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def iter_ndjson(rows: Iterable[dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def iter_csv(rows: Iterable[dict], columns: Tuple[str, ...] = COLUMNS) -> Iterator[str]:
+    #csv.writer пишет в маленький буфер, который опустошается после каждой строки
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return value
+
+    writer.writerow(columns)
+    yield flush()
+    for row in rows:
+        writer.writerow([row.get(col, "") for col in columns])
+        yield flush()
+
+
+def _ical_escape(text: str) -> str:
+    return (str(text).replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def _ical_fold(line: str) -> str:
+    #RFC 5545: строки длиннее 75 октетов переносятся, продолжение начинается с пробела
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, current = [], b""
+    for ch in line:
+        b = ch.encode("utf-8")
+        if len(current) + len(b) > (75 if not parts else 74):
+            parts.append(current.decode("utf-8"))
+            current = b""
+        current += b
+    parts.append(current.decode("utf-8"))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def iter_ical(rows: Iterable[dict], term: Optional[Term] = None, calendar_name: str = "Расписание") -> Iterator[str]:
+    #Каждое занятие — событие с еженедельным повторением до конца семестра;
+    #праздники семестра, выпадающие на его день недели, исключаются через EXDATE
+    term = term or term_weeks(date.today(), 16)
+    first_monday = term.start - timedelta(days=term.start.weekday())
+    # DTSTART задаётся в местном («плавающем») времени, поэтому и UNTIL без суффикса Z
+    until = f"{term.end:%Y%m%d}T235959"
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    yield _ical_fold("BEGIN:VCALENDAR")
+    yield _ical_fold("VERSION:2.0")
+    yield _ical_fold("PRODID:-//TreAssistenti//Timetable//RU")
+    yield _ical_fold(f"X-WR-CALNAME:{_ical_escape(calendar_name)}")
+    for row in rows:
+        day = (row.get("day") or "").lower()
+        if day not in WEEKDAYS or not row.get("start") or not row.get("end"):
+            continue
+        first = first_monday + timedelta(days=WEEKDAYS.index(day))
+        if first < term.start:
+            first += timedelta(days=7)
+        try:
+            start, end = parse_time(row["start"]), parse_time(row["end"])
+        except ValueError:
+            continue                        # см. invalid_slots: сервер отклоняет такие выгрузки заранее
+        summary = row.get("course_title") or row.get("course_id", "")
+        location = " ".join(x for x in (row.get("room_name"), row.get("building_name")) if x)
+        yield _ical_fold("BEGIN:VEVENT")
+        yield _ical_fold(f"UID:{_ical_escape(row['id'])}@treassistenti")
+        yield _ical_fold(f"DTSTAMP:{stamp}")
+        yield _ical_fold(f"DTSTART:{first:%Y%m%d}T{start // 60:02d}{start % 60:02d}00")
+        yield _ical_fold(f"DTEND:{first:%Y%m%d}T{end // 60:02d}{end % 60:02d}00")
+        yield _ical_fold(f"RRULE:FREQ=WEEKLY;UNTIL={until}")
+        skipped = sorted(h for h in term.holidays if first <= h <= term.end and h.weekday() == first.weekday())
+        if skipped:
+            yield _ical_fold("EXDATE:" + ",".join(f"{h:%Y%m%d}T{start // 60:02d}{start % 60:02d}00" for h in skipped))
+        yield _ical_fold(f"SUMMARY:{_ical_escape(summary)}")
+        if location:
+            yield _ical_fold(f"LOCATION:{_ical_escape(location)}")
+        description = ", ".join(x for x in (row.get("teacher_name"), row.get("group_name")) if x)
+        if description:
+            yield _ical_fold(f"DESCRIPTION:{_ical_escape(description)}")
+        if row.get("status") == "cancelled":
+            yield _ical_fold("STATUS:CANCELLED")
+        yield _ical_fold("END:VEVENT")
+    yield _ical_fold("END:VCALENDAR")
+
+
+def chunked(lines: Iterable[str], size: int = 256) -> Iterator[str]:
+    #Склеивает строки в блоки по size штук; первая строка уходит сразу, отдельным блоком
+    batch = []
+    first = True
+    for line in lines:
+        if first:
+            yield line
+            first = False
+            continue
+        batch.append(line)
+        if len(batch) >= size:
+            yield "".join(batch)
+            batch.clear()
+    if batch:
+        yield "".join(batch)
@@ -56,6 +56,21 @@ def move_class(event: Event, state: dict):
     return {**state, "classes": updated}
 
 
+def assign_room(event: Event, state: dict):
+    #Смена аудитории без смены статуса (в отличие от MOVE_CLASS)
+    class_id = event.payload["class_id"]
+    room_id = event.payload["new_room"]
+    updated = []
+    for c in state["classes"]:
+        if c["id"] == class_id:
+            new_c = dict(c)
+            new_c["room_id"] = room_id
+            updated.append(new_c)
+        else:
+            updated.append(c)
+    return {**state, "classes": updated}
+
+
 def cancel_class(event: Event, state: dict):
     #Отмена пары
     class_id = event.payload["class_id"]
@@ -75,4 +90,14 @@ def add_room(event: Event, state: dict):
     new_room = event.payload
     rooms = list(state["rooms"])
     rooms.append(new_room)
-    return {**state, "rooms": rooms}
\ No newline at end of file
+    return {**state, "rooms": rooms}
+
+
+def add_class(event: Event, state: dict):
+    #Добавление нового занятия; занятие с таким id уже есть — ошибка
+    new_class = dict(event.payload)
+    if any(c["id"] == new_class["id"] for c in state["classes"]):
+        raise ValueError(f"Class {new_class['id']!r} already exists")
+    new_class.setdefault("needs", "")
+    new_class.setdefault("status", "planned")
+    return {**state, "classes": list(state["classes"]) + [new_class]}
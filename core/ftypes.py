@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from typing import Callable, Generic, TypeVar, Union, Optional
+from core.metrics import instrument
  
 T = TypeVar("T")   # значение успешного вычисления
 E = TypeVar("E")   # тип ошибки / левой ветви
@@ -91,6 +92,7 @@ def safe_room(rooms: tuple, room_id: str) -> Maybe:
     return Just(found) if found is not None else Nothing()
  
  
+@instrument("validate", items=None)
 def validate_assignment(classes: tuple, rooms: tuple, slots: tuple, groups: tuple, cls) -> Either[dict, object]: 
     errors = {}
  
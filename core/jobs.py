@@ -0,0 +1,245 @@
+# core/jobs.py
+# Фоновые задачи планирования: задача разбивается по дням, дни выполняются в ограниченном пуле
+# (по умолчанию — процессов, чтобы расчёт не занимал цикл событий сервера), прогресс обновляется
+# по мере готовности дней. Результаты кешируются по (версия данных, дни): повторный запуск на тех же
+# данных отдаётся сразу, а одинаковые одновременные запросы объединяются в одну задачу.
+#
+# Таблицы передаются в пул процессов один раз на задачу: они сериализуются в разделяемую память,
+# а каждому дню отправляется только её имя; процесс пула разбирает таблицы один раз и держит их,
+# пока ему приходят дни той же задачи.
+#
+# Задачи живут в памяти процесса, поэтому сервер с --workers N задачи не принимает
+# (см. server.py, TIMETABLE_WORKERS) — запрос о задаче мог бы попасть в другой воркер.
+import asyncio
+import os
+import pickle
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+@dataclass
+class Job:
+    id: str
+    key: Tuple                              #(версия данных, дни) — ключ кеша результатов
+    days: Tuple[str, ...]
+    status: str = QUEUED
+    done: int = 0                           #сколько дней уже посчитано
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    cached: bool = False                    #результат взят из кеша без расчёта
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+    changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def total(self) -> int:
+        return len(self.days)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "days": list(self.days),
+            "done": self.done,
+            "total": self.total,
+            "progress": round(self.done / self.total, 3) if self.total else 1.0,
+            "data_version": self.key[0],
+            "cached": self.cached,
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+    def _notify(self):
+        # будим всех, кто ждёт изменений, и готовим событие к следующему
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+def default_workers() -> int:
+    return int(os.environ.get("TIMETABLE_JOB_WORKERS", "2"))
+
+
+# таблицы последней задачи в процессе пула: (имя разделяемой памяти, таблицы)
+_shared_tables: Tuple[Optional[str], tuple] = (None, ())
+
+
+def _share(tables: tuple) -> SharedMemory:
+    data = pickle.dumps(tables, protocol=pickle.HIGHEST_PROTOCOL)
+    memory = SharedMemory(create=True, size=len(data))
+    memory.buf[:len(data)] = data
+    return memory
+
+
+def _schedule_shared(day: str, name: str):
+    #Выполняется в процессе пула: таблицы задачи читаются из разделяемой памяти один раз
+    global _shared_tables
+    from core.async_schedule import schedule_day
+    if _shared_tables[0] != name:
+        memory = SharedMemory(name=name)
+        try:
+            _shared_tables = (name, pickle.loads(memory.buf))
+        finally:
+            memory.close()
+    return schedule_day(day, *_shared_tables[1])
+
+
+class JobManager:
+    def __init__(self, max_workers: Optional[int] = None, cache_size: int = 32, history: int = 200,
+                 executor_factory: Optional[Callable[[int], Executor]] = None):
+        self.max_workers = max_workers or default_workers()
+        self.cache_size = cache_size
+        self.history = history
+        self._executor_factory = executor_factory or (lambda n: ProcessPoolExecutor(max_workers=n))
+        self._executor: Optional[Executor] = None
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[Tuple, Job] = {}
+        self._results: "OrderedDict[Tuple, dict]" = OrderedDict()
+        self.draining = False                   #после drain() новые задачи не принимаются
+
+    @property
+    def executor(self) -> Executor:
+        # пул создаётся при первой задаче и живёт до shutdown()
+        if self._executor is None:
+            self._executor = self._executor_factory(self.max_workers)
+        return self._executor
+
+    def submit(self, days, version: int, classes, rooms, slots, groups) -> Job:
+        days = tuple(dict.fromkeys(d.lower() for d in days))
+        if not days:
+            raise ValueError("No days to schedule")
+        if self.draining:
+            raise RuntimeError("Job manager is shutting down")
+        key = (version, days)
+        active = self._active.get(key)
+        if active is not None:
+            return active
+        job = Job(id=uuid.uuid4().hex[:12], key=key, days=days)
+        self._remember(job)
+        cached = self._results.get(key)
+        if cached is not None:
+            self._results.move_to_end(key)
+            job.result, job.cached, job.done = cached, True, job.total
+            self._finish(job, DONE)
+            return job
+        self._active[key] = job
+        job.task = asyncio.get_running_loop().create_task(self._run(job, classes, rooms, slots, groups))
+
+        def on_done(task: asyncio.Task):
+            # задача, отменённая до первого шага, не успевает войти в _run — завершаем её здесь
+            if task.cancelled() and job.status not in FINISHED:
+                self._finish(job, CANCELLED)
+
+        job.task.add_done_callback(on_done)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        #Ещё не начатые дни снимаются с очереди пула; уже идущие досчитываются, но результат отбрасывается
+        job = self.jobs.get(job_id)
+        if job is not None and job.status not in FINISHED and job.task is not None:
+            job.task.cancel()
+        return job
+
+    async def watch(self, job_id: str) -> AsyncIterator[dict]:
+        #Состояние задачи при каждом изменении, до завершения (для SSE/websocket)
+        job = self.jobs[job_id]
+        while True:
+            changed = job.changed
+            yield job.to_dict()
+            if job.status in FINISHED:
+                return
+            await changed.wait()
+
+    @property
+    def active(self) -> int:
+        return len(self._active)
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        #Остановка без потерь: новые задачи отклоняются, идущие досчитываются (не дольше timeout
+        #секунд). True — все успели завершиться; оставшиеся снимет shutdown()
+        self.draining = True
+        tasks = [job.task for job in self._active.values() if job.task is not None]
+        if not tasks:
+            return True
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        return not pending
+
+    def shutdown(self):
+        for job in list(self._active.values()):
+            if job.task is not None:
+                job.task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, job: Job, classes, rooms, slots, groups):
+        # планировщик загружается с первой задачей, а не при старте сервера
+        from core.async_schedule import aggregate_days, schedule_day
+        loop = asyncio.get_running_loop()
+        memory = None
+        if isinstance(self.executor, ProcessPoolExecutor):
+            memory = _share((classes, rooms, slots, groups))
+            futures = [loop.run_in_executor(self.executor, _schedule_shared, d, memory.name) for d in job.days]
+        else:
+            # потокам таблицы передаются по ссылке
+            futures = [loop.run_in_executor(self.executor, schedule_day, d, classes, rooms, slots, groups)
+                       for d in job.days]
+        try:
+            await self._collect(job, futures, aggregate_days)
+        finally:
+            if memory is not None:
+                memory.close()
+                memory.unlink()
+
+    async def _collect(self, job: Job, futures, aggregate_days):
+        job.status = RUNNING
+        job._notify()
+        try:
+            for future in asyncio.as_completed(futures):
+                await future
+                job.done += 1
+                job._notify()
+            results: List[dict] = [f.result() for f in futures]
+        except asyncio.CancelledError:
+            for f in futures:
+                f.cancel()
+            self._finish(job, CANCELLED)
+            return
+        except Exception as ex:
+            for f in futures:
+                f.cancel()
+            job.error = f"{type(ex).__name__}: {ex}"
+            self._finish(job, FAILED)
+            return
+        job.result = {"days": results, "aggregated": aggregate_days(results)}
+        self._results[job.key] = job.result
+        while len(self._results) > self.cache_size:
+            self._results.popitem(last=False)
+        self._finish(job, DONE)
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished = time.time()
+        self._active.pop(job.key, None)
+        job._notify()
+
+    def _remember(self, job: Job):
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.history:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if oldest.status not in FINISHED:
+                break
+            del self.jobs[oldest_id]
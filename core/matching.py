@@ -0,0 +1,64 @@
+# core/matching.py
+# Максимальное паросочетание в двудольном графе (Хопкрофт — Карп, O(E·√V)).
+# Используется для распределения аудиторий внутри одного слота: слева занятия, справа аудитории,
+# ребро — аудитория подходит занятию. Жадное начальное паросочетание идёт в порядке left и по
+# порядку списков смежности, поэтому при «крупные группы первыми» и «аудитории по возрастанию
+# вместимости» каждое занятие получает самую тесную подходящую аудиторию, а увеличивающие пути
+# лишь добирают то, что жадный проход упустил.
+from collections import deque
+from typing import Dict, Hashable, Mapping, Optional, Sequence, TypeVar
+
+L = TypeVar("L", bound=Hashable)
+R = TypeVar("R", bound=Hashable)
+
+_INF = float("inf")
+
+
+def hopcroft_karp(left: Sequence[L], adj: Mapping[L, Sequence[R]]) -> Dict[L, R]:
+    match_l: Dict[L, Optional[R]] = {u: None for u in left}
+    match_r: Dict[R, L] = {}
+
+    # жадная инициализация: первая свободная вершина из списка смежности
+    for u in left:
+        for v in adj.get(u, ()):
+            if v not in match_r:
+                match_l[u], match_r[v] = v, u
+                break
+
+    dist: Dict[L, float] = {}
+
+    def bfs() -> bool:
+        queue = deque()
+        for u in left:
+            if match_l[u] is None:
+                dist[u] = 0
+                queue.append(u)
+            else:
+                dist[u] = _INF
+        found = False
+        while queue:
+            u = queue.popleft()
+            for v in adj.get(u, ()):
+                w = match_r.get(v)
+                if w is None:
+                    found = True
+                elif dist[w] == _INF:
+                    dist[w] = dist[u] + 1
+                    queue.append(w)
+        return found
+
+    def dfs(u: L) -> bool:
+        # длина увеличивающего пути не больше числа аудиторий в слоте — рекурсия неглубокая
+        for v in adj.get(u, ()):
+            w = match_r.get(v)
+            if w is None or (dist[w] == dist[u] + 1 and dfs(w)):
+                match_l[u], match_r[v] = v, u
+                return True
+        dist[u] = _INF
+        return False
+
+    while bfs():
+        for u in left:
+            if match_l[u] is None:
+                dfs(u)
+    return {u: v for u, v in match_l.items() if v is not None}
@@ -3,6 +3,7 @@
 from functools import lru_cache
 from core.transforms import *
 from core.domain import *
+from core.windows import compute_windows
 import time
 import json
 
@@ -15,48 +16,30 @@ def compute_timetable_stats(
     # Базовый случай
     if not classes_index:
         return (("conflicts", 0), ("windows", 0))
-    head = classes_index[0]
-    tail = classes_index[1:]
 
-    # Рекурсивный вызов
-    tail_stats = compute_timetable_stats(key, tail, slots_index)
+    # Окна групп считаются один раз для всего расписания (по каждой паре группа-день)
+    windows = compute_windows(classes_index, slots_index).group_total
 
-    conflicts = 0
-    windows = 0
-
-    # Конфликты
-    for other in tail:
-        if other.slot_id == head.slot_id and other.slot_id != "":
-            if (
-                other.group_id == head.group_id
-                or other.teacher_id == head.teacher_id
-                or other.room_id == head.room_id
-            ):
-                conflicts += 1
-
-    # День текущего занятия
-    slot_day = next((s.day for s in slots_index if s.id == head.slot_id), None)
-
-    # Если есть слот и день
-    if slot_day:
-        day_slots = [
-            int(s.id[-1])
-            for s in slots_index
-            if s.day == slot_day and any(
-                c.group_id == head.group_id and c.slot_id == s.id
-                for c in classes_index
-            )
-        ]
-        day_slots.sort()
-        for i in range(len(day_slots) - 1):
-            diff = day_slots[i + 1] - day_slots[i]
-            if diff > 1:
-                windows += diff - 1
-
-    total_conflicts = tail_stats[0][1] + conflicts
-    total_windows = tail_stats[1][1] + windows
+    return (("conflicts", count_conflicts(key, classes_index)), ("windows", windows))
 
-    return (("conflicts", total_conflicts), ("windows", total_windows))
+def count_conflicts(key: str, classes_index: tuple["Class", ...]) -> int:
+    # Пары в одном слоте с общей группой, преподавателем или аудиторией — за один проход,
+    # по формуле включений-исключений (без рекурсии по хвостам и кеша на каждый суффикс).
+    # key оставлен для совместимости: результат кеширует compute_timetable_stats
+    counters = {}
+    for c in classes_index:
+        if c.slot_id == "":
+            continue
+        s = c.slot_id
+        for k in ((s, 1, c.group_id), (s, 2, c.teacher_id), (s, 3, c.room_id),
+                  (s, 4, c.group_id, c.teacher_id), (s, 5, c.group_id, c.room_id), (s, 6, c.teacher_id, c.room_id),
+                  (s, 7, c.group_id, c.teacher_id, c.room_id)):
+            counters[k] = counters.get(k, 0) + 1
+    conflicts = 0
+    for k, n in counters.items():
+        pairs = n * (n - 1) // 2
+        conflicts += pairs if len(k) % 2 else -pairs
+    return conflicts
 
 def measure_cache_performance():
     with open("./data/seed.json", "r", encoding="utf-8") as f:
@@ -75,4 +58,14 @@ def measure_cache_performance():
 
     print(f"Первый вызов: {t1:.3f} ms")
     print(f"Второй (из кэша): {t2:.3f} ms")
-    return t1, t2
\ No newline at end of file
+    return t1, t2
+
+
+def timetable_stats(classes_index: tuple["Class", ...], slots_index: tuple["Slot", ...]) -> tuple[tuple[str, int], ...]:
+    # Те же показатели, что у compute_timetable_stats, но без кеша: для больших расписаний
+    # и для сравнения множества вариантов (core/search.py).
+    if not classes_index:
+        return (("conflicts", 0), ("windows", 0))
+    conflicts = count_conflicts("", classes_index)
+    windows = compute_windows(classes_index, slots_index).group_total
+    return (("conflicts", conflicts), ("windows", windows))
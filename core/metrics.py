@@ -0,0 +1,199 @@
+# core/metrics.py
+# Лёгкая инструментация горячих путей: гистограммы задержек, счётчики вызовов
+# и количества обработанных элементов. Экспорт в текстовом формате Prometheus.
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import Callable, Dict, Optional, Tuple, Any
+
+# Границы корзин гистограммы в секундах (как у prometheus_client по умолчанию)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Глобальный флаг: при выключенной инструментации обёртки сразу вызывают функцию
+_enabled = os.environ.get("TIMETABLE_METRICS", "1") != "0"
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+class Histogram:
+    # Гистограмма задержек одной операции + счётчики вызовов/элементов/ошибок
+    def __init__(self, name: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)  # последняя корзина — +Inf
+        self.count = 0
+        self.total = 0.0
+        self.items = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, items: int = 0, error: bool = False):
+        idx = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.bucket_counts[idx] += 1
+            self.count += 1
+            self.total += seconds
+            self.items += items
+            if error:
+                self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "count": self.count,
+                "sum": self.total,
+                "items": self.items,
+                "errors": self.errors,
+                "buckets": tuple(zip(self.buckets + (float("inf"),), self.bucket_counts)),
+            }
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> Histogram:
+        h = self._metrics.get(name)
+        if h is None:
+            with self._lock:
+                h = self._metrics.setdefault(name, Histogram(name))
+        return h
+
+    def names(self) -> Tuple[str, ...]:
+        return tuple(sorted(self._metrics))
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+
+REGISTRY = Registry()
+
+
+def _count_items(result) -> int:
+    # Количество элементов результата: len() для коллекций, иначе 0
+    try:
+        return len(result)
+    except TypeError:
+        return 0
+
+
+def instrument(name: str, items: Optional[Callable[[Any], int]] = _count_items,
+               registry: Registry = REGISTRY):
+    # Декоратор: замеряет время вызова и число элементов результата.
+    # Повторные (рекурсивные) входы в ту же функцию в одном потоке не учитываются,
+    # поэтому рекурсивные функции записываются один раз на внешний вызов.
+    def decorator(func):
+        hist = registry.histogram(name)
+
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException:
+                    hist.observe(time.perf_counter() - start, error=True)
+                    raise
+                hist.observe(time.perf_counter() - start, items(result) if items else 0)
+                return result
+            return async_wrapper
+
+        local = threading.local()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled or getattr(local, "depth", 0):
+                return func(*args, **kwargs)
+            local.depth = 1
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                hist.observe(time.perf_counter() - start, error=True)
+                raise
+            finally:
+                local.depth = 0
+            hist.observe(time.perf_counter() - start, items(result) if items else 0)
+            return result
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def measure(name: str, registry: Registry = REGISTRY):
+    # Контекстный менеджер для участков кода. Число элементов можно задать
+    # через возвращаемый словарь: `with measure("x") as m: m["items"] = n`
+    if not _enabled:
+        yield {}
+        return
+    extra = {"items": 0}
+    start = time.perf_counter()
+    try:
+        yield extra
+    except BaseException:
+        registry.histogram(name).observe(time.perf_counter() - start, error=True)
+        raise
+    registry.histogram(name).observe(time.perf_counter() - start, extra.get("items", 0))
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(registry: Registry = REGISTRY, prefix: str = "timetable") -> str:
+    # Текстовый формат экспозиции Prometheus (version 0.0.4)
+    lines = [
+        f"# HELP {prefix}_op_duration_seconds Latency of instrumented operations.",
+        f"# TYPE {prefix}_op_duration_seconds histogram",
+    ]
+    counters = []
+    for name in registry.names():
+        snap = registry.histogram(name).snapshot()
+        op = f'op="{_escape(name)}"'
+        cumulative = 0
+        for bound, cnt in snap["buckets"]:
+            cumulative += cnt
+            lines.append(f'{prefix}_op_duration_seconds_bucket{{{op},le="{_fmt(bound)}"}} {cumulative}')
+        lines.append(f"{prefix}_op_duration_seconds_sum{{{op}}} {_fmt(snap['sum'])}")
+        lines.append(f"{prefix}_op_duration_seconds_count{{{op}}} {snap['count']}")
+        counters.append((op, snap))
+
+    for metric, key, help_text in (
+        ("op_calls_total", "count", "Number of calls of instrumented operations."),
+        ("op_items_total", "items", "Number of items produced by instrumented operations."),
+        ("op_errors_total", "errors", "Number of failed calls of instrumented operations."),
+    ):
+        lines.append(f"# HELP {prefix}_{metric} {help_text}")
+        lines.append(f"# TYPE {prefix}_{metric} counter")
+        for op, snap in counters:
+            lines.append(f"{prefix}_{metric}{{{op}}} {snap[key]}")
+    return "\n".join(lines) + "\n"
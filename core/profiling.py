@@ -0,0 +1,290 @@
+# core/profiling.py
+# Профилирование по запросу: cProfile + tracemalloc для отдельных вызовов
+# и простой сэмплирующий профайлер, пишущий стеки в формате collapsed
+# (совместим с flamegraph.pl / speedscope).
+#
+# Запуск из командной строки:
+#   python -m core.profiling core.memo.compute_timetable_stats --dataset data/seed.json --out stacks.folded
+import argparse
+import asyncio
+import contextvars
+import cProfile
+import importlib
+import inspect
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class ProfileReport:
+    duration_ms: float
+    hotspots: Tuple[dict, ...]                 # top-N функций по собственному времени
+    allocations: Tuple[dict, ...] = ()         # top-N мест выделения памяти
+    peak_memory_kb: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "duration_ms": self.duration_ms,
+            "hotspots": list(self.hotspots),
+            "allocations": list(self.allocations),
+            "peak_memory_kb": self.peak_memory_kb,
+        }
+
+
+def _hotspots(profile: cProfile.Profile, top: int, extra=()) -> Tuple[dict, ...]:
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    if extra:
+        stats.add(*extra)
+    rows = []
+    for (filename, line, name), (cc, nc, tt, ct, _callers) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(filename)}:{line}({name})",
+            "ncalls": nc,
+            "primitive_calls": cc,
+            "tottime_ms": tt * 1000,
+            "cumtime_ms": ct * 1000,
+        })
+    rows.sort(key=lambda r: r["tottime_ms"], reverse=True)
+    return tuple(rows[:top])
+
+
+def _allocations(snapshot: tracemalloc.Snapshot, top: int) -> Tuple[dict, ...]:
+    result = []
+    for stat in snapshot.statistics("lineno")[:top]:
+        frame = stat.traceback[0]
+        result.append({
+            "site": f"{os.path.basename(frame.filename)}:{frame.lineno}",
+            "size_kb": stat.size / 1024,
+            "count": stat.count,
+        })
+    return tuple(result)
+
+
+# cProfile не допускает вложенных профайлеров — профилируем не более одного запроса за раз
+_profile_lock = threading.Lock()
+# активный профайлер текущего контекста: asyncio.to_thread копирует контекст в поток-исполнитель
+_active: contextvars.ContextVar = contextvars.ContextVar("active_profiler", default=None)
+
+
+class Profiler:
+    # Контекстный менеджер: профилирует всё, что выполняется внутри блока.
+    # Если другой профиль уже идёт, блок выполняется без профилирования (report остаётся None).
+    def __init__(self, top: int = 20, memory: bool = True):
+        self.top = top
+        self.memory = memory
+        self.report: Optional[ProfileReport] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._threads: list = []               # профили вызовов в других потоках (см. in_thread)
+        self._own_tracemalloc = False
+        self._token = None
+
+    def __enter__(self):
+        if not _profile_lock.acquire(blocking=False):
+            return self
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracemalloc = True
+        self._start = time.perf_counter()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        self._token = _active.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._profile is None:
+            return False
+        try:
+            self._profile.disable()
+            _active.reset(self._token)
+            duration = (time.perf_counter() - self._start) * 1000
+            allocations, peak = (), 0.0
+            if self.memory and tracemalloc.is_tracing():
+                allocations = _allocations(tracemalloc.take_snapshot(), self.top)
+                peak = tracemalloc.get_traced_memory()[1] / 1024
+                if self._own_tracemalloc:
+                    tracemalloc.stop()
+            self.report = ProfileReport(duration, _hotspots(self._profile, self.top, self._threads), allocations, peak)
+        finally:
+            _profile_lock.release()
+        return False
+
+
+def in_thread(func: Callable) -> Callable:
+    # cProfile видит только поток, в котором включён. Обёртка для функции, уходящей в другой поток
+    # (asyncio.to_thread): если в контексте идёт профиль, вызов профилируется отдельным cProfile,
+    # а его статистика добавляется в отчёт
+    profiler = _active.get()
+    if profiler is None:
+        return func
+
+    def run(*args, **kwargs):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # Python 3.12+: профайлер уже действует во всех потоках
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            profiler._threads.append(profile)
+    return run
+
+
+def profile_call(func: Callable, *args, top: int = 20, memory: bool = True, **kwargs) -> Tuple[Any, Optional[ProfileReport]]:
+    # Выполняет func(*args, **kwargs) под профайлером. Корутины выполняются через asyncio.run,
+    # генераторы потребляются полностью (иначе ленивый код не будет выполнен).
+    with Profiler(top=top, memory=memory) as p:
+        result = _run_to_completion(func, *args, **kwargs)
+    return result, p.report
+
+
+def _run_to_completion(func: Callable, *args, **kwargs):
+    result = func(*args, **kwargs)
+    if inspect.iscoroutine(result):
+        result = asyncio.run(result)
+    elif inspect.isgenerator(result):
+        result = tuple(result)
+    return result
+
+
+def _frame_name(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{os.path.basename(code.co_filename)}:{name}"
+
+
+class StackSampler:
+    # Сэмплирующий профайлер: фоновый поток раз в interval секунд снимает стек
+    # целевого потока (sys._current_frames) и считает одинаковые стеки.
+    def __init__(self, interval: float = 0.001, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack and self.thread_id != own:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def __enter__(self):
+        # без уменьшения интервала переключения GIL поток-сэмплер получал бы управление раз в 5 мс
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 2))
+        self._thread = threading.Thread(target=self._sample, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+        return False
+
+    def collapsed(self) -> str:
+        # Формат collapsed stacks: "root;child;leaf <count>" по строке на стек
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday")
+
+
+def resolve_function(dotted: str) -> Callable:
+    # "core.memo.compute_timetable_stats" или "memo.compute_timetable_stats" -> функция
+    module_name, _, attr = dotted.rpartition(".")
+    if not module_name:
+        raise ValueError(f"Expected module.function, got {dotted!r}")
+    if not module_name.startswith("core"):
+        module_name = f"core.{module_name}"
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def build_arguments(func: Callable, dataset: str, overrides: Dict[str, str]) -> Dict[str, Any]:
+    # Подбирает аргументы функции по именам параметров из загруженного набора данных:
+    # path -> путь к набору, classes/classes_index -> кортеж Class, data -> словари и т.д.
+    from core import transforms
+
+    entities = dict(zip(
+        ("buildings", "rooms", "teachers", "groups", "courses", "slots", "classes", "constraints"),
+        transforms.load_seed(dataset),
+    ))
+    plain = {k: transforms.serialize_tuple(v) for k, v in entities.items()}
+    known = {
+        "path": dataset,
+        "key": "profile",
+        "day": "monday",
+        "days": list(WEEKDAYS),
+        "data": plain,
+        **entities,
+    }
+    kwargs: Dict[str, Any] = {}
+    for name, param in inspect.signature(func).parameters.items():
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        base = name[:-len("_index")] if name.endswith("_index") else name
+        if name in overrides:
+            kwargs[name] = overrides[name]
+        elif base in known:
+            kwargs[name] = known[base]
+        elif param.default is param.empty:
+            raise ValueError(f"Cannot resolve argument {name!r} of {func.__name__}; pass --arg {name}=...")
+    return kwargs
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Profile a core function against a dataset.")
+    parser.add_argument("function", help="dotted path, e.g. core.memo.compute_timetable_stats")
+    parser.add_argument("--dataset", default="./data/seed.json")
+    parser.add_argument("--out", default=None, help="file for collapsed stacks (flamegraph input)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--interval", type=float, default=0.001, help="sampling interval, seconds")
+    parser.add_argument("--arg", action="append", default=[], help="override argument: name=value")
+    args = parser.parse_args(argv)
+
+    func = resolve_function(args.function)
+    overrides = dict(a.split("=", 1) for a in args.arg)
+    kwargs = build_arguments(func, args.dataset, overrides)
+
+    with Profiler(top=args.top) as profiler:
+        for _ in range(args.repeat):
+            _run_to_completion(func, **kwargs)
+
+    report = profiler.report
+    print(f"{args.function}: {report.duration_ms:.3f} ms total, peak {report.peak_memory_kb:.1f} KiB")
+    print(f"{'tottime ms':>12} {'cumtime ms':>12} {'ncalls':>8}  function")
+    for h in report.hotspots:
+        print(f"{h['tottime_ms']:12.3f} {h['cumtime_ms']:12.3f} {h['ncalls']:8d}  {h['function']}")
+    if report.allocations:
+        print("top allocation sites:")
+        for a in report.allocations:
+            print(f"{a['size_kb']:12.1f} KiB {a['count']:8d}  {a['site']}")
+    if args.out:
+        # отдельный проход без cProfile/tracemalloc, чтобы их накладные расходы не искажали стеки
+        sampler = StackSampler(interval=args.interval)
+        with sampler:
+            for _ in range(args.repeat):
+                _run_to_completion(func, **kwargs)
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(sampler.collapsed())
+        print(f"collapsed stacks: {args.out} ({len(sampler.stacks)} unique)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+# core/query.py
+# Постраничная выборка занятий с фильтрами для таблиц клиента.
+# Фильтры — те же замыкания-предикаты, что и в core.recursion; подсчёт total и вырезание
+# страницы выполняются за один проход без построения полного списка отфильтрованных занятий.
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Tuple
+
+from core.domain import Building, Class, Course, Group, Room, Slot, Teacher
+from core.export import iter_rows
+from core.recursion import by_building, by_group, by_teacher
+from core.timeline import slot_index
+
+MAX_PAGE_SIZE = 500
+
+
+@dataclass(frozen=True)
+class Page:
+    total: int                      #сколько занятий подходит под фильтры
+    offset: int
+    limit: int
+    items: Tuple[Class, ...]        #занятия текущей страницы
+
+
+def class_filters(slots: Iterable[Slot], rooms: Iterable[Room], day: Optional[str] = None,
+                  teacher_id: Optional[str] = None, group_id: Optional[str] = None,
+                  building_id: Optional[str] = None) -> Tuple[Callable[[Class], bool], ...]:
+    predicates = []
+    if day:
+        day_slot_ids = frozenset(s.id for s in slots if s.day.lower() == day.lower())
+        predicates.append(lambda c: c.slot_id in day_slot_ids)
+    if teacher_id:
+        predicates.append(by_teacher(teacher_id))
+    if group_id:
+        predicates.append(by_group(group_id))
+    if building_id:
+        predicates.append(by_building(building_id, tuple(rooms)))
+    return tuple(predicates)
+
+
+def query_classes(classes: Iterable[Class], slots: Iterable[Slot] = (), rooms: Iterable[Room] = (),
+                  offset: int = 0, limit: int = 50, **filters) -> Page:
+    if offset < 0 or limit < 1:
+        raise ValueError(f"Invalid page: offset={offset}, limit={limit}")
+    limit = min(limit, MAX_PAGE_SIZE)
+    predicates = class_filters(slots, rooms, **filters)
+    items = []
+    total = 0
+    for c in classes:
+        if all(p(c) for p in predicates):
+            if offset <= total < offset + limit:
+                items.append(c)
+            total += 1
+    return Page(total, offset, limit, tuple(items))
+
+
+def query_page(classes: Iterable[Class], slots: Iterable[Slot] = (), rooms: Iterable[Room] = (),
+               teachers: Iterable[Teacher] = (), groups: Iterable[Group] = (), courses: Iterable[Course] = (),
+               buildings: Iterable[Building] = (), offset: int = 0, limit: int = 50, **filters) -> dict:
+    #Ответ для таблицы: страница занятий в виде плоских строк с названиями вместо id
+    slots, rooms = tuple(slots), tuple(rooms)
+    page = query_classes(classes, slots, rooms, offset=offset, limit=limit, **filters)
+    items = iter_rows(page.items, slots, rooms, teachers, groups, courses, buildings)
+    return {"total": page.total, "offset": page.offset, "limit": page.limit, "items": list(items)}
+
+
+def free_slots(classes: Iterable[Class], slots: Iterable[Slot], room_id: str, day: Optional[str] = None) -> Tuple[Slot, ...]:
+    #Слоты, в которые у аудитории нет занятий, пересекающихся по времени
+    slots = tuple(slots)
+    index = slot_index(slots)
+    busy = tuple(b for b in (index.get(c.slot_id) for c in classes if c.room_id == room_id) if b is not None)
+    # слоты с неразборчивым временем (index.invalid) свободными не считаются
+    return tuple(
+        s for s in slots
+        if (day is None or s.day.lower() == day.lower())
+        and s.id in index.by_id
+        and not any(index.by_id[s.id].overlaps(b) for b in busy)
+    )
@@ -1,4 +1,6 @@
 from core.domain import Class, Slot, Room
+from core.metrics import instrument
+from core.timeline import find_conflicts, slot_index
 
 #Замыкания-предикаты
 
@@ -33,28 +35,9 @@ def nest_by_day(classes: tuple[Class, ...], slots: tuple[Slot, ...]) -> tuple[tu
 
     return ((first_day, day_classes),) + nest_by_day(classes, rest_slots)
 
-#Рекурсивно ищет конфликты - занятия, у которых одинаковый слот и аудитория. Возвращает пары конфликтующих занятий.
+#Ищет конфликты - занятия, у которых пересекаются по времени слоты одного дня
+#и совпадает аудитория или преподаватель. Возвращает пары конфликтующих занятий.
+#Имя сохранено для совместимости; поиск итеративный (timeline.find_conflicts), без рекурсии на каждое занятие
+@instrument("conflicts")
 def find_conflicts_recursive(classes: tuple[Class, ...], slots: tuple[Slot, ...]) -> tuple[tuple[Class, Class], ...]:
-    if len(classes) <= 1:
-        return ()
-
-    first = classes[0]
-    rest = classes[1:]
-
-    current_conflicts = tuple(
-        (first, current)
-        for current in rest
-        for slot1 in slots
-        if slot1.id == first.slot_id
-        for slot2 in slots
-        if slot2.id == current.slot_id
-        and ((first.room_id == current.room_id
-        and first.room_id != "")
-        or first.teacher_id == current.teacher_id 
-        and first.teacher_id != "")
-        and first.slot_id != ""
-        and slot1.start == slot2.start
-        and slot1.end == slot2.end    
-    )
-
-    return current_conflicts + find_conflicts_recursive(rest, slots)
\ No newline at end of file
+    return find_conflicts(tuple(classes), slot_index(slots))
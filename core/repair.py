@@ -0,0 +1,218 @@
+# core/repair.py
+# Локальный ремонт расписания после одного изменения (аудитория закрыта, преподаватель отсутствует,
+# занятие перенесено вручную). Вместо повторного schedule_batch по всем занятиям:
+#   1) по индексам занятости (аудитория/преподаватель/группа -> слот -> занятия) находим только
+#      затронутые занятия;
+#   2) переставляем их по одному, остальные остаются на местах.
+# Места перебираются от наименее заметных изменений: тот же слот в другой аудитории, затем другие
+# слоты того же дня (сначала в прежней аудитории), затем остальные дни. Слот, в который заняты
+# преподаватель или группа, отсекается сразу, без перебора аудиторий.
+from dataclasses import dataclass, replace
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Union
+
+from core.async_schedule import _room_matches_needs
+from core.domain import Class, Group, Room, Slot
+from core.timeline import SlotIndex, slot_index
+
+
+@dataclass(frozen=True)
+class RoomClosed:                   #Аудитория недоступна (во всех слотах или только в перечисленных)
+    room_id: str
+    slot_ids: Optional[FrozenSet[str]] = None
+
+
+@dataclass(frozen=True)
+class TeacherAbsent:                #Преподаватель не может вести занятия в перечисленные слоты/день
+    teacher_id: str
+    slot_ids: Optional[FrozenSet[str]] = None
+    day: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ClassMoved:                   #Занятие вручную поставлено в другой слот и/или аудиторию
+    class_id: str
+    slot_id: Optional[str] = None
+    room_id: Optional[str] = None
+
+
+Change = Union[RoomClosed, TeacherAbsent, ClassMoved]
+
+
+@dataclass(frozen=True)
+class Move:
+    class_id: str
+    old_slot_id: str
+    old_room_id: str
+    new_slot_id: str
+    new_room_id: str
+
+
+@dataclass(frozen=True)
+class RepairResult:
+    classes: Tuple[Class, ...]      #полное расписание после ремонта
+    affected: Tuple[str, ...]       #занятия, которые пришлось переставлять
+    moves: Tuple[Move, ...]         #удачные перестановки
+    unplaced: Tuple[str, ...]       #затронутые занятия, для которых места не нашлось (сняты со слота и из аудитории, статус planned)
+
+    @property
+    def moved(self) -> int:
+        return len(self.moves)
+
+    def to_dict(self) -> dict:
+        return {
+            "affected": list(self.affected),
+            "moved": self.moved,
+            "moves": [m.__dict__ for m in self.moves],
+            "unplaced": list(self.unplaced),
+        }
+
+
+class Occupancy:
+    #Индексы занятости: (вид, id) -> слот -> id занятий; проверка «занято ли» учитывает
+    #пересечение по времени через интервальный индекс слотов
+    def __init__(self, classes: Iterable[Class], index: SlotIndex):
+        self.index = index
+        self.busy: Dict[Tuple[str, str], Dict[str, Set[str]]] = {}
+        self._overlapping: Dict[str, Tuple[str, ...]] = {}
+        for c in classes:
+            self.add(c)
+
+    @staticmethod
+    def _keys(c: Class):
+        return (("room", c.room_id), ("teacher", c.teacher_id), ("group", c.group_id))
+
+    def add(self, c: Class):
+        if not c.slot_id or c.status == "cancelled":
+            return
+        for kind, entity in self._keys(c):
+            if entity:
+                self.busy.setdefault((kind, entity), {}).setdefault(c.slot_id, set()).add(c.id)
+
+    def remove(self, c: Class):
+        if not c.slot_id:
+            return
+        for kind, entity in self._keys(c):
+            ids = self.busy.get((kind, entity), {}).get(c.slot_id)
+            if ids:
+                ids.discard(c.id)
+
+    def overlapping(self, slot_id: str) -> Tuple[str, ...]:
+        ids = self._overlapping.get(slot_id)
+        if ids is None:
+            ids = self._overlapping[slot_id] = tuple(s.id for s in self.index.overlapping(slot_id))
+        return ids
+
+    def holders(self, kind: str, entity: str, slot_id: str) -> Set[str]:
+        #Занятия сущности в слотах, пересекающихся с slot_id
+        by_slot = self.busy.get((kind, entity))
+        if not by_slot or not entity:
+            return set()
+        found: Set[str] = set()
+        for s in self.overlapping(slot_id):
+            found |= by_slot.get(s, set())
+        return found
+
+    def is_free(self, kind: str, entity: str, slot_id: str) -> bool:
+        by_slot = self.busy.get((kind, entity))
+        return not by_slot or not any(by_slot.get(s) for s in self.overlapping(slot_id))
+
+    def conflicts(self, c: Class, slot_id: str, room_id: str) -> Set[str]:
+        found = (self.holders("room", room_id, slot_id) | self.holders("teacher", c.teacher_id, slot_id)
+                 | self.holders("group", c.group_id, slot_id))
+        found.discard(c.id)
+        return found
+
+
+def _affected(change: Change, classes: Tuple[Class, ...], occupancy: Occupancy, index: SlotIndex) -> List[str]:
+    # отменённые занятия мест не занимают (см. Occupancy.add) и переставлять их не нужно
+    active = [c for c in classes if c.slot_id and c.status != "cancelled"]
+    if isinstance(change, RoomClosed):
+        return [c.id for c in active if c.room_id == change.room_id
+                and (change.slot_ids is None or c.slot_id in change.slot_ids)]
+    if isinstance(change, TeacherAbsent):
+        return [c.id for c in active if c.teacher_id == change.teacher_id
+                and _teacher_blocked(change, c.slot_id, index)]
+    moved = next(c for c in classes if c.id == change.class_id)
+    return sorted(occupancy.conflicts(moved, moved.slot_id, moved.room_id),
+                  key={c.id: i for i, c in enumerate(classes)}.get)
+
+
+def _teacher_blocked(change: TeacherAbsent, slot_id: str, index: SlotIndex) -> bool:
+    if change.slot_ids is not None and slot_id in change.slot_ids:
+        return True
+    return change.day is not None and index.day_of(slot_id) == change.day.lower()
+
+
+def _room_closed(change: Change, room_id: str, slot_id: str) -> bool:
+    return (isinstance(change, RoomClosed) and room_id == change.room_id
+            and (change.slot_ids is None or slot_id in change.slot_ids))
+
+
+def _slot_order(c: Class, slots: Tuple[Slot, ...], index: SlotIndex) -> List[str]:
+    #Слоты в порядке возрастания «заметности» переноса: текущий, тот же день, остальные дни
+    day = index.day_of(c.slot_id)
+    same_day = [s.id for s in slots if s.id != c.slot_id and index.day_of(s.id) == day]
+    other_days = [s.id for s in slots if s.id != c.slot_id and index.day_of(s.id) != day]
+    return [c.slot_id] + same_day + other_days
+
+
+def repair(classes: Iterable[Class], rooms: Iterable[Room], slots: Iterable[Slot], groups: Iterable[Group],
+           change: Change) -> RepairResult:
+    classes, rooms, slots = tuple(classes), tuple(rooms), tuple(slots)
+    index = slot_index(slots)
+    group_size = {g.id: g.size for g in groups}
+    by_id = {c.id: c for c in classes}
+
+    if isinstance(change, ClassMoved):
+        if change.class_id not in by_id:
+            raise KeyError(change.class_id)
+        moved = by_id[change.class_id]
+        by_id[moved.id] = replace(moved, slot_id=change.slot_id or moved.slot_id,
+                                  room_id=change.room_id or moved.room_id, status="moved")
+    occupancy = Occupancy(by_id.values(), index)
+    affected = _affected(change, tuple(by_id.values()), occupancy, index)
+
+    def slot_allowed(c: Class, slot_id: str) -> bool:
+        # преподаватель и группа не зависят от аудитории — слот отсекается целиком
+        if index.get(slot_id) is None:
+            return False
+        if isinstance(change, TeacherAbsent) and c.teacher_id == change.teacher_id \
+                and _teacher_blocked(change, slot_id, index):
+            return False
+        return occupancy.is_free("teacher", c.teacher_id, slot_id) and occupancy.is_free("group", c.group_id, slot_id)
+
+    def room_allowed(slot_id: str, room_id: str) -> bool:
+        return not _room_closed(change, room_id, slot_id) and occupancy.is_free("room", room_id, slot_id)
+
+    def find_place(c: Class) -> Optional[Tuple[str, str]]:
+        # вместимость и оборудование не зависят от слота — подходящие аудитории отбираются один раз;
+        # в своём слоте ищется другая аудитория, в других слотах — сначала прежняя
+        size = group_size.get(c.group_id, 0)
+        suitable = [r.id for r in rooms if r.capacity >= size and _room_matches_needs(r, c.needs)]
+        keep = c.room_id if c.room_id in suitable else None
+        others = [r for r in suitable if r != c.room_id]
+        for slot_id in _slot_order(c, slots, index):
+            if not slot_allowed(c, slot_id):
+                continue
+            if slot_id != c.slot_id and keep and room_allowed(slot_id, keep):
+                return slot_id, keep
+            for room_id in others:
+                if room_allowed(slot_id, room_id):
+                    return slot_id, room_id
+        return None
+
+    moves, unplaced = [], []
+    for class_id in affected:
+        c = by_id[class_id]
+        occupancy.remove(c)
+        target = find_place(c)
+        if target is None:
+            by_id[class_id] = replace(c, slot_id="", room_id="", status="planned")
+            unplaced.append(class_id)
+            continue
+        placed = replace(c, slot_id=target[0], room_id=target[1], status="moved")
+        by_id[class_id] = placed
+        occupancy.add(placed)
+        moves.append(Move(class_id, c.slot_id, c.room_id, placed.slot_id, placed.room_id))
+
+    return RepairResult(tuple(by_id.values()), tuple(affected), tuple(moves), tuple(unplaced))
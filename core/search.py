@@ -0,0 +1,136 @@
+# core/search.py
+# Многостартовый поиск расписания. Жадная расстановка schedule_day зависит от порядка занятий,
+# поэтому запускается K попыток с разными порядками (исходный, крупные группы первыми, занятия с
+# требованиями к аудитории первыми, затем случайные перестановки) в пуле процессов. Каждая попытка
+# проходит все дни подряд и оценивается теми же показателями, что memo (коллизии, окна), плюс число
+# нерасставленных занятий; остаётся лучшая.
+#
+# Воспроизводимость: порядок попытки i зависит только от (seed, i), а при равной оценке побеждает
+# меньший номер. Досрочная остановка (оценка не хуже target) ждёт завершения всех попыток с меньшими
+# номерами, поэтому без бюджета времени результат не зависит от того, какой процесс успел первым.
+# Бюджет времени (budget, секунды) прерывает ожидание: ещё не начатые попытки снимаются с очереди,
+# а уже идущие прервать нельзя — они досчитываются в пуле, их результат отбрасывается (abandoned).
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+from core.async_schedule import schedule_day
+from core.domain import Class, Group, entities
+from core.memo import timetable_stats
+
+ORDERINGS = ("input", "largest_group", "needs_first")
+Score = Tuple[int, int, int]                        #(нерасставлено, коллизии, окна) — меньше лучше
+
+
+@dataclass(frozen=True)
+class Attempt:
+    index: int
+    ordering: str
+    score: Score
+    classes: Tuple[Class, ...]
+    seconds: float
+
+    def to_dict(self) -> dict:
+        unplaced, conflicts, windows = self.score
+        return {"index": self.index, "ordering": self.ordering, "unplaced": unplaced,
+                "conflicts": conflicts, "windows": windows, "seconds": round(self.seconds, 4)}
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    best: Attempt
+    attempts: Tuple[Attempt, ...]                   #завершённые попытки в порядке номеров
+    stopped: str                                    #completed | target | budget
+    seconds: float
+    abandoned: int = 0                              #попытки, которые при остановке уже шли и ещё занимают пул
+
+    def to_dict(self) -> dict:
+        return {"best": self.best.to_dict(), "attempts": [a.to_dict() for a in self.attempts],
+                "stopped": self.stopped, "seconds": round(self.seconds, 4), "abandoned": self.abandoned}
+
+
+def ordering_of(index: int) -> str:
+    return ORDERINGS[index] if index < len(ORDERINGS) else "random"
+
+
+def order_classes(classes: Tuple[Class, ...], groups: Sequence[Group], index: int, seed: int) -> Tuple[Class, ...]:
+    ordering = ordering_of(index)
+    if ordering == "input":
+        return classes
+    if ordering == "largest_group":
+        size = {g.id: g.size for g in groups}
+        return tuple(sorted(classes, key=lambda c: -size.get(c.group_id, 0)))
+    if ordering == "needs_first":
+        return tuple(sorted(classes, key=lambda c: not c.needs))
+    shuffled = list(classes)
+    random.Random(f"{seed}:{index}").shuffle(shuffled)
+    return tuple(shuffled)
+
+
+def run_attempt(index: int, seed: int, days: Tuple[str, ...], classes, rooms, slots, groups) -> Attempt:
+    #Одна попытка: дни проходятся по очереди, каждый следующий видит расстановку предыдущих
+    start = time.perf_counter()
+    classes = entities(Class, classes)
+    ordered = order_classes(classes, groups, index, seed)
+    for day in days:
+        ordered = schedule_day(day, ordered, rooms, slots, groups)["classes"]
+    # в исходном порядке, чтобы попытки отличались только расстановкой
+    placed = {c.id: c for c in ordered}
+    result = tuple(placed[c.id] for c in classes)
+    stats = dict(timetable_stats(result, tuple(slots)))
+    score = (sum(1 for c in result if not c.slot_id), stats["conflicts"], stats["windows"])
+    return Attempt(index, ordering_of(index), score, result, time.perf_counter() - start)
+
+
+def multi_start(days: Sequence[str], classes, rooms, slots, groups, attempts: int = 8, seed: int = 0,
+                budget: Optional[float] = None, target: Optional[Score] = (0, 0, 0),
+                executor: Optional[Executor] = None, max_workers: Optional[int] = None) -> SearchResult:
+    if attempts < 1:
+        raise ValueError("attempts must be positive")
+    days = tuple(dict.fromkeys(d.lower() for d in days))
+    if not days:
+        raise ValueError("No days to schedule")
+    started = time.perf_counter()
+    own = executor is None
+    if own:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    futures = {executor.submit(run_attempt, i, seed, days, classes, rooms, slots, groups): i for i in range(attempts)}
+    done: Dict[int, Attempt] = {}
+    stopped = "completed"
+    abandoned = 0
+    try:
+        pending = set(futures)
+        while pending:
+            timeout = None if budget is None else budget - (time.perf_counter() - started)
+            if timeout is not None and timeout <= 0:
+                stopped = "budget"
+                break
+            finished, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in finished:
+                done[futures[future]] = future.result()
+            if target is not None and _reached(done, target):
+                stopped = "target"
+                break
+        if stopped != "completed":
+            # cancel() снимает только ждущие в очереди; уже идущие досчитаются без нас
+            abandoned = sum(1 for future in pending if not future.cancel())
+    finally:
+        if own:
+            executor.shutdown(wait=stopped == "completed", cancel_futures=True)
+    if not done:
+        raise TimeoutError(f"No attempt finished within {budget} s")
+    completed = tuple(done[i] for i in sorted(done))
+    best = min(completed, key=lambda a: (a.score, a.index))
+    return SearchResult(best, completed, stopped, time.perf_counter() - started, abandoned)
+
+
+def _reached(done: Dict[int, Attempt], target: Score) -> bool:
+    #Цель достигнута попыткой i, и все попытки с меньшими номерами уже завершены
+    for i in range(len(done) + 1):
+        if i not in done:
+            return False
+        if done[i].score <= target:
+            return True
+    return False
@@ -1,6 +1,8 @@
 # core/service.py
+import inspect
 from dataclasses import dataclass
-from typing import Callable, Tuple, Dict, Any, Iterable
+from collections import OrderedDict
+from typing import Callable, Tuple, Dict, Any, Iterable, Optional
 from core.compose import compose, pipe
 
 @dataclass(frozen=True)
@@ -11,42 +13,99 @@ class DayReport:
     summary: Dict[str, Any]
     stages: Tuple[Any, ...]  # промежуточные результаты (для UI)
 
+@dataclass(frozen=True)
+class PeriodReport:
+    days: Tuple[DayReport, ...]
+    by_teacher: Dict[str, Tuple[dict, ...]]   # расписание каждого преподавателя за период
+    by_group: Dict[str, Tuple[dict, ...]]     # расписание каждой группы
+    by_room: Dict[str, Tuple[dict, ...]]      # занятость каждой аудитории
+    summary: Dict[str, Any]
+
 class TimetableService:
+    # Результаты стадий кэшируются по ключу (стадия, день, версия данных) с LRU-вытеснением.
+    # Версия данных растёт при update_data()/invalidate(), поэтому старые записи больше не читаются.
+    # Калькулятор enrich_classes получает общие для всех стадий словари-справочники (lookups=...),
+    # построенные один раз на версию данных, — если принимает такой аргумент; внедрённые калькуляторы
+    # со старой сигнатурой enrich_classes(classes, data) вызываются как раньше.
     def __init__(self, validators: Dict[str, Callable], selectors: Dict[str, Callable],
-                calculators: Dict[str, Callable], data: Dict[str, Iterable]):
+                calculators: Dict[str, Callable], data: Dict[str, Iterable], cache_size: int = 128):
         self.validators = validators
         self.selectors = selectors
         self.calculators = calculators
         self.data = data
+        self.data_version = 0
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lookups: Optional[Tuple[int, Dict[str, dict]]] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
 
-    def build_day_report(self, day: str) -> DayReport:
-        stages = []
+    def update_data(self, data: Dict[str, Iterable]) -> int:
+        self.data = data
+        return self.invalidate()
+
+    def invalidate(self) -> int:
+        # данные изменились на месте — новая версия, кэш и справочники сбрасываются
+        self.data_version += 1
+        self._cache.clear()
+        self._lookups = None
+        return self.data_version
+
+    def lookups(self) -> Dict[str, dict]:
+        if self._lookups is None or self._lookups[0] != self.data_version:
+            self._lookups = (self.data_version, build_lookups(self.data))
+        return self._lookups[1]
+
+    def _enrich(self, enrich: Callable, classes) -> tuple:
+        if accepts_lookups(enrich):
+            return tuple(enrich(classes, self.data, lookups=self.lookups()))
+        return tuple(enrich(classes, self.data))
 
-        # 1. validate day
+    def _stage(self, name: str, day: str, compute: Callable[[], Any]) -> Any:
+        key = (name, day, self.data_version)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return self._cache[key]
+        self.cache_misses += 1
+        value = compute()
+        self._cache[key] = value
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return value
+
+    def build_day_report(self, day: str) -> DayReport:
+        # 1. validate day (не кэшируется: некорректный день должен всегда давать ошибку)
         validate_day = self.validators.get("validate_day")
         if validate_day is None:
             raise RuntimeError("Validator 'validate_day' not provided")
         validated = validate_day(day)
-        stages.append(("validated_day", validated))
+        return self._stage("report", validated, lambda: self._build_day_report(day, validated))
+
+    def _build_day_report(self, day: str, validated: str) -> DayReport:
+        stages = [("validated_day", validated)]
 
         # 2. select slots for the day
         select_slots = self.selectors.get("select_slots_for_day")
         if select_slots is None:
             raise RuntimeError("Selector 'select_slots_for_day' not provided")
-        slots = tuple(select_slots(self.data.get("slots", ()), day))
+        slots = self._stage("slots", validated, lambda: tuple(select_slots(self.data.get("slots", ()), day)))
         stages.append(("slots", slots))
 
         # 3. select classes scheduled into these slots (pure selector)
         select_classes = self.selectors.get("select_classes_for_slots")
         if select_classes is None:
             raise RuntimeError("Selector 'select_classes_for_slots' not provided")
-        classes = tuple(select_classes(self.data.get("classes", ()), slots))
+        classes = self._stage("classes", validated, lambda: tuple(select_classes(self.data.get("classes", ()), slots)))
         stages.append(("classes", classes))
 
         # 4. enrich classes with room/course/teacher names if calculators provided
         enrich = self.calculators.get("enrich_classes")
         if enrich:
-            enriched_classes = tuple(enrich(classes, self.data))
+            enriched_classes = self._stage(
+                "enriched_classes", validated,
+                lambda: self._enrich(enrich, classes),
+            )
         else:
             enriched_classes = classes
         stages.append(("enriched_classes", enriched_classes))
@@ -54,7 +113,7 @@ class TimetableService:
         # 5. calculate summary (load, room utilization, teacher load)
         summarize = self.calculators.get("summarize_day")
         if summarize:
-            summary = summarize(enriched_classes, slots, self.data)
+            summary = self._stage("summary", validated, lambda: summarize(enriched_classes, slots, self.data))
         else:
             summary = {}
         stages.append(("summary", summary))
@@ -68,6 +127,75 @@ class TimetableService:
         )
         return report
 
+    def build_period_report(self, days: Iterable[str]) -> PeriodReport:
+        # Отчёт за несколько дней за один проход по занятиям: занятия раскладываются по дням,
+        # обогащаются один раз и одновременно группируются по преподавателям, группам и аудиториям.
+        validate_day = self.validators.get("validate_day")
+        if validate_day is None:
+            raise RuntimeError("Validator 'validate_day' not provided")
+        validated = tuple(dict.fromkeys(validate_day(d) for d in days))
+        return self._stage("period", validated, lambda: self._build_period_report(validated))
+
+    def _build_period_report(self, days: Tuple[str, ...]) -> PeriodReport:
+        select_slots = self.selectors.get("select_slots_for_day")
+        if select_slots is None:
+            raise RuntimeError("Selector 'select_slots_for_day' not provided")
+        slots_by_day = {
+            d: self._stage("slots", d, lambda d=d: tuple(select_slots(self.data.get("slots", ()), d)))
+            for d in days
+        }
+        day_of_slot = {s["id"]: d for d, slots in slots_by_day.items() for s in slots}
+
+        # единственный проход по занятиям
+        per_day: Dict[str, list] = {d: [] for d in days}
+        for c in self.data.get("classes", ()):
+            d = day_of_slot.get(c.get("slot_id") or "")
+            if d is not None:
+                per_day[d].append(c)
+
+        enrich = self.calculators.get("enrich_classes")
+        summarize = self.calculators.get("summarize_day")
+
+        by_teacher: Dict[str, list] = {}
+        by_group: Dict[str, list] = {}
+        by_room: Dict[str, list] = {}
+        reports = []
+        for d in days:
+            classes = tuple(per_day[d])
+            enriched = self._enrich(enrich, classes) if enrich else classes
+            for c in enriched:
+                if c.get("teacher_id"):
+                    by_teacher.setdefault(c["teacher_id"], []).append(c)
+                if c.get("group_id"):
+                    by_group.setdefault(c["group_id"], []).append(c)
+                if c.get("room_id"):
+                    by_room.setdefault(c["room_id"], []).append(c)
+            slots = slots_by_day[d]
+            summary = summarize(enriched, slots, self.data) if summarize else {}
+            reports.append(DayReport(
+                day=d,
+                slots=slots,
+                classes=enriched,
+                summary=summary,
+                stages=(("validated_day", d), ("slots", slots), ("classes", classes),
+                        ("enriched_classes", enriched), ("summary", summary)),
+            ))
+
+        freeze = lambda groups: {k: tuple(v) for k, v in groups.items()}
+        return PeriodReport(
+            days=tuple(reports),
+            by_teacher=freeze(by_teacher),
+            by_group=freeze(by_group),
+            by_room=freeze(by_room),
+            summary={
+                "days": len(days),
+                "classes_count": sum(len(r.classes) for r in reports),
+                "teachers": len(by_teacher),
+                "groups": len(by_group),
+                "rooms": len(by_room),
+            },
+        )
+
 def validate_day(day: str) -> str:
     allowed = {"monday","tuesday","wednesday","thursday","friday"}
     d = (day or "").lower()
@@ -88,11 +216,30 @@ def select_classes_for_slots(classes: Iterable[dict], slots: Iterable[dict]) ->
         if sid in slot_ids:
             yield c
 
-def enrich_classes(classes: Iterable[dict], data: dict) -> Iterable[dict]:
+def accepts_lookups(fn: Callable) -> bool:
+    # калькулятор объявляет параметр lookups (или **kwargs)
+    try:
+        params = inspect.signature(fn).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.name == "lookups" or p.kind is inspect.Parameter.VAR_KEYWORD for p in params)
+
+
+def build_lookups(data: dict) -> Dict[str, dict]:
+    # справочники id -> запись; строятся один раз на версию данных
+    return {
+        "rooms": {r["id"]: r for r in data.get("rooms", ())},
+        "courses": {c["code"]: c for c in data.get("courses", ())},
+        "teachers": {t["id"]: t for t in data.get("teachers", ())},
+    }
+
+def enrich_classes(classes: Iterable[dict], data: dict, lookups: Optional[Dict[str, dict]] = None) -> Iterable[dict]:
     # добавим human-readable поля: room_name, course_title, teacher_name
-    rooms = {r["id"]: r for r in data.get("rooms", ())}
-    courses = {c["code"]: c for c in data.get("courses", ())}
-    teachers = {t["id"]: t for t in data.get("teachers", ())}
+    if lookups is None:
+        lookups = build_lookups(data)
+    rooms = lookups["rooms"]
+    courses = lookups["courses"]
+    teachers = lookups["teachers"]
 
     for cl in classes:
         room = rooms.get(cl.get("room_id")) or {}
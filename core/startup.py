@@ -0,0 +1,87 @@
+# core/startup.py
+# Замер стоимости старта: каждая точка входа импортируется в отдельном чистом процессе с
+# `python -X importtime`, из вывода берётся суммарное время импорта и самые тяжёлые модули.
+# Заодно проверяется, что точка входа не тянет лишнего (например, сервер — flet).
+#
+# Запуск:
+#   python -m core.startup server client main --runs 5
+#   python -m core.startup server --forbid flet --max-ms 400     # ненулевой код при регрессии
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+@dataclass(frozen=True)
+class ImportReport:
+    module: str
+    total_ms: float                            # медиана по запускам: полное время import module
+    heaviest: Tuple[Tuple[str, float], ...]    # модули с наибольшим собственным временем, ms
+    loaded: Tuple[str, ...]                    # все загруженные модули (последний запуск)
+
+    def to_dict(self) -> dict:
+        return {"module": self.module, "total_ms": round(self.total_ms, 2),
+                "heaviest": [{"module": m, "self_ms": round(t, 2)} for m, t in self.heaviest]}
+
+
+def parse_importtime(output: str) -> Tuple[Dict[str, float], Dict[str, float]]:
+    #-> (собственное время, накопленное время) по модулям, микросекунды переведены в ms
+    own, cumulative = {}, {}
+    for line in output.splitlines():
+        m = _LINE.match(line)
+        if m:
+            name = m.group(4)
+            own[name] = int(m.group(1)) / 1000
+            cumulative[name] = int(m.group(2)) / 1000
+    return own, cumulative
+
+
+def measure_import(module: str, runs: int = 3, top: int = 10, cwd: Optional[str] = None) -> ImportReport:
+    totals: List[float] = []
+    own: Dict[str, float] = {}
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, cwd=cwd, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+        own, cumulative = parse_importtime(proc.stderr)
+        totals.append(cumulative.get(module, sum(own.values())))
+    heaviest = tuple(sorted(own.items(), key=lambda kv: -kv[1])[:top])
+    return ImportReport(module, statistics.median(totals), heaviest, tuple(own))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import cost of entry points.")
+    parser.add_argument("modules", nargs="+", help="e.g. server client main")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--forbid", action="append", default=[], help="module that must not be imported")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if any entry point is slower")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        report = measure_import(module, args.runs, args.top)
+        print(f"{module}: {report.total_ms:.1f} ms (median of {args.runs})")
+        for name, ms in report.heaviest:
+            print(f"{ms:10.1f} ms  {name}")
+        forbidden = [name for name in args.forbid if name in report.loaded]
+        if forbidden:
+            print(f"  forbidden imports: {', '.join(forbidden)}")
+            failed = True
+        if args.max_ms is not None and report.total_ms > args.max_ms:
+            print(f"  slower than {args.max_ms} ms")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
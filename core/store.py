@@ -0,0 +1,408 @@
+# core/store.py
+# Хранилище состояния сервера, общее для нескольких процессов uvicorn (--workers N).
+#
+# MemoryStore   — словарь в памяти процесса (как раньше; для одного воркера и тестов).
+# SnapshotStore — снимок таблиц в файле + счётчик версии в отображённом в память (mmap) файле.
+#                 Читатель на каждый запрос сверяет 8 байт счётчика и перечитывает снимок только
+#                 после изменения; запись атомарна (os.replace) и сериализуется файловой блокировкой.
+# WriterStore   — чтение как у SnapshotStore, а изменения отправляются единственному процессу-писателю
+#                 (run_writer), который применяет их по очереди.
+#
+# Выбор для сервера — переменная окружения TIMETABLE_STORE: memory | snapshot | writer | sqlite,
+# каталог снимка — TIMETABLE_STATE_DIR, файл базы SQLite — TIMETABLE_DB.
+#
+# Каталог состояния принадлежит пользователю и закрыт для остальных (0700); снимок и сообщения
+# писателю — JSON, а не pickle, поэтому подложенный файл или сообщение не исполняют код.
+# Ключ для соединения с писателем — случайный, в файле authkey того же каталога.
+import dataclasses
+import getpass
+import json
+import mmap
+import os
+import secrets
+import stat
+import struct
+import tempfile
+import threading
+from collections.abc import Mapping
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from core import frp, transforms
+from core.domain import (Building, Class, Constraint, Course, Group, Room, Slot, Teacher,
+                         entities)
+
+try:
+    import fcntl
+except ImportError:  # Windows: межпроцессной блокировки нет, используйте режим writer
+    fcntl = None
+
+TABLES = ("buildings", "rooms", "teachers", "groups", "courses", "slots", "classes", "constraints")
+TYPES = dict(zip(TABLES, (Building, Room, Teacher, Group, Course, Slot, Class, Constraint)))
+
+_VERSION = struct.Struct("<Q")
+_HEADER = struct.Struct("<8sQ")
+_MAGIC = b"TTSNAP02"
+_AUTHKEY_FILE = "authkey"
+
+
+class Snapshot(Mapping):
+    #Неизменяемый снимок состояния: таблицы доменных кортежей и номер версии
+    __slots__ = ("version", "tables")
+
+    def __init__(self, version: int, tables: Dict[str, Tuple]):
+        self.version = version
+        self.tables = tables
+
+    def __getitem__(self, name: str) -> Tuple:
+        return self.tables[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.tables)
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+
+EMPTY = Snapshot(0, {})
+
+
+# ---------------------- изменения состояния ----------------------
+
+def _load_seed(tables: Dict[str, Tuple], path: str = "./data/seed.json") -> Dict[str, Tuple]:
+    return dict(zip(TABLES, transforms.load_seed(path)))
+
+
+def _replace(tables: Dict[str, Tuple], **new_tables) -> Dict[str, Tuple]:
+    unknown = set(new_tables) - set(TABLES)
+    if unknown:
+        raise ValueError(f"Unknown tables: {sorted(unknown)}")
+    # таблицы приводятся к сущностям здесь, при записи; читатели снимка получают их без копирования
+    return {**tables, **{name: entities(TYPES[name], items) for name, items in new_tables.items()}}
+
+
+def _update_classes(tables: Dict[str, Tuple], classes) -> Dict[str, Tuple]:
+    #Замена отдельных занятий по id (результат ремонта, поиска): занятия, изменённые тем временем
+    #другими запросами, остаются как есть
+    changed = {c.id: c for c in entities(Class, classes)}
+    current = tables.get("classes", ())
+    unknown = set(changed) - {c.id for c in current}
+    if unknown:
+        raise ValueError(f"Unknown classes: {sorted(unknown)}")
+    return {**tables, "classes": entities(Class, [changed.get(c.id, c) for c in current])}
+
+
+# события frp (ASSIGN_SLOT, ASSIGN_ROOM, MOVE_CLASS, CANCEL_CLASS, ADD_ROOM, ADD_CLASS) — те же обработчики, что у клиента
+EVENT_BUS = frp.EventBus()
+EVENT_BUS.subscribe("ASSIGN_SLOT", frp.assign_slot)
+EVENT_BUS.subscribe("ASSIGN_ROOM", frp.assign_room)
+EVENT_BUS.subscribe("MOVE_CLASS", frp.move_class)
+EVENT_BUS.subscribe("CANCEL_CLASS", frp.cancel_class)
+EVENT_BUS.subscribe("ADD_ROOM", frp.add_room)
+EVENT_BUS.subscribe("ADD_CLASS", frp.add_class)
+_EVENT_TABLES = {"classes": Class, "rooms": Room}
+
+
+def _event(tables: Dict[str, Tuple], name: str, payload: dict) -> Dict[str, Tuple]:
+    #Обработчики frp работают со словарями; обратно в кортежи переводятся только изменённые таблицы
+    if name not in EVENT_BUS.subscribers:
+        raise ValueError(f"Unknown event: {name}")
+    state = {table: transforms.serialize_tuple(tables.get(table, ())) for table in _EVENT_TABLES}
+    new_state = EVENT_BUS.publish(name, payload, state)
+    changed = {table: transforms.to_tuple(type_, new_state[table])
+               for table, type_ in _EVENT_TABLES.items() if new_state[table] is not state[table]}
+    return {**tables, **changed}
+
+
+# имя операции -> функция (таблицы, **аргументы) -> новые таблицы; аргументы должны сериализоваться
+# в JSON (сущности — словарями, см. _encode), потому что в режиме writer операция передаётся в другой процесс
+MUTATIONS: Dict[str, Callable[..., Dict[str, Tuple]]] = {
+    "load_seed": _load_seed,
+    "replace": _replace,
+    "event": _event,
+    "update_classes": _update_classes,
+}
+
+
+def apply_mutation(tables: Dict[str, Tuple], op: str, kwargs: Dict[str, Any]) -> Dict[str, Tuple]:
+    mutation = MUTATIONS.get(op)
+    if mutation is None:
+        raise ValueError(f"Unknown mutation: {op}")
+    return mutation(tables, **kwargs)
+
+
+# ---------------------- каталог состояния и формат ----------------------
+
+def default_state_dir() -> str:
+    #Свой каталог у каждого пользователя: общий и предсказуемый путь в /tmp мог бы занять другой
+    user = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+    return os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), f"timetable-state-{user}")
+
+
+def private_dir(directory: str) -> str:
+    #Каталог создаётся с правами 0700; чужой, ссылка или доступный на запись другим — PermissionError
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid"):
+        st = os.lstat(directory)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+            raise PermissionError(f"{directory} is not a directory owned by the current user")
+        if st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise PermissionError(f"{directory} is writable by other users")
+    return directory
+
+
+def load_authkey(directory: str) -> bytes:
+    #Ключ писателя: создаётся один раз (0600) и читается всеми процессами этого каталога
+    path = os.path.join(directory, _AUTHKEY_FILE)
+    try:
+        with open(path, "rb") as f:
+            key = f.read()
+        if key:
+            return key
+    except FileNotFoundError:
+        pass
+    # файл пишется целиком во временный и появляется под своим именем атомарно (link не перезаписывает)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".authkey-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(secrets.token_bytes(32))
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass                                # другой процесс успел первым — берём его ключ
+    finally:
+        os.unlink(tmp)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _encode(value) -> Any:
+    #Сущности (в том числе внутри аргументов операций) -> словари для JSON
+    if dataclasses.is_dataclass(value):
+        return transforms.serialize_tuple((value,))[0]
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _dumps(value) -> bytes:
+    return json.dumps(value, default=_encode, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# ---------------------- реализации ----------------------
+
+class MemoryStore:
+    def __init__(self):
+        self._snapshot = EMPTY
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> Snapshot:
+        return self._snapshot
+
+    def apply(self, op: str, **kwargs) -> Snapshot:
+        with self._lock:
+            tables = apply_mutation(self._snapshot.tables, op, kwargs)
+            self._snapshot = Snapshot(self._snapshot.version + 1, tables)
+            return self._snapshot
+
+    def close(self):
+        pass
+
+
+class SnapshotStore:
+    def __init__(self, directory: str):
+        self.directory = private_dir(directory)
+        self.snapshot_path = os.path.join(directory, "snapshot.bin")
+        self.lock_path = os.path.join(directory, "lock")
+        version_path = os.path.join(directory, "version")
+        # файл счётчика создаётся один раз и дальше только перезаписывается на месте
+        with self._locked():
+            if not os.path.exists(version_path) or os.path.getsize(version_path) != _VERSION.size:
+                with open(version_path, "wb") as f:
+                    f.write(_VERSION.pack(self._file_version()))
+        self._version_file = open(version_path, "r+b")
+        self._counter = mmap.mmap(self._version_file.fileno(), _VERSION.size)
+        self._cached = EMPTY
+        self._cache_lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return _VERSION.unpack_from(self._counter)[0]
+
+    def snapshot(self) -> Snapshot:
+        # быстрый путь: счётчик не изменился — отдаём уже разобранный снимок
+        cached = self._cached
+        if cached.version == self.version:
+            return cached
+        with self._cache_lock:
+            if self._cached.version != self.version:
+                self._cached = self._read()
+            return self._cached
+
+    def apply(self, op: str, **kwargs) -> Snapshot:
+        with self._locked():
+            current = self._read()
+            tables = apply_mutation(current.tables, op, kwargs)
+            snap = Snapshot(current.version + 1, tables)
+            self._write(snap)
+        self._cached = snap
+        return snap
+
+    def close(self):
+        self._counter.close()
+        self._version_file.close()
+
+    def _locked(self):
+        return _FileLock(self.lock_path)
+
+    def _file_version(self) -> int:
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                magic, version = _HEADER.unpack(f.read(_HEADER.size))
+        except (FileNotFoundError, struct.error):
+            return 0
+        return version if magic == _MAGIC else 0
+
+    def _read(self) -> Snapshot:
+        try:
+            f = open(self.snapshot_path, "rb")
+        except FileNotFoundError:
+            return EMPTY
+        with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, version = _HEADER.unpack_from(data)
+            if magic != _MAGIC:
+                raise ValueError(f"{self.snapshot_path} is not a timetable snapshot")
+            rows = json.loads(data[_HEADER.size:])
+        return Snapshot(version, {name: entities(TYPES[name], items) for name, items in rows.items()})
+
+    def _write(self, snap: Snapshot):
+        # новый файл целиком, затем атомарная подмена; счётчик обновляется последним
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".snapshot-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, snap.version))
+                f.write(_dumps(snap.tables))
+            os.replace(tmp, self.snapshot_path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        _VERSION.pack_into(self._counter, 0, snap.version)
+
+
+class _FileLock:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        return False
+
+
+# ---------------------- процесс-писатель ----------------------
+
+def writer_address(directory: str) -> str:
+    return os.path.join(directory, "writer.sock")
+
+
+def _send(conn, message):
+    conn.send_bytes(_dumps(message))
+
+
+def _recv(conn):
+    return json.loads(conn.recv_bytes())
+
+
+def run_writer(directory: str, address: Optional[str] = None, authkey: Optional[bytes] = None,
+               ready: Optional[Any] = None):
+    #Единственный процесс, меняющий снимок: запросы обрабатываются строго по очереди
+    store = SnapshotStore(directory)
+    address = address or writer_address(directory)
+    authkey = authkey or load_authkey(store.directory)
+    if os.path.exists(address):
+        os.unlink(address)
+    with Listener(address, family="AF_UNIX", backlog=16, authkey=authkey) as listener:
+        if ready is not None:
+            ready.set()
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                continue                        # проверка готовности (launch.py) или клиент без ключа
+            with conn:
+                try:
+                    op, kwargs = _recv(conn)
+                except (EOFError, ValueError):
+                    continue
+                if op == "shutdown":
+                    _send(conn, ("ok", store.version))
+                    break
+                try:
+                    snap = store.apply(op, **kwargs)
+                except Exception as ex:
+                    _send(conn, ("error", f"{type(ex).__name__}: {ex}"))
+                else:
+                    _send(conn, ("ok", snap.version))
+    store.close()
+
+
+class WriterStore(SnapshotStore):
+    def __init__(self, directory: str, address: Optional[str] = None, authkey: Optional[bytes] = None):
+        super().__init__(directory)
+        self.address = address or writer_address(directory)
+        self.authkey = authkey or load_authkey(self.directory)
+
+    def apply(self, op: str, **kwargs) -> Snapshot:
+        status, value = self._call(op, kwargs)
+        if status == "error":
+            raise ValueError(value)
+        snap = self.snapshot()
+        if snap.version < value:
+            raise RuntimeError(f"Snapshot version {snap.version} is behind writer version {value}")
+        return snap
+
+    def shutdown_writer(self):
+        self._call("shutdown", {})
+
+    def _call(self, op: str, kwargs: Dict[str, Any]):
+        with Client(self.address, family="AF_UNIX", authkey=self.authkey) as conn:
+            _send(conn, (op, kwargs))
+            return _recv(conn)
+
+
+def open_store(kind: Optional[str] = None, directory: Optional[str] = None):
+    #Хранилище по переменным окружения TIMETABLE_STORE и TIMETABLE_STATE_DIR;
+    #TIMETABLE_DB=<файл> включает SQLite (core/db.py)
+    if kind is None and os.environ.get("TIMETABLE_DB"):
+        kind = "sqlite"
+    kind = kind or os.environ.get("TIMETABLE_STORE", "memory")
+    if kind == "sqlite":
+        from core.db import SqliteStore  # core.db сам импортирует этот модуль
+        return SqliteStore(os.environ.get("TIMETABLE_DB") or os.path.join(directory or ".", "timetable.db"))
+    directory = directory or os.environ.get("TIMETABLE_STATE_DIR") or default_state_dir()
+    if kind == "memory":
+        return MemoryStore()
+    if kind == "snapshot":
+        return SnapshotStore(directory)
+    if kind == "writer":
+        return WriterStore(directory)
+    raise ValueError(f"Unknown TIMETABLE_STORE: {kind}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Процесс-писатель общего состояния сервера")
+    parser.add_argument("--dir", default=os.environ.get("TIMETABLE_STATE_DIR") or default_state_dir())
+    args = parser.parse_args()
+    run_writer(args.dir)
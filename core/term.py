@@ -0,0 +1,198 @@
+# core/term.py
+# Календарная модель семестра: реальные даты, чётные/нечётные недели, праздники и исключения.
+# Недельный шаблон расписания (Slot.day + Class.slot_id) разворачивается в датированные
+# занятия лениво, через генераторы; отчёты по неделям собираются инкрементально,
+# поэтому планирование выполняется один раз на шаблон, а не на каждую неделю семестра.
+from dataclasses import dataclass
+from datetime import date, timedelta
+from itertools import groupby
+from typing import Iterable, Iterator, Optional, Tuple, Dict
+
+from core.domain import Class, Slot
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+@dataclass(frozen=True)
+class Term:                             #Семестр
+    start: date                         #Первый учебный день
+    end: date                           #Последний учебный день (включительно)
+    holidays: frozenset = frozenset()   #Нерабочие даты
+
+    def __post_init__(self):
+        if self.end < self.start:
+            raise ValueError(f"Term ends before it starts: {self.start} > {self.end}")
+        if not isinstance(self.holidays, frozenset):
+            object.__setattr__(self, "holidays", frozenset(self.holidays))
+
+
+@dataclass(frozen=True)
+class Recurrence:                       #Правило повторения занятия
+    class_id: str
+    weeks: str = "all"                  #all / odd / even
+
+
+@dataclass(frozen=True)
+class Override:                         #Исключение для одной даты
+    class_id: str
+    date: date
+    kind: str                           #cancel / move
+    slot_id: Optional[str] = None       #новый слот (для move)
+    room_id: Optional[str] = None       #новая аудитория (для move)
+
+
+@dataclass(frozen=True)
+class Occurrence:                       #Конкретное занятие в конкретную дату
+    date: date
+    week: int
+    class_id: str
+    slot_id: str
+    room_id: str
+    start: str
+    end: str
+    status: str
+
+
+def term_weeks(start: date, weeks: int, holidays: Iterable[date] = ()) -> Term:
+    #Семестр из заданного числа недель, начиная с понедельника недели start
+    monday = start - timedelta(days=start.weekday())
+    return Term(monday, monday + timedelta(days=7 * weeks - 1), frozenset(holidays))
+
+
+def week_number(term: Term, d: date) -> int:
+    #Номер учебной недели (с 1); неделя начинается в понедельник
+    first_monday = term.start - timedelta(days=term.start.weekday())
+    return (d - first_monday).days // 7 + 1
+
+
+def week_parity(week: int) -> str:
+    return "odd" if week % 2 else "even"
+
+
+def iter_term_dates(term: Term) -> Iterator[date]:
+    d = term.start
+    one_day = timedelta(days=1)
+    while d <= term.end:
+        yield d
+        d += one_day
+
+
+def _weekday_index(classes: Iterable[Class], slots: Iterable[Slot]) -> Dict[int, Tuple[Tuple[Class, Slot], ...]]:
+    #Один проход: занятия шаблона, разложенные по дням недели (0 = понедельник)
+    slots_by_id = {s.id: s for s in slots}
+    by_weekday: Dict[int, list] = {}
+    for c in classes:
+        slot = slots_by_id.get(c.slot_id) if c.slot_id else None
+        if slot is None or slot.day.lower() not in WEEKDAYS:
+            continue
+        by_weekday.setdefault(WEEKDAYS.index(slot.day.lower()), []).append((c, slot))
+    return {k: tuple(v) for k, v in by_weekday.items()}
+
+
+def iter_occurrences(
+    term: Term,
+    classes: Iterable[Class],
+    slots: Iterable[Slot],
+    recurrences: Iterable[Recurrence] = (),
+    overrides: Iterable[Override] = (),
+) -> Iterator[Occurrence]:
+    #Ленивая развёртка недельного шаблона в датированные занятия, в порядке дат.
+    #Правила чётности и исключения применяются по месту; праздники и даты вне семестра
+    #пропускаются по итоговой дате, в том числе после переноса.
+    slots = tuple(slots)
+    slots_by_id = {s.id: s for s in slots}
+    by_weekday = _weekday_index(classes, slots)
+    weeks_rule = {r.class_id: r.weeks for r in recurrences}
+    exceptions = {(o.class_id, o.date): o for o in overrides}
+
+    #Перенос на слот другого дня недели меняет дату занятия внутри той же недели, поэтому
+    #занятия копятся по неделе и отдаются отсортированными по дате, когда неделя закончилась
+    pending: list = []
+    current_week = None
+    for d in iter_term_dates(term):
+        day_classes = by_weekday.get(d.weekday())
+        if not day_classes:
+            continue
+        week = week_number(term, d)
+        if week != current_week:
+            yield from sorted(pending, key=lambda o: o.date)
+            pending, current_week = [], week
+        parity = week_parity(week)
+        for c, slot in day_classes:
+            rule = weeks_rule.get(c.id, "all")
+            if rule != "all" and rule != parity:
+                continue
+            status = c.status
+            slot_id, room_id, when = c.slot_id, c.room_id, d
+            exc = exceptions.get((c.id, d))
+            if exc is not None:
+                if exc.kind == "cancel":
+                    status = "cancelled"
+                elif exc.kind == "move":
+                    slot = slots_by_id.get(exc.slot_id, slot) if exc.slot_id else slot
+                    slot_id = slot.id
+                    room_id = exc.room_id or room_id
+                    status = "moved"
+                    if slot.day.lower() in WEEKDAYS:
+                        when = d + timedelta(days=WEEKDAYS.index(slot.day.lower()) - d.weekday())
+            # праздник без переноса или перенос на праздник / за границы семестра — занятия нет
+            if when in term.holidays or not term.start <= when <= term.end:
+                continue
+            pending.append(Occurrence(when, week, c.id, slot_id, room_id, slot.start, slot.end, status))
+    yield from sorted(pending, key=lambda o: o.date)
+
+
+def iter_week_reports(occurrences: Iterable[Occurrence], term: Optional[Term] = None) -> Iterator[dict]:
+    #Инкрементальная агрегация по неделям: каждая неделя отдаётся сразу, как только
+    #её занятия закончились во входном потоке (occurrences должны идти в порядке дат).
+    #С term отдаются все недели семестра, в том числе без занятий (например, праздничные)
+    next_week = 1
+    for week, items in groupby(occurrences, key=lambda o: o.week):
+        if term is not None:
+            for empty in range(next_week, week):
+                yield _week_report(empty, (), term)
+        next_week = week + 1
+        yield _week_report(week, items, term)
+    if term is not None:
+        for empty in range(next_week, week_number(term, term.end) + 1):
+            yield _week_report(empty, (), term)
+
+
+def _week_report(week: int, items: Iterable[Occurrence], term: Optional[Term]) -> dict:
+    per_day: Dict[str, int] = {}
+    total = cancelled = moved = 0
+    for o in items:
+        total += 1
+        if o.status == "cancelled":
+            cancelled += 1
+            continue
+        if o.status == "moved":
+            moved += 1
+        day = WEEKDAYS[o.date.weekday()]
+        per_day[day] = per_day.get(day, 0) + 1
+    report = {
+        "week": week,
+        "parity": week_parity(week),
+        "occurrences": total,
+        "held": total - cancelled,
+        "cancelled": cancelled,
+        "moved": moved,
+        "per_day": per_day,
+    }
+    if term is not None:
+        first_monday = term.start - timedelta(days=term.start.weekday())
+        week_start = first_monday + timedelta(days=7 * (week - 1))
+        report["start"] = week_start
+        report["end"] = week_start + timedelta(days=6)
+        report["holidays"] = sorted(h for h in term.holidays if week_start <= h <= week_start + timedelta(days=6))
+    return report
+
+
+def aggregate_term(week_reports: Iterable[dict]) -> dict:
+    #Итоги семестра из потока недельных отчётов (без хранения всех занятий)
+    totals = {"weeks": 0, "occurrences": 0, "held": 0, "cancelled": 0, "moved": 0}
+    for rep in week_reports:
+        totals["weeks"] += 1
+        for key in ("occurrences", "held", "cancelled", "moved"):
+            totals[key] += rep[key]
+    return totals
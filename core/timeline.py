@@ -0,0 +1,203 @@
+# core/timeline.py
+# Временная модель слотов: "8:00" -> 480 (минуты от полуночи), разбор выполняется один раз.
+# Для каждого дня строится интервальный индекс (отсортированные начала + префиксный максимум
+# концов), так что запросы пересечения, смежности и окон выполняются за O(log n + k).
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from heapq import heappop, heappush
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.domain import Class, Slot
+
+
+def parse_time(value: str) -> int:
+    #"8:00" / "08:00" / "8.00" -> минуты от полуночи
+    text = str(value).strip().replace(".", ":")
+    hours, sep, minutes = text.partition(":")
+    if not sep or not hours.isdigit() or not minutes.isdigit():
+        raise ValueError(f"Invalid time: {value!r}")
+    h, m = int(hours), int(minutes)
+    if h > 24 or m > 59 or (h == 24 and m):
+        raise ValueError(f"Invalid time: {value!r}")
+    return h * 60 + m
+
+
+def format_time(minutes: int) -> str:
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+@dataclass(frozen=True, slots=True)
+class SlotTime:                     #Слот с разобранным временем
+    id: str
+    day: str                        #день недели в нижнем регистре
+    start: int                      #начало, минуты от полуночи
+    end: int                        #конец, минуты от полуночи
+
+    def overlaps(self, other: "SlotTime") -> bool:
+        return self.day == other.day and self.start < other.end and other.start < self.end
+
+
+def parse_slot(slot: Slot) -> SlotTime:
+    start, end = parse_time(slot.start), parse_time(slot.end)
+    if end <= start:
+        raise ValueError(f"Slot {slot.id} ends before it starts: {slot.start}-{slot.end}")
+    return SlotTime(slot.id, slot.day.lower(), start, end)
+
+
+class DayIndex:
+    #Интервальный индекс одного дня: слоты отсортированы по (start, end),
+    #max_end[i] — максимум концов среди первых i+1 слотов (невозрастающий при обходе назад)
+    def __init__(self, day: str, slots: Iterable[SlotTime]):
+        self.day = day
+        self.slots: Tuple[SlotTime, ...] = tuple(sorted(slots, key=lambda s: (s.start, s.end, s.id)))
+        self.starts = tuple(s.start for s in self.slots)
+        max_end, running = [], -1
+        for s in self.slots:
+            running = max(running, s.end)
+            max_end.append(running)
+        self.max_end = tuple(max_end)
+        self.position = {s.id: i for i, s in enumerate(self.slots)}
+        #самая короткая пара дня — единица измерения окон
+        self.unit = min((s.end - s.start for s in self.slots), default=0)
+
+    def overlapping(self, start: int, end: int) -> Tuple[SlotTime, ...]:
+        #Слоты, пересекающиеся с [start, end): кандидаты — начавшиеся раньше end;
+        #идём назад, пока префиксный максимум концов больше start
+        i = bisect_left(self.starts, end) - 1
+        found = []
+        while i >= 0 and self.max_end[i] > start:
+            if self.slots[i].end > start:
+                found.append(self.slots[i])
+            i -= 1
+        found.reverse()
+        return tuple(found)
+
+    def adjacent(self, start: int, end: int) -> Tuple[SlotTime, ...]:
+        #Слоты, которые заканчиваются ровно в start или начинаются ровно в end
+        before = [s for s in self.overlapping(start - 1, start) if s.end == start]
+        lo, hi = bisect_left(self.starts, end), bisect_right(self.starts, end)
+        return tuple(before) + self.slots[lo:hi]
+
+    def free_minutes_between(self, start: int, end: int) -> int:
+        #Сколько минут отрезка [start, end) не покрыто ни одним слотом дня
+        covered, cursor = 0, start
+        for s in self.overlapping(start, end):
+            lo, hi = max(s.start, cursor), min(s.end, end)
+            if hi > lo:
+                covered += hi - lo
+                cursor = hi
+        return (end - start) - covered
+
+    def windows_between(self, start: int, end: int) -> int:
+        #Число окон в свободном промежутке [start, end): слоты дня, целиком лежащие в нём,
+        #или, если сетка слотов там не задана, сколько самых коротких пар туда помещается
+        if end <= start or not self.unit:
+            return 0
+        lo = bisect_left(self.starts, start)
+        hi = bisect_left(self.starts, end)
+        inside = sum(1 for s in self.slots[lo:hi] if s.end <= end)
+        return inside or (end - start) // self.unit
+
+    def gaps(self) -> Tuple[Tuple[int, int], ...]:
+        #Промежутки между слотами дня, не покрытые ни одним слотом
+        result, cursor = [], None
+        for s in self.slots:
+            if cursor is not None and s.start > cursor:
+                result.append((cursor, s.start))
+            cursor = s.end if cursor is None else max(cursor, s.end)
+        return tuple(result)
+
+
+class SlotIndex:
+    #Индекс всех слотов: разобранное время по id и DayIndex по дням.
+    #Слоты с неразборчивым временем в индекс не попадают (как неизвестный slot_id), причина — в invalid
+    def __init__(self, slots: Iterable[Slot]):
+        parsed = []
+        self.invalid: Dict[str, str] = {}
+        for slot in slots:
+            try:
+                parsed.append(parse_slot(slot))
+            except ValueError as ex:
+                self.invalid[slot.id] = str(ex)
+        self.by_id: Dict[str, SlotTime] = {s.id: s for s in parsed}
+        by_day: Dict[str, list] = {}
+        for s in parsed:
+            by_day.setdefault(s.day, []).append(s)
+        self.days: Dict[str, DayIndex] = {d: DayIndex(d, items) for d, items in by_day.items()}
+
+    def get(self, slot_id: str) -> Optional[SlotTime]:
+        return self.by_id.get(slot_id)
+
+    def day_of(self, slot_id: str) -> Optional[str]:
+        s = self.by_id.get(slot_id)
+        return s.day if s else None
+
+    def position(self, slot_id: str) -> Optional[int]:
+        #Порядковый номер слота внутри его дня (0, 1, 2, ...), независимо от формата id
+        s = self.by_id.get(slot_id)
+        return self.days[s.day].position[s.id] if s else None
+
+    def windows(self, slot_ids: Iterable[str]) -> int:
+        #Окна между занятыми слотами одного дня (например, у одной группы)
+        occupied = sorted({s for s in map(self.by_id.get, slot_ids) if s is not None},
+                          key=lambda s: (s.start, s.end))
+        if len(occupied) < 2:
+            return 0
+        day = self.days[occupied[0].day]
+        total, busy_until = 0, occupied[0].end
+        for s in occupied[1:]:
+            if s.start > busy_until:
+                total += day.windows_between(busy_until, s.start)
+            busy_until = max(busy_until, s.end)
+        return total
+
+    def overlaps(self, slot_a: str, slot_b: str) -> bool:
+        a, b = self.by_id.get(slot_a), self.by_id.get(slot_b)
+        return a is not None and b is not None and a.overlaps(b)
+
+    def overlapping(self, slot_id: str) -> Tuple[SlotTime, ...]:
+        s = self.by_id.get(slot_id)
+        return self.days[s.day].overlapping(s.start, s.end) if s else ()
+
+    def adjacent(self, slot_id: str) -> Tuple[SlotTime, ...]:
+        s = self.by_id.get(slot_id)
+        return self.days[s.day].adjacent(s.start, s.end) if s else ()
+
+
+@lru_cache(maxsize=32)
+def _cached_index(slots: Tuple[Slot, ...]) -> SlotIndex:
+    return SlotIndex(slots)
+
+
+def slot_index(slots: Iterable[Slot]) -> SlotIndex:
+    #Индекс для набора слотов; для одного и того же кортежа слотов строится один раз
+    return _cached_index(tuple(slots))
+
+
+def find_conflicts(classes: Sequence[Class], index: SlotIndex) -> Tuple[Tuple[Class, Class], ...]:
+    #Пары (a, b), где a раньше b во входе: слоты пересекаются по времени и совпадает аудитория или
+    #преподаватель. Занятия раскладываются по (аудитория или преподаватель, день) и внутри группы
+    #проходятся по возрастанию начала; куча хранит ещё не закончившиеся занятия, поэтому сравнений
+    #O(n log n + k), где k — число найденных пар
+    by_key: Dict[Tuple[str, str, str], List[Tuple[int, int, int]]] = {}
+    for i, c in enumerate(classes):
+        s = index.get(c.slot_id)
+        if s is None:
+            continue
+        item = (s.start, s.end, i)
+        if c.room_id:
+            by_key.setdefault(("room", c.room_id, s.day), []).append(item)
+        if c.teacher_id:
+            by_key.setdefault(("teacher", c.teacher_id, s.day), []).append(item)
+    pairs = set()
+    for members in by_key.values():
+        members.sort()
+        active: List[Tuple[int, int]] = []        #(конец, номер) начатых и ещё идущих занятий
+        for start, end, i in members:
+            while active and active[0][0] <= start:
+                heappop(active)
+            for _, j in active:
+                pairs.add((j, i) if j < i else (i, j))
+            heappush(active, (end, i))
+    return tuple((classes[i], classes[j]) for i, j in sorted(pairs))
@@ -1,18 +1,35 @@
 # Чистые трансформации.
 # Авторы: Демид Метельников
 
+import copy
 import json
 from typing import Tuple, Callable
 from dataclasses import asdict
 from functools import reduce
 from core.domain import *
+from core.metrics import instrument
 
 def to_tuple(type, items):
-    return tuple(type(**it) for it in items)
+    #Приведение к кортежу сущностей: уже приведённые данные возвращаются как есть (core/domain.entities)
+    return entities(type, items)
 
+def _plain(value):
+    #frozenset (Room.features) -> отсортированный список, чтобы JSON был детерминированным;
+    #изменяемые значения (Constraint.payload) копируются, чтобы вызывающие не делили один словарь
+    if isinstance(value, frozenset):
+        return sorted(value)
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
+@instrument("serialize")
 def serialize_tuple(t):
-        return [asdict(x) for x in t]
+        if not t:
+            return []
+        names = field_names(type(t[0]))
+        return [{n: _plain(getattr(x, n)) for n in names} for x in t]
 
+@instrument("load", items=lambda r: sum(map(len, r)))
 def load_seed(path: str) -> tuple[
     tuple[Building,...], tuple[Room,...], tuple[Teacher,...],  tuple[Group,...], 
     tuple[Course,...], tuple[Slot,...],  tuple[Class,...], tuple[Constraint,...]
@@ -31,16 +48,14 @@ def load_seed(path: str) -> tuple[
     return buildings, rooms, teachers, groups, courses, slots, classes, constraints
 
 def add_class(classes: tuple[Class,...], c: Class) -> tuple[Class,...]:
-    if classes and not isinstance(classes[0], Class):
-        classes = to_tuple(Class, classes)
+    classes = entities(Class, classes)
     if not isinstance(c, Class):
         c = Class(**c)
     new_classes = classes + (c,)
     return new_classes
 
 def assign_room(classes: tuple[Class,...], class_id:str, new_room_id:str) -> tuple[Class,...]:
-    if classes and not isinstance(classes[0], Class):
-        classes = to_tuple(Class, classes)
+    classes = entities(Class, classes)
     check_room = lambda c: True if c.id == class_id else False
     no_room = lambda c: False if c.id == class_id else True
     needed_class = tuple(filter(check_room, classes))
@@ -53,8 +68,7 @@ def assign_room(classes: tuple[Class,...], class_id:str, new_room_id:str) -> tup
     return new_classes + (updated_class,)
 
 def assign_slot(classes: tuple[Class,...], class_id:str, new_slot_id:str) -> tuple[Class,...]:
-    if classes and not isinstance(classes[0], Class):
-        classes = to_tuple(Class, classes)
+    classes = entities(Class, classes)
     check_room = lambda c: True if c.id == class_id else False
     no_room = lambda c: False if c.id == class_id else True
     needed_class = tuple(filter(check_room, classes))
@@ -76,8 +90,7 @@ def map_groups(groups: tuple[Group,...], f: Callable[[Group], Group]) -> tuple[G
 def total_room_capacity(rooms: tuple[Room,...]) -> int:
     if not rooms:
         return 0
-    if not isinstance(rooms[0], Room):
-        rooms = to_tuple(Room, rooms)
+    rooms = entities(Room, rooms)
     capacities = map(lambda r: r.capacity, rooms)
     sum = reduce(lambda a, b: a + b, capacities)
-    return int(sum)
\ No newline at end of file
+    return int(sum)
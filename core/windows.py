@@ -0,0 +1,67 @@
+# core/windows.py
+# Подсчёт окон (пустых пар между занятиями) по группам и преподавателям.
+# Один проход раскладывает занятые слоты по ключам (группа, день) и (преподаватель, день),
+# затем окна каждого ключа считаются по отсортированным интервалам — итого O(n log n).
+from dataclasses import dataclass
+from typing import Dict, Iterable, Tuple
+
+from core.domain import Class, Slot
+from core.timeline import SlotIndex, slot_index
+
+
+@dataclass(frozen=True)
+class WindowsReport:
+    by_group_day: Dict[Tuple[str, str], int]       #(group_id, day) -> окна
+    by_teacher_day: Dict[Tuple[str, str], int]     #(teacher_id, day) -> окна
+
+    @property
+    def group_total(self) -> int:
+        return sum(self.by_group_day.values())
+
+    @property
+    def teacher_total(self) -> int:
+        return sum(self.by_teacher_day.values())
+
+    def by_group(self) -> Dict[str, int]:
+        return _per_entity(self.by_group_day)
+
+    def by_teacher(self) -> Dict[str, int]:
+        return _per_entity(self.by_teacher_day)
+
+
+def _per_entity(per_day: Dict[Tuple[str, str], int]) -> Dict[str, int]:
+    totals: Dict[str, int] = {}
+    for (entity, _day), n in per_day.items():
+        totals[entity] = totals.get(entity, 0) + n
+    return totals
+
+
+def compute_windows(classes: Iterable[Class], slots: Iterable[Slot]) -> WindowsReport:
+    index = slot_index(slots)
+
+    # один проход: занятые slot_id по (группа, день) и (преподаватель, день)
+    groups: Dict[Tuple[str, str], list] = {}
+    teachers: Dict[Tuple[str, str], list] = {}
+    for c in classes:
+        day = index.day_of(c.slot_id) if c.slot_id else None
+        if day is None:
+            continue
+        if c.group_id:
+            groups.setdefault((c.group_id, day), []).append(c.slot_id)
+        if c.teacher_id:
+            teachers.setdefault((c.teacher_id, day), []).append(c.slot_id)
+
+    return WindowsReport(
+        by_group_day=_count(groups, index),
+        by_teacher_day=_count(teachers, index),
+    )
+
+
+def _count(occupied: Dict[Tuple[str, str], list], index: SlotIndex) -> Dict[Tuple[str, str], int]:
+    #окна для каждого ключа; ключи без окон в отчёт не попадают
+    result = {}
+    for key, slot_ids in occupied.items():
+        n = index.windows(slot_ids)
+        if n:
+            result[key] = n
+    return result
@@ -1,5 +1,245 @@
+# launch.py
+# Запуск под надзором: сервер (uvicorn, N воркеров), при TIMETABLE_STORE=writer — процесс-писатель,
+# и интерфейс Flet. Интерфейс стартует только после того, как сервер ответил на /health, поэтому
+# первый /load_seed не уходит в ещё не поднятый порт. Упавший процесс перезапускается с
+# экспоненциальной задержкой (после стабильной работы задержка сбрасывается); подряд слишком много
+# неудачных запусков — выход с ошибкой. Закрытие интерфейса, Ctrl+C или SIGTERM останавливают всё:
+# сервер получает SIGTERM и досчитывает идущие задачи планирования (TIMETABLE_DRAIN_SECONDS).
+#
+# Запуск:
+#   python launch.py                          # сервер + интерфейс, один воркер
+#   python launch.py --workers 4 --port 8080  # несколько воркеров: общее состояние в снимке,
+#                                             # фоновых задач нет (только /schedule_search)
+#   python launch.py --headless               # только сервер (например, за балансировщиком)
+import argparse
+import json
+import os
+import signal
+import socket
 import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
 
-server_process = subprocess.Popen(["python", "server.py"])
-subprocess.run(["python", "main.py"])
-server_process.terminate()
\ No newline at end of file
+from core.store import default_state_dir
+
+READY, EXITED, TIMEOUT = "ready", "exited", "timeout"
+
+
+@dataclass
+class Backoff:
+    initial: float = 0.5
+    maximum: float = 30.0
+    factor: float = 2.0
+    reset_after: float = 60.0               #процесс, проработавший дольше, считается стабильным
+    failures: int = 0                       #неудачных запусков подряд
+
+    def next_delay(self, uptime: float) -> float:
+        #Задержка перед перезапуском процесса, проработавшего uptime секунд
+        if uptime >= self.reset_after:
+            self.failures = 0
+        delay = min(self.maximum, self.initial * self.factor ** self.failures)
+        self.failures += 1
+        return delay
+
+
+def http_ready(url: str, timeout: float = 1.0) -> bool:
+    #Сервер принимает соединения и не останавливается
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status == 200 and json.load(response).get("status") == "ok"
+    except (OSError, ValueError):
+        return False
+
+
+def unix_socket_ready(address: str, timeout: float = 0.5) -> bool:
+    #Процесс-писатель принимает соединения; файл сокета, оставшийся от упавшего писателя, проверку не проходит
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(address)
+    except OSError:
+        return False
+    return True
+
+
+def port_in_use(host: str, port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(0.5)
+        return sock.connect_ex((host, port)) == 0
+
+
+class Child:
+    #Один управляемый процесс: запуск, ожидание готовности, мягкая остановка
+    def __init__(self, name: str, argv: Sequence[str], env: Optional[Dict[str, str]] = None,
+                 ready: Optional[Callable[[], bool]] = None, stop_timeout: float = 10.0,
+                 spawn: Callable[..., subprocess.Popen] = subprocess.Popen,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.name = name
+        self.argv = list(argv)
+        self.env = env
+        self.ready = ready
+        self.stop_timeout = stop_timeout
+        self.backoff = Backoff()
+        self.process: Optional[subprocess.Popen] = None
+        self.started = 0.0
+        self._spawn, self._clock, self._sleep = spawn, clock, sleep
+
+    def start(self):
+        self.process = self._spawn(self.argv, env=self.env)
+        self.started = self._clock()
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    @property
+    def uptime(self) -> float:
+        return self._clock() - self.started
+
+    def wait_ready(self, timeout: float, interval: float = 0.1) -> str:
+        #READY — проверка прошла; EXITED — процесс завершился раньше; TIMEOUT — не дождались
+        deadline = self._clock() + timeout
+        while True:
+            if not self.alive():
+                return EXITED
+            if self.ready is None or self.ready():
+                return READY
+            if self._clock() >= deadline:
+                return TIMEOUT
+            self._sleep(interval)
+
+    def stop(self):
+        #SIGTERM, а если процесс не успел завершиться за stop_timeout — SIGKILL
+        if not self.alive():
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(self.stop_timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class Supervisor:
+    #services запускаются по порядку, каждый — после готовности предыдущего; ui — последним.
+    #Завершение ui означает, что пользователь закрыл приложение
+    def __init__(self, services: List[Child], ui: Optional[Child] = None, ready_timeout: float = 30.0,
+                 max_failures: int = 5, poll: float = 0.5, log: Callable[[str], None] = print,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.services = services
+        self.ui = ui
+        self.ready_timeout = ready_timeout
+        self.max_failures = max_failures
+        self.poll = poll
+        self.log = log
+        self.stopping = False
+        self._sleep = sleep
+
+    def request_stop(self, *_):
+        self.stopping = True
+
+    def run(self) -> int:
+        try:
+            for child in self.services:
+                if not self._bring_up(child):
+                    return 1
+            if self.ui is not None and not self.stopping:
+                self.ui.start()
+            while not self.stopping:
+                if self.ui is not None and not self.ui.alive():
+                    self.log(f"{self.ui.name} exited, shutting down")
+                    return 0
+                for child in self.services:
+                    if not child.alive() and not self.stopping:
+                        self.log(f"{child.name} exited with code {child.process.returncode}, restarting")
+                        if not self._bring_up(child, restart=True):
+                            return 1
+                self._sleep(self.poll)
+            return 0
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        # в обратном порядке: интерфейс, затем сервер (досчитывает задачи), затем писатель
+        for child in reversed(([self.ui] if self.ui is not None else []) + self.services):
+            child.stop()
+
+    def _bring_up(self, child: Child, restart: bool = False) -> bool:
+        #Запуск с повторами, пока проверка готовности не пройдёт; False — попытки исчерпаны
+        while not self.stopping:
+            if restart:
+                delay = child.backoff.next_delay(child.uptime)
+                if child.backoff.failures > self.max_failures:
+                    self.log(f"{child.name} failed {self.max_failures} times in a row, giving up")
+                    return False
+                self._sleep(delay)
+                if self.stopping:
+                    break
+            child.start()
+            outcome = child.wait_ready(self.ready_timeout)
+            if outcome == READY:
+                self.log(f"{child.name} is ready (pid {child.process.pid})")
+                return True
+            self.log(f"{child.name} did not become ready: {outcome}")
+            child.stop()
+            restart = True
+        return True
+
+
+def build(args, environ: Optional[Dict[str, str]] = None) -> Supervisor:
+    env = dict(os.environ if environ is None else environ)
+    # у каждого воркера своя память: общее состояние нужно хранить вне процесса
+    if args.workers > 1 and env.get("TIMETABLE_STORE", "memory") == "memory" and not env.get("TIMETABLE_DB"):
+        env["TIMETABLE_STORE"] = "snapshot"
+    # число воркеров нужно и самому серверу: фоновые задачи (/schedule_jobs) работают только с одним
+    env["TIMETABLE_WORKERS"] = str(args.workers)
+    drain = float(env.get("TIMETABLE_DRAIN_SECONDS", "30"))
+    base_url = f"http://{args.host}:{args.port}"
+
+    services = []
+    if env.get("TIMETABLE_STORE") == "writer":
+        state_dir = env.get("TIMETABLE_STATE_DIR") or default_state_dir()
+        env["TIMETABLE_STATE_DIR"] = state_dir
+        address = os.path.join(state_dir, "writer.sock")
+        services.append(Child("writer", [sys.executable, "-m", "core.store", "--dir", state_dir], env,
+                              ready=lambda: unix_socket_ready(address)))
+    # SIGTERM: сервер сразу начинает досчитывать задачи (до drain секунд) и параллельно ждёт закрытия
+    # соединений (--timeout-graceful-shutdown, тоже drain); SIGKILL — только если обе стадии вышли за срок
+    services.append(Child(
+        "server",
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", args.host, "--port", str(args.port),
+         "--workers", str(args.workers), "--timeout-graceful-shutdown", str(int(drain))],
+        env, ready=lambda: http_ready(f"{base_url}/health"), stop_timeout=2 * drain + 5,
+    ))
+    ui = None
+    if not args.headless:
+        ui = Child("ui", [sys.executable, "main.py"], {**env, "TIMETABLE_BACKEND_URL": base_url})
+    return Supervisor(services, ui, ready_timeout=args.ready_timeout, max_failures=args.max_failures)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Запуск сервера и интерфейса под надзором")
+    parser.add_argument("--host", default=os.environ.get("TIMETABLE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("TIMETABLE_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("TIMETABLE_WORKERS", "1")))
+    parser.add_argument("--headless", action="store_true", help="только сервер, без интерфейса")
+    parser.add_argument("--ready-timeout", type=float, default=30.0, help="ожидание /health, секунды")
+    parser.add_argument("--max-failures", type=int, default=5, help="неудачных запусков подряд до выхода")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be positive")
+    if port_in_use(args.host, args.port):
+        print(f"{args.host}:{args.port} is already in use", file=sys.stderr)
+        return 1
+
+    supervisor = build(args)
+    signal.signal(signal.SIGINT, supervisor.request_stop)
+    signal.signal(signal.SIGTERM, supervisor.request_stop)
+    return supervisor.run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# paged_table.py
+# Постраничная таблица занятий для вкладки Overview.
+# Строки запрашиваются страницами через fetch (обычно GET /classes на сервере), в памяти
+# таблицы — только текущая страница. Элементы DataRow переиспользуются между обновлениями: если строка с тем же id и теми же
+# значениями уже была показана, отдаётся тот же объект, поэтому Flet отправляет в браузер только
+# изменившиеся строки, а update() вызывается у таблицы, а не у всей страницы.
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import flet as ft
+
+ALL = "(все)"
+
+# fetch(params) -> {"total": ..., "offset": ..., "limit": ..., "items": [...]}
+Fetch = Callable[[Dict[str, Any]], Awaitable[dict]]
+
+
+def row_values(item: dict) -> Tuple[str, ...]:
+    slot_text = f"{item['day']} {item['start']}-{item['end']}" if item.get("day") else ""
+    return (
+        item["id"],
+        item.get("course_title") or item.get("course_id", ""),
+        item.get("group_name", ""),
+        item.get("teacher_name", ""),
+        slot_text,
+        item.get("room_name", ""),
+        item.get("building_name", ""),
+    )
+
+
+def reuse_rows(previous: Dict[str, Tuple[Tuple[str, ...], Any]], items, make_row: Callable[[Tuple[str, ...]], Any]):
+    # собираем строки страницы, переиспользуя неизменившиеся; возвращает (строки, новый кеш)
+    rows, kept = [], {}
+    for item in items:
+        values = row_values(item)
+        cached = previous.get(item["id"])
+        row = cached[1] if cached is not None and cached[0] == values else make_row(values)
+        kept[item["id"]] = (values, row)
+        rows.append(row)
+    return rows, kept
+
+
+class PagedClassesTable:
+    def __init__(self, fetch: Fetch, page_size: int = 50, on_error: Optional[Callable[[Exception], None]] = None):
+        self.fetch = fetch
+        self.page_size = page_size
+        self.on_error = on_error
+        self.offset = 0
+        self.total = 0
+        self.filters: Dict[str, str] = {}
+        self.items: list = []                   # строки текущей страницы (как их вернул сервер)
+        # номер последнего запроса: ответ на более ранний запрос (фильтры успели смениться) отбрасывается
+        self._seq = 0
+        # id занятия -> (значения ячеек, DataRow) для строк, показанных в последний раз
+        self._rows: Dict[str, Tuple[Tuple[str, ...], ft.DataRow]] = {}
+
+        self.table = ft.DataTable(
+            columns=[
+                ft.DataColumn(ft.Text("ID")),
+                ft.DataColumn(ft.Text("Дисциплина")),
+                ft.DataColumn(ft.Text("Группа")),
+                ft.DataColumn(ft.Text("Преподаватель")),
+                ft.DataColumn(ft.Text("День / Время")),
+                ft.DataColumn(ft.Text("Аудитория")),
+                ft.DataColumn(ft.Text("Корпус")),
+            ],
+            rows=[],
+            border=ft.border.all(1, ft.Colors.BLACK12),
+            heading_row_color="#358FC1",
+            heading_text_style=ft.TextStyle(weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE),
+            expand=True,
+        )
+        self.page_label = ft.Text("", color=ft.Colors.BLACK87)
+        self.prev_button = ft.IconButton(icon=ft.Icons.CHEVRON_LEFT, on_click=self._prev)
+        self.next_button = ft.IconButton(icon=ft.Icons.CHEVRON_RIGHT, on_click=self._next)
+        self.pager = ft.Row([self.prev_button, self.page_label, self.next_button])
+        self.control = ft.Column([self.pager, self.table])
+
+    async def set_filters(self, **filters):
+        # новые фильтры — возврат на первую страницу
+        self.filters = {k: v for k, v in filters.items() if v and v != ALL}
+        self.offset = 0
+        await self.refresh()
+
+    async def refresh(self, send: bool = True):
+        self._seq += 1
+        seq = self._seq
+        try:
+            result = await self.fetch({**self.filters, "offset": self.offset, "limit": self.page_size})
+        except Exception as ex:
+            if seq == self._seq and self.on_error:
+                self.on_error(ex)
+            return
+        if seq != self._seq:
+            return                              # устаревший ответ: уже запрошена другая страница/фильтр
+        self.total = result["total"]
+        if self.offset and self.offset >= self.total:
+            # после изменения данных текущая страница могла опустеть — показываем последнюю
+            self.offset = max(0, (self.total - 1) // self.page_size * self.page_size)
+            await self.refresh(send)
+            return
+        self._apply(result["items"])
+        if send and self.table.page is not None:
+            self.table.update()
+            self.pager.update()
+
+    def _apply(self, items):
+        self.items = list(items)
+        rows, self._rows = reuse_rows(self._rows, items, self._make_row)
+        self.table.rows = rows
+
+        pages = max(1, -(-self.total // self.page_size))
+        current = self.offset // self.page_size + 1
+        self.page_label.value = f"Страница {current} из {pages} (занятий: {self.total})"
+        self.prev_button.disabled = self.offset == 0
+        self.next_button.disabled = self.offset + self.page_size >= self.total
+
+    @staticmethod
+    def _make_row(values: Tuple[str, ...]) -> ft.DataRow:
+        return ft.DataRow(cells=[ft.DataCell(ft.Text(v, color=ft.Colors.BLACK87)) for v in values])
+
+    async def _prev(self, e):
+        if self.offset > 0:
+            self.offset = max(0, self.offset - self.page_size)
+            await self.refresh()
+
+    async def _next(self, e):
+        if self.offset + self.page_size < self.total:
+            self.offset += self.page_size
+            await self.refresh()
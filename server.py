@@ -1,8 +1,29 @@
-from fastapi import FastAPI
+import asyncio
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import date
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from core import transforms
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+import core
+from core import transforms, metrics, encoding, query, store as stores
+from core.broadcast import Broadcaster, Change, topics_for
+from core.jobs import Job, JobManager
 from dataclasses import asdict
-from typing import Dict, Tuple
+from pydantic import BaseModel, Field
+from typing import List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # необязательная зависимость: без неё остаётся gzip
+    brotli = None
 
 app = FastAPI(title="Планировщик расписания")
 
@@ -12,56 +33,613 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# gzip для всех ответов крупнее 1 КБ; ответы, уже сжатые brotli, middleware пропускает
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=6)
 
 
-state: Dict[str, Tuple] = {}
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    # Задержка обработки каждого HTTP-запроса по пути (без учёта /metrics)
+    if not metrics.is_enabled() or request.url.path == "/metrics":
+        return await call_next(request)
+    start = time.perf_counter()
+    response = await call_next(request)
+    # шаблон маршрута вместо фактического пути, чтобы не плодить метки
+    route = request.scope.get("route")
+    path = getattr(route, "path", "<unmatched>")
+    metrics.REGISTRY.histogram(f"http {request.method} {path}").observe(time.perf_counter() - start)
+    return response
 
 
-@app.post("/load_seed")
-async def load_seed():
-    buildings, rooms, teachers, groups, courses, slots, classes, constraints = (
-        transforms.load_seed("./data/seed.json")
-    )
+# Профилирование по заголовку X-Profile: 1 — только если сервер запущен с TIMETABLE_PROFILING=1.
+# cProfile видит весь поток цикла событий: запросы, выполнявшиеся одновременно с профилируемым,
+# тоже попадают в отчёт — их число указывается в поле concurrent_requests. Работа в потоках
+# (to_thread ниже) профилируется отдельно и добавляется в тот же отчёт
+PROFILING_ENABLED = os.environ.get("TIMETABLE_PROFILING", "0") == "1"
+PROFILE_TOP_MAX = 200
+profiles: deque = deque(maxlen=50)
+_traffic = {"in_flight": 0, "started": 0}
+
+
+def profile_top(value: Optional[str], default: int = 20) -> int:
+    #Число строк отчёта из заголовка X-Profile-Top: мусор — значение по умолчанию, иначе 1..PROFILE_TOP_MAX
+    try:
+        top = int(value) if value is not None else default
+    except ValueError:
+        return default
+    return max(1, min(top, PROFILE_TOP_MAX))
+
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    if not PROFILING_ENABLED:
+        return await call_next(request)
+    _traffic["in_flight"] += 1
+    _traffic["started"] += 1
+    try:
+        if request.headers.get("x-profile") != "1":
+            return await call_next(request)
+        others, started = _traffic["in_flight"] - 1, _traffic["started"]
+        with core.profiling.Profiler(top=profile_top(request.headers.get("x-profile-top"))) as profiler:
+            response = await call_next(request)
+        if profiler.report is None:
+            response.headers["X-Profile-Skipped"] = "busy"
+            return response
+        profile_id = uuid.uuid4().hex[:12]
+        profiles.append({"id": profile_id, "method": request.method, "path": request.url.path,
+                         "concurrent_requests": others + _traffic["started"] - started,
+                         **profiler.report.to_dict()})
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+    finally:
+        _traffic["in_flight"] -= 1
+
+
+async def to_thread(func, *args, **kwargs):
+    # asyncio.to_thread; при профилировании работа потока-исполнителя тоже попадает в отчёт запроса
+    if PROFILING_ENABLED:
+        func = core.profiling.in_thread(func)
+    return await asyncio.to_thread(func, *args, **kwargs)
+
+
+# Состояние — снимки из хранилища (см. core/store.py): с TIMETABLE_STORE=snapshot или writer
+# все воркеры uvicorn видят одни и те же данные
+store = stores.open_store()
+
+
+async def current_state() -> stores.Snapshot:
+    # снимок из файла или SQLite читается в потоке, чтобы не останавливать цикл событий;
+    # MemoryStore отдаёт его сразу
+    if isinstance(store, stores.MemoryStore):
+        return store.snapshot()
+    return await to_thread(store.snapshot)
+
 
-    state["buildings"] = buildings
-    state["rooms"] = rooms
-    state["teachers"] = teachers
-    state["groups"] = groups
-    state["courses"] = courses
-    state["slots"] = slots
-    state["classes"] = classes
-    state["constraints"] = constraints
+async def apply_change(op: str, **kwargs) -> stores.Snapshot:
+    # запись (файл, SQLite или запрос к процессу-писателю) — тоже в потоке
+    return await to_thread(store.apply, op, **kwargs)
 
+
+async def store_status() -> Tuple[int, bool]:
+    # (версия, данные загружены) без чтения таблиц: для SQLite — одна строка meta
+    if is_sqlite(store):
+        version = await to_thread(lambda: store.version)
+        return version, version > 0
+    state = await current_state()
+    return state.version, "classes" in state
+
+
+def is_sqlite(store) -> bool:
+    # core.db загружается только вместе с SqliteStore: если модуль не загружен, хранилище не SQLite
+    db = sys.modules.get("core.db")
+    return db is not None and isinstance(store, db.SqliteStore)
+
+
+@app.post("/load_seed")
+async def load_seed(request: Request, include_data: bool = False, tables: Optional[str] = None):
+    await apply_change("load_seed", path="./data/seed.json")
+
+    # include_data=true: загрузка и выдача данных за один запрос (один RTT вместо двух)
+    if include_data:
+        return await get_data(request, tables)
     return {
         "status": "ok"
     }
 
 
 @app.get("/data")
-async def get_data():
-    def serialize_tuple(t):
-        return [asdict(x) for x in t]
+async def get_data(request: Request, tables: Optional[str] = None):
+    # tables=rooms,slots,... — только перечисленные таблицы (клиент не загружает все занятия)
+    names = stores.TABLES if not tables else tuple(dict.fromkeys(t.strip() for t in tables.split(",") if t.strip()))
+    unknown = sorted(set(names) - set(stores.TABLES))
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"unknown tables: {unknown}")
+    state = await current_state()
+    if "classes" not in state:
+        raise HTTPException(status_code=409, detail="data not loaded")
+    tables = {name: transforms.serialize_tuple(state[name]) for name in names}
+    # компактное представление (колоночный JSON или MessagePack) — по заголовку Accept
+    media_type = encoding.negotiate(request.headers.get("accept"))
+    if media_type == encoding.JSON:
+        return tables
+    return encoded_response(encoding.encode(tables, media_type), media_type, request)
 
-    return {
-        "buildings": serialize_tuple(state["buildings"]),
-        "rooms": serialize_tuple(state["rooms"]),
-        "teachers": serialize_tuple(state["teachers"]),
-        "groups": serialize_tuple(state["groups"]),
-        "courses": serialize_tuple(state["courses"]),
-        "slots": serialize_tuple(state["slots"]),
-        "classes": serialize_tuple(state["classes"]),
-        "constraints": serialize_tuple(state["constraints"]),
-    }
+
+def encoded_response(body: bytes, media_type: str, request: Request) -> Response:
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if brotli is not None and "br" in request.headers.get("accept-encoding", "") and len(body) >= 1000:
+        body = brotli.compress(body, quality=5)
+        headers["Content-Encoding"] = "br"
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+@app.get("/classes")
+async def get_classes(offset: int = 0, limit: int = 50, day: Optional[str] = None,
+                      teacher_id: Optional[str] = None, group_id: Optional[str] = None,
+                      building_id: Optional[str] = None):
+    # Страница занятий с фильтрами и человекочитаемыми полями — клиент не хранит все строки
+    if is_sqlite(store):
+        # фильтры, подсчёт и LIMIT/OFFSET выполняются в SQLite, все занятия не читаются
+        if not await to_thread(store.is_loaded):
+            raise HTTPException(status_code=409, detail="data not loaded")
+        try:
+            return await to_thread(store.query_page, offset=offset, limit=limit, day=day, teacher_id=teacher_id,
+                                    group_id=group_id, building_id=building_id)
+        except ValueError as ex:
+            raise HTTPException(status_code=422, detail=str(ex))
+    state = await current_state()
+    if "classes" not in state:
+        raise HTTPException(status_code=409, detail="data not loaded")
+    try:
+        return query.query_page(
+            state["classes"], state["slots"], state["rooms"], state["teachers"],
+            state["groups"], state["courses"], state["buildings"], offset=offset, limit=limit,
+            day=day, teacher_id=teacher_id, group_id=group_id, building_id=building_id,
+        )
+    except ValueError as ex:
+        raise HTTPException(status_code=422, detail=str(ex))
+
+
+@app.get("/classes/ids")
+async def get_class_ids():
+    # Только id всех занятий — для списков выбора, без страниц и человекочитаемых полей
+    if is_sqlite(store):
+        if not await to_thread(store.is_loaded):
+            raise HTTPException(status_code=409, detail="data not loaded")
+        return await to_thread(store.class_ids)
+    state = await current_state()
+    if "classes" not in state:
+        raise HTTPException(status_code=409, detail="data not loaded")
+    return [c.id for c in state["classes"]]
+
+
+@app.get("/conflicts")
+async def get_conflicts():
+    # Пары конфликтующих занятий (пересечение слотов и общая аудитория или преподаватель)
+    if is_sqlite(store):
+        pairs = await to_thread(store.conflicts)
+    else:
+        state = await current_state()
+        if "classes" not in state:
+            raise HTTPException(status_code=409, detail="data not loaded")
+        index = core.timeline.SlotIndex(state["slots"])
+        pairs = [(a.id, b.id) for a, b in core.timeline.find_conflicts(state["classes"], index)]
+    return {"total": len(pairs), "conflicts": [list(p) for p in pairs]}
+
+
+@app.get("/conflict_graph")
+async def get_conflict_graph(top: int = Query(5, ge=1, le=100)):
+    # Граф конфликтов (общий преподаватель/группа): степени и клики для планирования слотов
+    state = await current_state()
+    if "classes" not in state:
+        raise HTTPException(status_code=409, detail="data not loaded")
+    return core.conflict_graph.ConflictGraph(state["classes"]).stats(top)
+
+
+@app.get("/free_slots")
+async def get_free_slots(room_id: str, day: Optional[str] = None):
+    # Слоты, в которые аудитория свободна
+    if is_sqlite(store):
+        return {"room_id": room_id, "slots": await to_thread(store.free_slots, room_id, day)}
+    state = await current_state()
+    if "classes" not in state:
+        raise HTTPException(status_code=409, detail="data not loaded")
+    slots = query.free_slots(state["classes"], state["slots"], room_id, day)
+    return {"room_id": room_id, "slots": transforms.serialize_tuple(slots)}
+
+
+@app.get("/score")
+async def get_score():
+    # Штраф расписания по мягким ограничениям из таблицы constraints
+    state = await current_state()
+    if "classes" not in state:
+        raise HTTPException(status_code=409, detail="data not loaded")
+    try:
+        return core.constraints.score(state["constraints"], state["classes"], state["slots"], state["rooms"])
+    except (ValueError, TypeError, KeyError) as ex:
+        # неверный payload ограничения (не то значение, тип или нет нужного поля) — ошибка данных, а не сервера
+        raise HTTPException(status_code=422, detail=str(ex))
 
 
 @app.post("/total_room_capacity")
 async def get_capacity():
+    state = await current_state()
     result = transforms.total_room_capacity(state["rooms"])
     return {
         "total_capacity": result
     }
 
 
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+    "ics": "text/calendar; charset=utf-8",
+}
+
+
+@app.get("/export/{fmt}")
+async def export_timetable(fmt: str, teacher_id: Optional[str] = None, group_id: Optional[str] = None,
+                           start: Optional[date] = None, weeks: int = Query(16, ge=1, le=104)):
+    # Потоковая выгрузка: строки формируются генератором по мере отправки
+    state = await current_state()
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail=f"unknown export format {fmt!r}")
+    if "classes" not in state:
+        raise HTTPException(status_code=409, detail="data not loaded")
+    if fmt == "ics":
+        # время слотов разбирается только для iCalendar; ошибки — до начала потока, а не посреди файла
+        invalid = core.export.invalid_slots(state["classes"], state["slots"], teacher_id, group_id)
+        if invalid:
+            raise HTTPException(status_code=422, detail={"invalid_slots": invalid})
+    rows = core.export.iter_rows(
+        state["classes"], state["slots"], state["rooms"], state["teachers"],
+        state["groups"], state["courses"], state["buildings"],
+        teacher_id=teacher_id, group_id=group_id,
+    )
+    if fmt == "ndjson":
+        lines = core.export.iter_ndjson(rows)
+    elif fmt == "csv":
+        lines = core.export.iter_csv(rows)
+    else:
+        lines = core.export.iter_ical(rows, core.term.term_weeks(start or date.today(), weeks))
+    suffix = "-".join(x for x in ("timetable", teacher_id, group_id) if x)
+    return StreamingResponse(
+        core.export.chunked(lines),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": core.export.content_disposition(f"{suffix}.{fmt}")},
+    )
+
+
+# Фоновое планирование: расчёт по дням в пуле процессов, обработчики запросов не блокируются
+jobs = JobManager()
+# задачи хранятся в памяти воркера: при --workers N запрос о задаче попал бы в другой процесс и получил
+# 404, поэтому /schedule_jobs работает только с одним воркером. launch.py задаёт TIMETABLE_WORKERS
+# по --workers; при запуске uvicorn с несколькими воркерами напрямую переменную нужно задать самому
+SERVER_WORKERS = int(os.environ.get("TIMETABLE_WORKERS", "1"))
+# при остановке (SIGTERM от launch.py) идущие задачи досчитываются, но не дольше
+# TIMETABLE_DRAIN_SECONDS; остальные отменяются вместе с пулом. Отсчёт начинается сразу по сигналу:
+# пока uvicorn ждёт закрытия открытых соединений, задачи уже досчитываются, новые отклоняются, а
+# /health отвечает 503 — иначе всё это случилось бы только после закрытия соединений
+DRAIN_SECONDS = float(os.environ.get("TIMETABLE_DRAIN_SECONDS", "30"))
+_drain = {"task": None}
+
+
+def start_drain():
+    if _drain["task"] is None:
+        jobs.draining = True
+        _drain["task"] = asyncio.ensure_future(jobs.drain(DRAIN_SECONDS))
+
+
+def drain_on_signals():
+    # uvicorn ставит свои обработчики SIGTERM/SIGINT до запуска приложения: наш начинает остановку
+    # задач и передаёт сигнал дальше. Сигналы доступны только в главном потоке (не под TestClient)
+    if threading.current_thread() is not threading.main_thread():
+        return
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            loop.call_soon_threadsafe(start_drain)
+            previous(signum, frame)
+
+        signal.signal(sig, handler)
+
+
+async def drain_jobs():
+    start_drain()
+    await _drain["task"]
+    jobs.shutdown()
+
+
+app.router.on_startup.append(drain_on_signals)
+app.router.on_shutdown.append(drain_jobs)
+
+
+@app.get("/health")
+async def health(response: Response):
+    # проверка готовности для launch.py и балансировщика: 503, пока воркер останавливается
+    version, loaded = await store_status()
+    if jobs.draining:
+        response.status_code = 503
+    return {
+        "status": "draining" if jobs.draining else "ok",
+        "pid": os.getpid(),
+        "data_version": version,
+        "data_loaded": loaded,
+        "active_jobs": jobs.active,
+    }
+
+
+class ScheduleJobRequest(BaseModel):
+    days: List[str] = ["monday", "tuesday", "wednesday", "thursday", "friday"]
+
+
+def require_single_worker():
+    if SERVER_WORKERS > 1:
+        raise HTTPException(status_code=501,
+                            detail="background jobs need a single server worker; use /schedule_search")
+
+
+def get_job(job_id: str) -> Job:
+    require_single_worker()
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+
+@app.post("/schedule_jobs", status_code=202)
+async def create_schedule_job(body: ScheduleJobRequest):
+    require_single_worker()
+    state = await current_state()
+    if "classes" not in state:
+        raise HTTPException(status_code=409, detail="data not loaded")
+    try:
+        job = jobs.submit(body.days, state.version, state["classes"], state["rooms"], state["slots"], state["groups"])
+    except ValueError as ex:
+        raise HTTPException(status_code=422, detail=str(ex))
+    except RuntimeError as ex:
+        raise HTTPException(status_code=503, detail=str(ex))
+    return job.to_dict()
+
+
+@app.get("/schedule_jobs/{job_id}")
+async def get_schedule_job(job_id: str):
+    return get_job(job_id).to_dict()
+
+
+@app.get("/schedule_jobs/{job_id}/result")
+async def get_schedule_job_result(job_id: str):
+    job = get_job(job_id)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"job is {job.status}")
+    return {
+        "days": [{**day, "classes": transforms.serialize_tuple(day["classes"])} for day in job.result["days"]],
+        "aggregated": job.result["aggregated"],
+    }
+
+
+@app.get("/schedule_jobs/{job_id}/events")
+async def stream_schedule_job(job_id: str):
+    # Server-Sent Events: состояние задачи при каждом изменении прогресса, последнее — итоговое
+    get_job(job_id)
+
+    async def events():
+        async for snapshot in jobs.watch(job_id):
+            yield f"event: {snapshot['status']}\ndata: {json.dumps(snapshot)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.delete("/schedule_jobs/{job_id}")
+async def cancel_schedule_job(job_id: str):
+    job = jobs.cancel(get_job(job_id).id)
+    if job.task is not None:
+        # отмена асинхронна — даём задаче дойти до статуса cancelled
+        await asyncio.wait({job.task}, timeout=1.0)
+    return job.to_dict()
+
+
+# одна попытка занимает процесс пула на все дни, поэтому число попыток и бюджет ограничены
+SEARCH_MAX_ATTEMPTS = 64
+SEARCH_MAX_BUDGET = 300.0
+
+
+class ScheduleSearchRequest(ScheduleJobRequest):
+    attempts: int = Field(8, ge=1, le=SEARCH_MAX_ATTEMPTS)
+    seed: int = 0
+    budget: Optional[float] = Field(None, gt=0, le=SEARCH_MAX_BUDGET)  #секунды; по истечении берётся лучшая из завершённых попыток
+    apply: bool = False                     #записать лучший вариант в хранилище
+
+
+@app.post("/schedule_search")
+async def schedule_search(body: ScheduleSearchRequest):
+    # Многостартовый поиск в том же пуле процессов, что и фоновые задачи; ожидание — в отдельном потоке
+    if jobs.draining:
+        raise HTTPException(status_code=503, detail="server is shutting down")
+    state = await current_state()
+    if "classes" not in state:
+        raise HTTPException(status_code=409, detail="data not loaded")
+    try:
+        result = await to_thread(
+            core.search.multi_start, body.days, state["classes"], state["rooms"], state["slots"], state["groups"],
+            attempts=body.attempts, seed=body.seed, budget=body.budget, executor=jobs.executor,
+        )
+    except ValueError as ex:
+        raise HTTPException(status_code=422, detail=str(ex))
+    except TimeoutError as ex:
+        raise HTTPException(status_code=504, detail=str(ex))
+    except RuntimeError as ex:
+        # BrokenProcessPool (упал процесс пула) или пул уже остановлен
+        raise HTTPException(status_code=503, detail=str(ex) or type(ex).__name__)
+    version = state.version
+    if body.apply:
+        # записываются только занятия, которые поиск изменил: правки остальных, сделанные за время поиска, сохраняются
+        before = {c.id: c for c in state["classes"]}
+        changed = [c for c in result.best.classes if before.get(c.id) != c]
+        try:
+            version = (await apply_change("update_classes", classes=changed)).version
+        except ValueError as ex:
+            raise HTTPException(status_code=409, detail=str(ex))
+    return {**result.to_dict(), "version": version}
+
+
+# Живые изменения: события frp применяются к хранилищу и рассылаются подписчикам по темам
+broadcaster = Broadcaster(window=float(os.environ.get("TIMETABLE_COALESCE_MS", "50")) / 1000)
+
+
+class EventRequest(BaseModel):
+    name: str
+    payload: dict
+
+
+@app.post("/events")
+async def post_event(body: EventRequest):
+    _, loaded = await store_status()
+    if not loaded:
+        raise HTTPException(status_code=409, detail="data not loaded")
+    if is_sqlite(store):
+        # только занятие и аудитории из события, а не все таблицы
+        classes, rooms = await to_thread(store.event_rows, body.payload)
+    else:
+        state = await current_state()
+        classes, rooms = state["classes"], state["rooms"]
+    class_id = body.payload.get("class_id")
+    if class_id is not None and not any(c.id == class_id for c in classes):
+        raise HTTPException(status_code=404, detail=f"class {class_id!r} not found")
+    topics = topics_for(body.name, body.payload, classes, rooms)
+    try:
+        snap = await apply_change("event", name=body.name, payload=body.payload)
+    except (ValueError, KeyError, TypeError) as ex:
+        raise HTTPException(status_code=422, detail=str(ex))
+    broadcaster.publish(Change(body.name, body.payload, snap.version, topics))
+    return {"version": snap.version}
+
+
+class RepairRequest(BaseModel):
+    kind: str                               #room_closed | teacher_absent | class_moved
+    room_id: Optional[str] = None
+    teacher_id: Optional[str] = None
+    class_id: Optional[str] = None
+    slot_id: Optional[str] = None
+    slot_ids: Optional[List[str]] = None
+    day: Optional[str] = None
+
+
+def _repair_change(body: RepairRequest) -> "core.repair.Change":
+    slot_ids = frozenset(body.slot_ids) if body.slot_ids is not None else None
+    if body.kind == "room_closed" and body.room_id:
+        return core.repair.RoomClosed(body.room_id, slot_ids)
+    if body.kind == "teacher_absent" and body.teacher_id and (slot_ids is not None or body.day):
+        return core.repair.TeacherAbsent(body.teacher_id, slot_ids, body.day)
+    if body.kind == "class_moved" and body.class_id and (body.slot_id or body.room_id):
+        return core.repair.ClassMoved(body.class_id, body.slot_id, body.room_id)
+    raise HTTPException(status_code=422, detail=f"invalid repair request for kind {body.kind!r}")
+
+
+@app.post("/repair")
+async def post_repair(body: RepairRequest):
+    # Локальный ремонт: переставляются только затронутые изменением занятия, остальные не трогаются
+    change = _repair_change(body)
+    state = await current_state()
+    if "classes" not in state:
+        raise HTTPException(status_code=409, detail="data not loaded")
+    try:
+        result = core.repair.repair(state["classes"], state["rooms"], state["slots"], state["groups"], change)
+    except KeyError as ex:
+        raise HTTPException(status_code=404, detail=f"class {ex.args[0]!r} not found")
+    if not result.affected and not isinstance(change, core.repair.ClassMoved):
+        return {**result.to_dict(), "version": state.version}
+    touched = set(result.affected) | ({change.class_id} if isinstance(change, core.repair.ClassMoved) else set())
+    # записываются только переставленные занятия: правки других занятий, сделанные пока шёл ремонт, сохраняются
+    try:
+        snap = await apply_change("update_classes", classes=[c for c in result.classes if c.id in touched])
+    except ValueError as ex:
+        raise HTTPException(status_code=409, detail=str(ex))
+    # темы — по прежним и новым местам всех переставленных занятий
+    before_after = [c for c in state["classes"] + result.classes if c.id in touched]
+    topics = {kind: frozenset() for kind in ("building", "teacher", "group")}
+    for class_id in touched:
+        found = topics_for("REPAIR", {"class_id": class_id}, before_after, state["rooms"])
+        topics = {kind: topics[kind] | ids for kind, ids in found.items()}
+    broadcaster.publish(Change("REPAIR", {"kind": body.kind, **result.to_dict()}, snap.version, topics))
+    return {**result.to_dict(), "version": snap.version}
+
+
+def subscribe(building_id: Optional[List[str]], teacher_id: Optional[List[str]], group_id: Optional[List[str]]):
+    return broadcaster.subscribe(building_id or (), teacher_id or (), group_id or ())
+
+
+@app.websocket("/ws/changes")
+async def changes_websocket(websocket: WebSocket, building_id: Optional[List[str]] = Query(None),
+                            teacher_id: Optional[List[str]] = Query(None),
+                            group_id: Optional[List[str]] = Query(None)):
+    await websocket.accept()
+    sub = subscribe(building_id, teacher_id, group_id)
+    await websocket.send_json({"type": "hello", "version": (await store_status())[0]})
+
+    async def pump():
+        async for frame in broadcaster.frames(sub):
+            await websocket.send_json(frame)
+
+    sender = asyncio.create_task(pump())
+    try:
+        # входящие сообщения не нужны, но чтение сразу замечает отключение клиента
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        broadcaster.unsubscribe(sub)
+
+
+@app.get("/changes/stream")
+async def changes_stream(building_id: Optional[List[str]] = Query(None),
+                         teacher_id: Optional[List[str]] = Query(None),
+                         group_id: Optional[List[str]] = Query(None)):
+    # Тот же поток изменений в виде Server-Sent Events (для клиентов без WebSocket)
+    sub = subscribe(building_id, teacher_id, group_id)
+
+    async def events():
+        yield f"event: hello\ndata: {json.dumps({'type': 'hello', 'version': (await store_status())[0]})}\n\n"
+        async for frame in broadcaster.frames(sub):
+            yield f"event: {frame['type']}\ndata: {json.dumps(frame, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(
+        metrics.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+# отчёты профилирования доступны только на сервере, запущенном с TIMETABLE_PROFILING=1
+if PROFILING_ENABLED:
+    @app.get("/admin/profiles")
+    async def list_profiles():
+        return [
+            {"id": p["id"], "method": p["method"], "path": p["path"], "duration_ms": p["duration_ms"],
+             "concurrent_requests": p["concurrent_requests"]}
+            for p in profiles
+        ]
+
+    @app.get("/admin/profiles/{profile_id}")
+    async def get_profile(profile_id: str):
+        for p in profiles:
+            if p["id"] == profile_id:
+                return p
+        raise HTTPException(status_code=404, detail="profile not found")
+
+
 if __name__ == "__main__":
+    # один процесс без надзора; несколько воркеров, перезапуск и проверка готовности — launch.py
     import uvicorn
-    uvicorn.run(app=app)
\ No newline at end of file
+    uvicorn.run(app=app, timeout_graceful_shutdown=DRAIN_SECONDS)
\ No newline at end of file
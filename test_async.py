@@ -6,13 +6,11 @@ from core.domain import Room, Slot, Group, Class
 from core.async_schedule import (
     _room_matches_needs,
     _group_size_ok,
-    _find_slot_room_combination,
+    _assign_by_slots,
     schedule_batch,
     generate_period_report,
 )
 
-pytestmark = pytest.mark.asyncio
-
 
 # ---- factories ----
 def mk_room(id="R1", building_id="B1", name="101", capacity=20, features=None):
@@ -75,25 +73,22 @@ def test_group_size_ok_true_and_false():
     assert _group_size_ok(r_small, g) is False
 
 
-def test_find_slot_room_combination_finds_first_valid():
+def test_assign_by_slots_respects_needs_and_taken_rooms():
     rooms = (mk_room(id="R1", capacity=30, features=("projector",)), mk_room(id="R2", capacity=10, features=("lab",)))
     slots = (mk_slot(id="MON1", day="monday"), mk_slot(id="MON2", day="monday"))
     group = mk_group(id="G1", size=25)
-    # class needs projector so first room qualifies and MON1 is first slot
+    # class needs projector so only R1 qualifies and MON1 is first slot
     c = mk_class(id="CL1", needs="projector", group_id="G1")
-    slot_id, room_id = _find_slot_room_combination(c, (group,), slots, rooms, set())
-    assert slot_id == "MON1"
-    assert room_id == "R1"
+    assert _assign_by_slots([c], (group,), slots, rooms, set(), set(), set()) == {"CL1": ("MON1", "R1")}
 
-    # if R1 taken -> should pick next room/slot or fail
+    # R1 at MON1 is taken, but R1 at MON2 is free
     taken = {("MON1", "R1")}
-    slot_id2, room_id2 = _find_slot_room_combination(c, (group,), slots, rooms, taken)
-    # R1 at MON1 is taken, but R1 at MON2 is free -> algorithm checks slots in order then rooms
-    # so it should pick MON2,R1 because slot MON2 + room R1 is free
-    assert slot_id2 is not None and room_id2 is not None
+    assert _assign_by_slots([c], (group,), slots, rooms, taken, set(), set()) == {"CL1": ("MON2", "R1")}
+    assert ("MON2", "R1") in taken
 
 
 # ---- tests for schedule_batch ----
+@pytest.mark.asyncio
 async def test_schedule_assigns_slot_and_room_when_available():
     rooms = (mk_room(id="R01", capacity=40, features=("projector", "lectoruim")),)
     slots = (mk_slot(id="MON1", day="monday"),)
@@ -110,6 +105,7 @@ async def test_schedule_assigns_slot_and_room_when_available():
     assert rpt["unscheduled_count"] == 0
 
 
+@pytest.mark.asyncio
 async def test_schedule_respects_capacity_and_features():
     # room without required feature and insufficient capacity
     rooms = (mk_room(id="R01", capacity=10, features=("none",)),)
@@ -123,6 +119,7 @@ async def test_schedule_respects_capacity_and_features():
     assert res["report"]["unscheduled_count"] == 1
 
 
+@pytest.mark.asyncio
 async def test_schedule_preserves_already_scheduled_and_does_not_reassign():
     rooms = (mk_room(id="R1", capacity=50, features=("projector",)),)
     slots = (mk_slot(id="MON1", day="monday"),)
@@ -135,6 +132,7 @@ async def test_schedule_preserves_already_scheduled_and_does_not_reassign():
     assert res["report"]["assigned_this_run"] == 0  # nothing newly assigned
 
 
+@pytest.mark.asyncio
 async def test_schedule_avoids_teacher_conflict():
     # teacher T1 already has a scheduled class at MON1
     rooms = (mk_room(id="R1", capacity=50, features=("projector",)), mk_room(id="R2", capacity=50, features=("projector",)))
@@ -151,6 +149,7 @@ async def test_schedule_avoids_teacher_conflict():
     assert not (updated["B"].slot_id == "MON1" and updated["B"].teacher_id == "T1")
 
 
+@pytest.mark.asyncio
 async def test_schedule_avoids_room_double_assignment_and_reports_proper_counts():
     rooms = (mk_room(id="R01", capacity=30, features=("projector",)),)
     slots = (mk_slot(id="MON1", day="monday"),)
@@ -167,6 +166,7 @@ async def test_schedule_avoids_room_double_assignment_and_reports_proper_counts(
 
 
 # ---- tests for generate_period_report ----
+@pytest.mark.asyncio
 async def test_generate_period_report_aggregates_across_days():
     rooms = (
         mk_room(id="R01", capacity=30, features=("projector",)),
@@ -187,3 +187,26 @@ async def test_generate_period_report_aggregates_across_days():
     # aggregated sums must be integers and non-negative
     assert isinstance(res["aggregated"]["total_assigned_this_run"], int)
     assert res["aggregated"]["total_assigned_this_run"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_large_group_gets_the_big_room_in_the_same_slot():
+    # первым в очереди стоит маленькая группа: раньше она занимала лекционный зал, и большой группе
+    # места в слоте не оставалось
+    rooms = (mk_room(id="HALL", capacity=100, features=()), mk_room(id="SMALL", capacity=20, features=()))
+    slots = (mk_slot(id="MON1", day="monday"),)
+    small, big = mk_group(id="G1", size=15), mk_group(id="G2", size=90)
+    classes = (mk_class(id="A", teacher_id="T1", group_id="G1"), mk_class(id="B", teacher_id="T2", group_id="G2"))
+    res = await schedule_batch("monday", classes, rooms, slots, (small, big))
+    updated = {c.id: c for c in res["classes"]}
+    assert (updated["A"].room_id, updated["B"].room_id) == ("SMALL", "HALL")
+    assert res["report"]["assigned_this_run"] == 2
+
+
+@pytest.mark.asyncio
+async def test_group_is_not_double_booked():
+    rooms = (mk_room(id="R1", capacity=30, features=()), mk_room(id="R2", capacity=30, features=()))
+    slots = (mk_slot(id="MON1", day="monday"), mk_slot(id="MON2", day="monday", start="10:00", end="12:00"))
+    classes = (mk_class(id="A", teacher_id="T1"), mk_class(id="B", teacher_id="T2"))
+    res = await schedule_batch("monday", classes, rooms, slots, (mk_group(),))
+    assert sorted(c.slot_id for c in res["classes"]) == ["MON1", "MON2"]
@@ -0,0 +1,105 @@
+import asyncio
+import httpx
+import pytest
+from core import encoding
+from backend_client import BackendClient
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_backend(handler, retries=2):
+    return BackendClient("http://test", retries=retries, backoff=0, transport=httpx.MockTransport(handler))
+
+
+async def test_client_is_reused_between_requests():
+    backend = make_backend(lambda request: httpx.Response(200, json={"ok": True}))
+    first = backend.client
+    await backend.get_json("/a")
+    await backend.get_json("/b")
+    assert backend.client is first
+    await backend.aclose()
+
+
+async def test_idempotent_requests_are_retried_on_503():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(503 if len(calls) < 3 else 200, json={"n": len(calls)})
+
+    backend = make_backend(handler)
+    assert await backend.get_json("/data") == {"n": 3}
+    await backend.aclose()
+
+
+async def test_post_is_not_retried_by_default():
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        raise httpx.ConnectError("down", request=request)
+
+    backend = make_backend(handler)
+    with pytest.raises(httpx.ConnectError):
+        await backend.request("POST", "/x")
+    assert len(calls) == 1
+    await backend.aclose()
+
+
+async def test_load_and_fetch_is_single_round_trip():
+    seen = []
+
+    def handler(request):
+        seen.append((request.method, request.url.path, request.url.params.get("include_data")))
+        body = encoding.encode({"rooms": [{"id": "R1"}]}, encoding.COLUMNAR)
+        return httpx.Response(200, content=body, headers={"content-type": encoding.COLUMNAR})
+
+    backend = make_backend(handler)
+    assert await backend.load_and_fetch() == {"rooms": [{"id": "R1"}]}
+    assert seen == [("POST", "/load_seed", "true")]
+    await backend.aclose()
+
+
+async def test_gather_runs_requests_concurrently():
+    backend = make_backend(lambda request: httpx.Response(200, json=request.url.path))
+    assert await backend.gather("/a", "/b") == ["/a", "/b"]
+    await backend.aclose()
+
+
+async def test_client_of_another_loop_is_closed_there():
+    import threading
+    backend = make_backend(lambda request: httpx.Response(200, json={}))
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever, daemon=True)
+    thread.start()
+
+    async def open_there():
+        await backend.get_json("/a")
+        return backend.client
+
+    old = asyncio.run_coroutine_threadsafe(open_there(), other).result(5)
+    assert backend.client is not old            # новый цикл — новый клиент
+    for _ in range(50):
+        if old.is_closed:
+            break
+        await asyncio.sleep(0.01)
+    assert old.is_closed
+    other.call_soon_threadsafe(other.stop)
+    thread.join(5)
+    await backend.aclose()
+
+
+async def test_gather_sends_independent_requests_together():
+    in_flight, peak = [0], [0]
+
+    async def handler(request):
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.02)
+        in_flight[0] -= 1
+        return httpx.Response(200, json={"path": request.url.path})
+
+    backend = make_backend(handler)
+    result = await backend.gather("/a", backend.get_json("/b"))
+    assert result == [{"path": "/a"}, {"path": "/b"}] and peak[0] == 2
+    await backend.aclose()
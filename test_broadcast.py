@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from core import transforms
+from core.broadcast import Broadcaster, Change, topics_for
+
+pytestmark = pytest.mark.asyncio
+
+buildings, rooms, teachers, groups, courses, slots, classes, constraints = transforms.load_seed("data/seed.json")
+
+
+def change(version, name="CANCEL_CLASS", **payload):
+    payload = payload or {"class_id": classes[0].id}
+    return Change(name, payload, version, topics_for(name, payload, classes, rooms))
+
+
+async def test_burst_is_coalesced_into_one_frame():
+    hub = Broadcaster(window=0.01)
+    sub = hub.subscribe()
+    for version in range(1, 6):
+        hub.publish(change(version, "MOVE_CLASS", class_id=classes[0].id, new_room=rooms[version].id))
+    hub.publish(change(6, "CANCEL_CLASS", class_id=classes[1].id))
+    frame = await asyncio.wait_for(sub.frames.get(), 1)
+    assert frame["version"] == 6
+    assert [(e["name"], e["version"]) for e in frame["events"]] == [("MOVE_CLASS", 5), ("CANCEL_CLASS", 6)]
+    assert sub.frames.empty()
+
+
+async def test_topic_filters():
+    first = classes[0]
+    hub = Broadcaster(window=0.0)
+    by_teacher = hub.subscribe(teacher_id=[first.teacher_id])
+    by_other_group = hub.subscribe(group_id=["nobody"])
+    old_building = next(r.building_id for r in rooms if r.id == first.room_id)
+    other_room = next(r for r in rooms if r.building_id != old_building)
+    by_new_building = hub.subscribe(building_id=[other_room.building_id])
+    hub.publish(change(1, "MOVE_CLASS", class_id=first.id, new_room=other_room.id))
+    await asyncio.sleep(0.01)
+    assert by_teacher.frames.qsize() == 1 and by_new_building.frames.qsize() == 1
+    assert by_other_group.frames.empty()
+
+
+async def test_slow_subscriber_gets_resync():
+    hub = Broadcaster(window=0.0, queue_size=2)
+    sub = hub.subscribe()
+    for version in range(1, 5):
+        hub.publish(change(version))
+        await asyncio.sleep(0.005)
+    frames = [sub.frames.get_nowait() for _ in range(sub.frames.qsize())]
+    assert frames[0] == {"type": "resync", "version": 3}
+    assert frames[-1]["version"] == 4 and sub.dropped == 3
+    hub.unsubscribe(sub)
+    assert not hub.subscriptions
@@ -96,3 +96,75 @@ def test_invalid_day_raises():
     with pytest.raises(ValueError):
         # validate_day should raise ValueError
         svc.build_day_report("saturday")
+
+def make_service(data, cache_size=128):
+    validators = {"validate_day": validate_day}
+    selectors = {
+        "select_slots_for_day": select_slots_for_day,
+        "select_classes_for_slots": select_classes_for_slots
+    }
+    calculators = {"enrich_classes": enrich_classes, "summarize_day": summarize_day}
+    return TimetableService(validators, selectors, calculators, data, cache_size=cache_size)
+
+def test_repeated_day_report_is_cached():
+    calls = []
+    def counting_select(slots, day):
+        calls.append(day)
+        return select_slots_for_day(slots, day)
+    svc = make_service(DATA)
+    svc.selectors["select_slots_for_day"] = counting_select
+    first = svc.build_day_report("monday")
+    second = svc.build_day_report("Monday")
+    assert second is first
+    assert calls == ["monday"]
+    assert svc.cache_hits == 1
+
+def test_update_data_invalidates_cache():
+    svc = make_service(DATA)
+    assert svc.build_day_report("monday").summary["classes_count"] == 2
+    new_data = dict(DATA, classes=CLASSES[:1])
+    svc.update_data(new_data)
+    assert svc.build_day_report("monday").summary["classes_count"] == 1
+
+def test_lookups_built_once_per_version():
+    svc = make_service(DATA)
+    assert svc.lookups() is svc.lookups()
+    old = svc.lookups()
+    svc.invalidate()
+    assert svc.lookups() is not old
+    report = svc.build_day_report("monday")
+    assert report.classes[0]["course_title"] == "Физическая культура"
+
+def test_enrich_with_old_signature_is_still_supported():
+    def legacy_enrich(classes, data):
+        return [dict(c, legacy=True) for c in classes]
+    svc = TimetableService({"validate_day": validate_day},
+                           {"select_slots_for_day": select_slots_for_day,
+                            "select_classes_for_slots": select_classes_for_slots},
+                           {"enrich_classes": legacy_enrich, "summarize_day": summarize_day}, DATA)
+    assert all(c["legacy"] for c in svc.build_day_report("monday").classes)
+    assert all(c["legacy"] for d in svc.build_period_report(["monday", "tuesday"]).days for c in d.classes)
+
+def test_stage_cache_evicts_least_recent():
+    svc = make_service(DATA, cache_size=3)
+    svc.build_day_report("monday")
+    svc.build_day_report("tuesday")
+    assert len(svc._cache) == 3
+
+def test_build_period_report_single_pass_views():
+    svc = make_service(DATA)
+    report = svc.build_period_report(["monday", "tuesday", "Monday"])
+    assert [r.day for r in report.days] == ["monday", "tuesday"]
+    assert [len(r.classes) for r in report.days] == [2, 1]
+    assert report.days[0].summary == svc.build_day_report("monday").summary
+    assert [c["id"] for c in report.by_teacher["T01"]] == ["A"]
+    assert set(report.by_group) == {"G01", "G02", "G03"}
+    assert [c["id"] for c in report.by_room["R13"]] == ["C"]
+    assert report.by_room["R13"][0]["room_name"] == "102-B"
+    assert report.summary["classes_count"] == 3
+    assert svc.build_period_report(["monday", "tuesday"]) is report
+
+def test_build_period_report_rejects_invalid_day():
+    svc = make_service(DATA)
+    with pytest.raises(ValueError):
+        svc.build_period_report(["monday", "sunday"])
@@ -0,0 +1,56 @@
+import random
+
+from core import transforms
+from core.async_schedule import schedule_day
+from core.conflict_graph import ConflictGraph, dsatur
+from core.domain import Class, Group, Room, Slot
+
+
+def cls(id, teacher_id, group_id, slot_id="", status=""):
+    return Class(id=id, course_id="X", needs="", teacher_id=teacher_id, group_id=group_id,
+                 slot_id=slot_id, room_id="", status=status)
+
+
+def test_edges_from_shared_teacher_or_group():
+    graph = ConflictGraph([cls("a", "T1", "G1"), cls("b", "T1", "G2"), cls("c", "T2", "G2"), cls("d", "", "G3"),
+                           cls("e", "", "G4"), cls("f", "T1", "G1", status="cancelled")])
+    assert graph.adj == {"a": {"b"}, "b": {"a", "c"}, "c": {"b"}, "d": set(), "e": set()}
+    stats = graph.stats()
+    assert (stats["vertices"], stats["edges"], stats["max_degree"]) == (5, 2, 2)
+    assert stats["degree_distribution"] == {0: 2, 1: 2, 2: 1}
+    assert stats["max_clique"] == 2
+
+
+def test_dsatur_is_proper_and_respects_capacity_and_fixed():
+    rnd = random.Random(2)
+    classes = [cls(f"c{i}", f"T{rnd.randrange(6)}", f"G{rnd.randrange(8)}") for i in range(40)]
+    graph = ConflictGraph(classes)
+    colors = [f"S{i}" for i in range(10)]
+    fixed = {"c0": "S0"}
+    result = dsatur(graph, colors, {c: 4 for c in colors}, fixed)
+    assert "c0" not in result
+    coloring = {**result, **fixed}
+    assert all(coloring[u] != coloring[v] for u in coloring for v in graph.adj[u] if v in coloring)
+    assert all(list(coloring.values()).count(c) <= 4 for c in colors)
+
+
+def test_dsatur_uses_clique_size_colors_on_seed():
+    classes = transforms.load_seed("data/seed.json")[6]
+    graph = ConflictGraph(classes)
+    result = dsatur(graph, [f"S{i}" for i in range(len(graph))])
+    assert len(result) == len(graph)
+    assert len(set(result.values())) == len(graph.max_clique())
+
+
+def test_coloring_prepass_in_schedule_day():
+    slots = (Slot(id="S1", day="monday", start="8:00", end="10:00"),
+             Slot(id="S2", day="monday", start="10:00", end="12:00"))
+    rooms = (Room(id="R1", building_id="B", name="1", capacity=30, features=frozenset()),
+             Room(id="R2", building_id="B", name="2", capacity=30, features=frozenset()))
+    groups = tuple(Group(id=f"G{i}", name="", size=10, track="") for i in range(4))
+    classes = (cls("a", "T1", "G0"), cls("b", "T2", "G1"), cls("c", "T1", "G2"), cls("d", "T3", "G1"))
+    colored = schedule_day("monday", classes, rooms, slots, groups)  # раскраска включена по умолчанию
+    assert colored["report"]["assigned_this_run"] == 4
+    assert colored["report"]["collisions"] == []
+    by_id = {c.id: c.slot_id for c in colored["classes"]}
+    assert by_id["a"] != by_id["c"] and by_id["b"] != by_id["d"]
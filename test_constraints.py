@@ -0,0 +1,90 @@
+import random
+
+import pytest
+from core import transforms
+from core.constraints import PLUGINS, Scoring, register, score, DayRule
+from core.domain import Class, Constraint, Room, Slot
+
+slots = tuple(Slot(id=f"{d}{i}", day=day, start=f"{8 + 2 * i}:00", end=f"{9 + 2 * i}:30")
+              for d, day in (("MON", "monday"), ("TUE", "tuesday")) for i in range(5))
+rooms = (
+    Room(id="A", building_id="B1", name="A", capacity=30, features=frozenset()),
+    Room(id="B", building_id="B2", name="B", capacity=30, features=frozenset()),
+)
+
+
+def cls(id, slot_id, room_id="A", teacher_id="T1", group_id="G1", status="scheduled"):
+    return Class(id=id, course_id="C", needs="", teacher_id=teacher_id, group_id=group_id,
+                 slot_id=slot_id, room_id=room_id, status=status)
+
+
+def rule(kind, **payload):
+    return Constraint(id=kind, kind=kind, payload=payload)
+
+
+def test_max_windows_per_day():
+    classes = (cls("c1", "MON0"), cls("c2", "MON3"), cls("c3", "TUE0"))
+    result = score([rule("max_windows_per_day", max=1, weight=2)], classes, slots, rooms)
+    # у G1 в понедельник два окна (MON1, MON2) — одно сверх лимита
+    assert result["total"] == 2.0
+
+
+def test_max_consecutive_and_travel():
+    classes = (cls("c1", "MON0"), cls("c2", "MON1", room_id="B"), cls("c3", "MON2"))
+    constraints = [rule("max_consecutive", max=2), rule("building_travel", minutes=60, teacher_id="T1")]
+    result = score(constraints, classes, slots, rooms)
+    assert result["by_constraint"] == {"max_consecutive": 1.0, "building_travel": 2.0}
+
+
+def test_class_rules_and_unknown_kinds():
+    classes = (cls("c1", "MON0"), cls("c2", "TUE0", room_id="B"), cls("c3", "TUE1", status="cancelled"))
+    constraints = [rule("preferred_buildings", buildings=["B1"]), rule("teacher_unavailable", teacher_id="T1",
+                                                                       day="Tuesday"),
+                   Constraint(id="C01", kind="TEST", payload="")]
+    result = score(constraints, classes, slots, rooms)
+    assert result["by_constraint"] == {"preferred_buildings": 1.0, "teacher_unavailable": 1.0}
+    assert result["unknown"] == ["C01"]
+
+
+def test_delta_matches_full_rescoring():
+    rnd = random.Random(7)
+    classes = tuple(cls(f"c{i}", rnd.choice(slots).id, rnd.choice(rooms).id, f"T{i % 3}", f"G{i % 4}")
+                    for i in range(30))
+    constraints = [rule("max_windows_per_day", max=0), rule("max_consecutive", max=2),
+                   rule("building_travel", minutes=60, scope="teacher"),
+                   rule("preferred_buildings", buildings=["B1"], group_id=["G0", "G1"]),
+                   rule("teacher_unavailable", teacher_id="T2", slot_ids=["MON0", "TUE4"])]
+    scoring = Scoring(constraints, classes, slots, rooms)
+    current = {c.id: c for c in classes}
+    for _ in range(200):
+        c = current[rnd.choice(list(current))]
+        slot_id, room_id = rnd.choice(slots).id, rnd.choice(rooms).id
+        delta = scoring.delta(c.id, slot_id, room_id)
+        before = scoring.total
+        current[c.id] = cls(c.id, slot_id, room_id, c.teacher_id, c.group_id)
+        assert scoring.apply(c.id, slot_id, room_id) == pytest.approx(before + delta)
+        assert scoring.total == pytest.approx(Scoring(constraints, current.values(), slots, rooms).total)
+
+
+def test_plugins_can_be_registered():
+    @register("no_mondays")
+    class NoMondays(DayRule):
+        def penalty(self, day, ctx):
+            return float(len(day)) if day and day[0].slot.day == "monday" else 0.0
+
+    class Unfinished(DayRule):
+        pass
+
+    try:
+        classes = (cls("c1", "MON0"), cls("c2", "TUE0"))
+        assert score([rule("no_mondays")], classes, slots, rooms)["total"] == 1.0
+        with pytest.raises(TypeError):
+            Unfinished(rule("unfinished"))  # плагин без penalty не создаётся
+    finally:
+        del PLUGINS["no_mondays"]
+
+
+def test_seed_constraints_are_reported_as_unknown():
+    _, seed_rooms, _, _, _, seed_slots, seed_classes, seed_constraints = transforms.load_seed("data/seed.json")
+    assert score(seed_constraints, seed_classes, seed_slots, seed_rooms) == \
+        {"total": 0, "by_constraint": {}, "unknown": ["C01"]}
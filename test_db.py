@@ -0,0 +1,155 @@
+import random
+import sqlite3
+import threading
+from dataclasses import replace
+
+import pytest
+from core import transforms
+from core.db import SqliteStore
+from core.domain import Building, Class, Course, Group, Room, Slot, Teacher
+from core.query import free_slots, query_page
+from core.recursion import find_conflicts_recursive
+
+DAYS = ("monday", "tuesday")
+SLOTS = tuple(
+    Slot(id=f"{d[:3].upper()}{i}", day=d, start=f"{8 + i * 2}:00", end=f"{10 + i * 2}:00")
+    for d in DAYS for i in range(4)
+) + (Slot(id="MONX", day="Monday", start="9:00", end="11:00"),)
+ROOMS = tuple(Room(id=f"R{i}", building_id=f"B{i % 2}", name=str(100 + i), capacity=30, features=("lab",))
+              for i in range(5))
+
+
+def make_tables(n=300, seed=7):
+    rnd = random.Random(seed)
+    classes = tuple(
+        Class(id=f"C{i}", course_id=f"CS{i % 4}", needs="", teacher_id=rnd.choice(("T0", "T1", "T2", "")),
+              group_id=f"G{i % 6}", slot_id=rnd.choice(SLOTS).id,
+              room_id=rnd.choice(ROOMS).id if rnd.random() > 0.1 else "", status="scheduled")
+        for i in range(n)
+    )
+    return {
+        "buildings": (Building(id="B0", name="Главный"), Building(id="B1", name="Второй")),
+        "rooms": ROOMS,
+        "teachers": tuple(Teacher(id=f"T{i}", name=f"Преподаватель {i}", dept="CS") for i in range(3)),
+        "groups": tuple(Group(id=f"G{i}", name=f"ИТ-{i}", size=20, track="IT") for i in range(6)),
+        "courses": tuple(Course(code=f"CS{i}", title=f"Курс {i}", dept="CS", hours_per_week=2) for i in range(4)),
+        "slots": SLOTS,
+        "classes": classes,
+        "constraints": (),
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SqliteStore(str(tmp_path / "timetable.db"))
+    store.write(make_tables())
+    yield store
+    store.close()
+
+
+def test_snapshot_round_trips_and_survives_restart(store):
+    tables = make_tables()
+    assert dict(store.snapshot().tables) == tables
+    store.close()
+    reopened = SqliteStore(store.path)
+    assert reopened.version == 1
+    assert reopened.snapshot()["rooms"][0].features == frozenset({"lab"})
+
+
+def test_seed_load_and_replace(tmp_path):
+    store = SqliteStore(str(tmp_path / "seed.db"))
+    assert not store.is_loaded()
+    snap = store.apply("load_seed", path="data/seed.json")
+    assert snap.version == 1 and snap["classes"]
+    snap = store.apply("replace", rooms=snap["rooms"][:1])
+    assert snap.version == 2 and len(snap["rooms"]) == 1 and snap["classes"]
+
+
+def test_conflicts_match_python(store):
+    tables = make_tables()
+    expected = [(a.id, b.id) for a, b in find_conflicts_recursive(tables["classes"], tables["slots"])]
+    assert expected
+    assert store.conflicts() == expected
+
+
+@pytest.mark.parametrize("filters", [{}, {"day": "MONDAY"}, {"teacher_id": "T1", "building_id": "B0"},
+                                     {"group_id": "G2", "offset": 10, "limit": 7}])
+def test_query_page_matches_python(store, filters):
+    tables = make_tables()
+    del tables["constraints"]
+    assert store.query_page(**filters) == query_page(**tables, **filters)
+
+
+def test_free_slots_match_python(store):
+    tables = make_tables(n=12)
+    store.write(tables)
+    for room in ROOMS:
+        for day in (None, "tuesday"):
+            expected = [s.id for s in free_slots(tables["classes"], SLOTS, room.id, day)]
+            assert [s["id"] for s in store.free_slots(room.id, day)] == expected
+
+
+def test_events_and_replace_write_only_touched_rows(store):
+    tables = make_tables()
+    statements = []
+    store.connection().set_trace_callback(statements.append)
+    snap = store.apply("event", name="MOVE_CLASS", payload={"class_id": "C5", "new_room": "R4"})
+    store.apply("event", name="ADD_CLASS", payload={**transforms.serialize_tuple(tables["classes"][:1])[0], "id": "NEW"})
+    with pytest.raises(ValueError):
+        store.apply("event", name="ADD_CLASS", payload={"id": "NEW", "course_id": "CS0"})
+    written = [s for s in statements if s.startswith(("INSERT", "UPDATE", "DELETE")) and "meta" not in s]
+    assert len(written) == 2 and not any(s.startswith("DELETE") for s in written)
+    classes = store.snapshot()["classes"]
+    assert snap.version == 2 and classes[5].room_id == "R4" and classes[5].status == "moved"
+    assert classes[-1].id == "NEW" and classes[:5] == tables["classes"][:5]
+
+    statements.clear()
+    store.apply("replace", classes=classes[:3] + (replace(classes[3], status="cancelled"),))
+    written = [s for s in statements if s.startswith(("INSERT", "UPDATE", "DELETE")) and "meta" not in s]
+    assert sum(s.startswith("UPDATE") for s in written) == 1
+    assert [c.status for c in store.snapshot()["classes"]] == ["scheduled"] * 3 + ["cancelled"]
+
+
+def test_close_closes_connections_of_all_threads(store):
+    other = []
+    thread = threading.Thread(target=lambda: other.append(store.connection()))
+    thread.start()
+    thread.join()
+    store.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        other[0].execute("SELECT 1")
+
+
+def test_update_classes_changes_rows_by_id(store):
+    classes = store.snapshot()["classes"]
+    store.apply("event", name="CANCEL_CLASS", payload={"class_id": classes[1].id})
+    snap = store.apply("update_classes", classes=[replace(classes[0], slot_id="", room_id="")])
+    assert snap["classes"][0].slot_id == "" and snap["classes"][1].status == "cancelled"
+    with pytest.raises(ValueError):
+        store.apply("update_classes", classes=[replace(classes[0], id="missing")])
+    assert store.version == snap.version
+
+
+def test_duplicate_room_is_a_data_error(store):
+    room = transforms.serialize_tuple(ROOMS[:1])[0]
+    version = store.version
+    with pytest.raises(ValueError):
+        store.apply("event", name="ADD_ROOM", payload=room)
+    assert store.version == version and len(store.snapshot()["rooms"]) == len(ROOMS)
+
+
+def test_event_lookups_do_not_read_whole_tables(store):
+    statements = []
+    store.connection().set_trace_callback(statements.append)
+    classes, rooms = store.event_rows({"class_id": "C5", "new_room": "R4"})
+    snap = store.apply("event", name="CANCEL_CLASS", payload={"class_id": "C5"})
+    assert [c.id for c in classes] == ["C5"] and "R4" in {r.id for r in rooms}
+    assert snap.version == 2 and not any("FROM courses" in s or "FROM \"groups\"" in s for s in statements)
+    assert snap["classes"][5].status == "cancelled"     # таблицы читаются при обращении
+
+
+def test_assign_room_event_and_class_ids(store):
+    store.apply("event", name="ASSIGN_ROOM", payload={"class_id": "C7", "new_room": "R2"})
+    changed = store.snapshot()["classes"][7]
+    assert (changed.room_id, changed.status) == ("R2", "scheduled")
+    assert store.class_ids() == [c.id for c in make_tables()["classes"]]
@@ -0,0 +1,48 @@
+import pytest
+from core import encoding
+from core.encoding import to_columnar, from_columnar, negotiate, encode, decode, COLUMNAR, JSON, MSGPACK
+
+TABLES = {
+    "rooms": [
+        {"id": "R1", "name": "101", "capacity": 30, "features": ["lab"]},
+        {"id": "R2", "name": "102", "capacity": 40, "features": []},
+    ],
+    "constraints": [],
+}
+
+
+def test_columnar_stores_keys_once_and_round_trips():
+    payload = to_columnar(TABLES)
+    rooms = payload["tables"]["rooms"]
+    assert rooms["length"] == 2
+    assert rooms["columns"]["id"] == ["R1", "R2"]
+    assert from_columnar(payload) == TABLES
+
+
+def test_columnar_handles_ragged_rows():
+    tables = {"x": [{"a": 1}, {"a": 2, "b": 3}, {"b": 4}]}
+    assert from_columnar(to_columnar(tables)) == {
+        "x": [{"a": 1, "b": None}, {"a": 2, "b": 3}, {"a": None, "b": 4}]
+    }
+
+
+def test_negotiate_respects_q_values_and_defaults_to_json():
+    assert negotiate(None) == JSON
+    assert negotiate("text/html") == JSON
+    assert negotiate(f"{COLUMNAR}, application/json;q=0.5") == COLUMNAR
+    assert negotiate(f"{COLUMNAR};q=0.2, application/json") == JSON
+
+
+def test_encode_decode_columnar():
+    body = encode(TABLES, COLUMNAR)
+    assert decode(body, COLUMNAR + "; charset=utf-8") == TABLES
+    assert decode(encode(TABLES, JSON), JSON) == TABLES
+
+
+def test_msgpack_optional():
+    if encoding.msgpack is None:
+        with pytest.raises(RuntimeError):
+            encode(TABLES, MSGPACK)
+        assert negotiate(MSGPACK) == JSON
+    else:
+        assert decode(encode(TABLES, MSGPACK), MSGPACK) == TABLES
@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+from datetime import date
+from core.domain import Building, Class, Course, Group, Room, Slot, Teacher
+from core.export import (iter_rows, iter_ndjson, iter_csv, iter_ical, chunked, content_disposition,
+                         invalid_slots, COLUMNS)
+from core.term import term_weeks
+
+SLOTS = (Slot(id="MON1", day="monday", start="8:00", end="9:30"),)
+ROOMS = (Room(id="R1", building_id="B1", name="101", capacity=30, features=()),)
+CLASSES = (
+    Class(id="A", course_id="CS1", needs="", teacher_id="T1", group_id="G1", slot_id="MON1", room_id="R1", status="scheduled"),
+    Class(id="B", course_id="CS1", needs="", teacher_id="T2", group_id="G2", slot_id="", room_id="", status="planned"),
+)
+
+
+def rows(**filters):
+    return iter_rows(
+        CLASSES, SLOTS, ROOMS,
+        teachers=(Teacher(id="T1", name="Иванов, И.", dept="CS"),),
+        groups=(Group(id="G1", name="ИТ-1", size=20, track="IT"),),
+        courses=(Course(code="CS1", title="Алгоритмы", dept="CS", hours_per_week=2),),
+        buildings=(Building(id="B1", name="Главный"),),
+        **filters,
+    )
+
+
+def test_ndjson_is_streamed_and_filtered():
+    lines = list(iter_ndjson(rows(teacher_id="T1")))
+    assert len(lines) == 1
+    row = json.loads(lines[0])
+    assert row["course_title"] == "Алгоритмы" and row["building_name"] == "Главный"
+
+
+def test_rows_are_lazy():
+    gen = rows()
+    assert next(gen)["id"] == "A"
+
+
+def test_csv_header_and_rows():
+    text = "".join(iter_csv(rows()))
+    parsed = list(csv.reader(io.StringIO(text)))
+    assert tuple(parsed[0]) == COLUMNS
+    assert [r[0] for r in parsed[1:]] == ["A", "B"]
+    assert parsed[1][COLUMNS.index("teacher_name")] == "Иванов, И."
+
+
+def test_ical_weekly_events():
+    term = term_weeks(date(2026, 9, 9), 2)
+    text = "".join(iter_ical(rows(), term))
+    assert text.startswith("BEGIN:VCALENDAR\r\n") and text.endswith("END:VCALENDAR\r\n")
+    assert text.count("BEGIN:VEVENT") == 1  # B без слота не экспортируется
+    assert "DTSTART:20260907T080000" in text
+    assert "RRULE:FREQ=WEEKLY;UNTIL=20260920T235959" in text
+    assert "DESCRIPTION:Иванов\\, И.\\, ИТ-1" in text
+    assert all(len(line.encode("utf-8")) <= 75 for line in text.split("\r\n"))
+
+
+def test_ical_excludes_holidays():
+    term = term_weeks(date(2026, 9, 9), 3, holidays={date(2026, 9, 14), date(2026, 9, 16), date(2026, 10, 5)})
+    text = "".join(iter_ical(rows(), term))
+    # среда 16.09 не день занятия, 05.10 — после конца семестра
+    assert "EXDATE:20260914T080000\r\n" in text and text.count("EXDATE") == 1
+
+
+def test_chunked_sends_first_line_immediately():
+    chunks = list(chunked((f"{i}\n" for i in range(10)), size=4))
+    assert chunks[0] == "0\n"
+    assert "".join(chunks) == "".join(f"{i}\n" for i in range(10))
+    assert len(chunks) == 4
+
+
+def test_invalid_slot_times_are_found_before_streaming():
+    slots = SLOTS + (Slot(id="BAD", day="monday", start="8:xx", end="9:30"),)
+    classes = CLASSES + (Class(id="C", course_id="CS1", needs="", teacher_id="T3", group_id="G3",
+                               slot_id="BAD", room_id="", status="scheduled"),)
+    assert set(invalid_slots(classes, slots)) == {"BAD"}
+    assert invalid_slots(classes, slots, teacher_id="T1") == {}
+    ical = "".join(iter_ical(iter_rows(classes, slots), term_weeks(date(2026, 9, 7), 2)))
+    assert ical.count("BEGIN:VEVENT") == 1 and ical.endswith("END:VCALENDAR\r\n")
+
+
+def test_content_disposition_is_sanitised():
+    header = content_disposition('timetable-T1"; x=1-Группа.csv')
+    assert header.startswith('attachment; filename="timetable-T1_x_1-_.csv"')
+    assert "filename*=UTF-8''timetable-T1%22%3B%20x%3D1-%D0%93" in header
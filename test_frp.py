@@ -38,6 +38,19 @@ def test_move_class():
     assert c["status"] == "moved"
 
 
+def test_assign_room_keeps_status():
+    data = seed()
+    bus = EventBus()
+    bus.subscribe("ASSIGN_ROOM", assign_room)
+    before = next(c for c in data["classes"] if c["id"] == "ECON_LEC1")
+
+    state = bus.publish("ASSIGN_ROOM", {"class_id": "ECON_LEC1", "new_room": "R03"}, data)
+
+    c = next(c for c in state["classes"] if c["id"] == "ECON_LEC1")
+    assert c["room_id"] == "R03"
+    assert c["status"] == before["status"]
+
+
 def test_cancel_class():
     data = seed()
     bus = EventBus()
@@ -80,3 +93,17 @@ def test_multiple_subscribers():
     c = next(c for c in s2["classes"] if c["id"] == "ECON_LEC1")
     assert c["slot_id"] == "TUE1"
     assert c["room_id"] == "R05"
+
+
+def test_add_class_rejects_duplicate_id():
+    data = seed()
+    bus = EventBus()
+    bus.subscribe("ADD_CLASS", add_class)
+    new_class = {"id": "NEW1", "course_id": "CS101", "teacher_id": "T01", "group_id": "G0105",
+                 "slot_id": "", "room_id": ""}
+    state = bus.publish("ADD_CLASS", new_class, data)
+    added = next(c for c in state["classes"] if c["id"] == "NEW1")
+    assert added["status"] == "planned" and added["needs"] == ""
+    assert len(state["classes"]) == len(data["classes"]) + 1
+    with pytest.raises(ValueError):
+        bus.publish("ADD_CLASS", new_class, state)
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from core import transforms
+from core.jobs import CANCELLED, DONE, JobManager
+
+pytestmark = pytest.mark.asyncio
+
+buildings, rooms, teachers, groups, courses, slots, classes, constraints = transforms.load_seed("data/seed.json")
+DAYS = ["monday", "tuesday", "Monday", "wednesday"]
+
+
+def thread_manager(**kwargs):
+    return JobManager(max_workers=2, executor_factory=lambda n: ThreadPoolExecutor(n), **kwargs)
+
+
+async def test_job_runs_days_and_reports_progress():
+    jobs = thread_manager()
+    job = jobs.submit(DAYS, 1, classes, rooms, slots, groups)
+    assert job.days == ("monday", "tuesday", "wednesday")
+    seen = [snapshot async for snapshot in jobs.watch(job.id)]
+    assert seen[-1]["status"] == DONE and seen[-1]["done"] == 3
+    assert [d["day"] for d in job.result["days"]] == ["monday", "tuesday", "wednesday"]
+    assert job.result["aggregated"]["total_days"] == 3
+    jobs.shutdown()
+
+
+async def test_results_are_cached_per_data_version():
+    jobs = thread_manager()
+    first = jobs.submit(DAYS, 1, classes, rooms, slots, groups)
+    assert jobs.submit(DAYS, 1, classes, rooms, slots, groups) is first  # та же задача, пока идёт
+    await first.task
+    again = jobs.submit(["monday", "tuesday", "wednesday"], 1, classes, rooms, slots, groups)
+    assert again is not first and again.cached and again.status == DONE
+    assert again.result is first.result
+    newer = jobs.submit(DAYS, 2, classes, rooms, slots, groups)
+    assert not newer.cached
+    await newer.task
+    jobs.shutdown()
+
+
+async def test_cancel_stops_pending_days():
+    gate = threading.Event()
+    started = []
+
+    class Blocking(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            def wait_then_run(*a):
+                started.append(a[0])
+                gate.wait(5)
+                return fn(*a)
+            return super().submit(wait_then_run, *args, **kwargs)
+
+    jobs = JobManager(max_workers=1, executor_factory=lambda n: Blocking(n))
+    job = jobs.submit(DAYS, 1, classes, rooms, slots, groups)
+    await asyncio.sleep(0.05)
+    jobs.cancel(job.id)
+    await asyncio.wait({job.task}, timeout=1)
+    gate.set()
+    assert job.status == CANCELLED and job.result is None
+    assert started == ["monday"]
+    # отменённый результат не попадает в кеш
+    assert not jobs.submit(DAYS, 1, classes, rooms, slots, groups).cached
+    jobs.shutdown()
+
+
+async def test_cancel_before_start_and_empty_days():
+    jobs = thread_manager()
+    job = jobs.submit(["friday"], 1, classes, rooms, slots, groups)
+    jobs.cancel(job.id)
+    await asyncio.wait({job.task})
+    await asyncio.sleep(0)  # колбэк завершения задачи
+    assert job.status == CANCELLED and job.done == 0
+    with pytest.raises(ValueError):
+        jobs.submit([], 1, classes, rooms, slots, groups)
+    jobs.shutdown()
+
+
+async def test_drain_waits_for_running_jobs_and_rejects_new_ones():
+    jobs = thread_manager()
+    job = jobs.submit(DAYS, 1, classes, rooms, slots, groups)
+    assert jobs.active == 1
+    assert await jobs.drain(timeout=30)
+    assert job.status == DONE and jobs.active == 0
+    with pytest.raises(RuntimeError):
+        jobs.submit(DAYS, 2, classes, rooms, slots, groups)
+    jobs.shutdown()
@@ -0,0 +1,154 @@
+import socket
+
+import launch
+from launch import EXITED, READY, TIMEOUT, Backoff, Child, Supervisor
+
+
+class FakeProcess:
+    pids = iter(range(100, 1000))
+
+    def __init__(self, exit_after=None):
+        self.pid = next(self.pids)
+        self.returncode = None
+        self.exit_after = exit_after            #сколько опросов poll() процесс проживёт
+        self.terminated = False
+
+    def poll(self):
+        if self.returncode is None and self.exit_after is not None:
+            self.exit_after -= 1
+            if self.exit_after < 0:
+                self.returncode = 1
+        return self.returncode
+
+    def terminate(self):
+        self.terminated = True
+        self.returncode = -15
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+    def kill(self):
+        self.returncode = -9
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def fake_child(name, processes, ready=None, clock=None):
+    clock = clock or Clock()
+    started = []
+
+    def spawn(argv, env=None):
+        process = processes.pop(0)
+        started.append(process)
+        return process
+
+    child = Child(name, ["x"], ready=ready, spawn=spawn, clock=clock, sleep=clock.sleep)
+    return child, started
+
+
+def test_backoff_grows_and_resets_after_stable_uptime():
+    backoff = Backoff(initial=0.5, maximum=4, factor=2, reset_after=60)
+    assert [backoff.next_delay(1) for _ in range(5)] == [0.5, 1, 2, 4, 4]
+    assert backoff.next_delay(120) == 0.5
+
+
+def test_wait_ready_reports_readiness_exit_and_timeout():
+    probes = iter([False, False, True])
+    child, _ = fake_child("server", [FakeProcess()], ready=lambda: next(probes))
+    child.start()
+    assert child.wait_ready(timeout=5) == READY
+
+    child, _ = fake_child("server", [FakeProcess(exit_after=2)], ready=lambda: False)
+    child.start()
+    assert child.wait_ready(timeout=5) == EXITED
+
+    child, _ = fake_child("server", [FakeProcess()], ready=lambda: False)
+    child.start()
+    assert child.wait_ready(timeout=1, interval=0.25) == TIMEOUT
+
+
+def test_ui_starts_only_after_server_is_healthy():
+    order = []
+    clock = Clock()
+    probes = iter([False, False, True])
+
+    def ready():
+        ok = next(probes)
+        order.append("probe ok" if ok else "probe")
+        return ok
+
+    server, _ = fake_child("server", [FakeProcess()], ready=ready, clock=clock)
+    ui, started = fake_child("ui", [FakeProcess(exit_after=1)], clock=clock)
+    original = ui.start
+    ui.start = lambda: (order.append("ui"), original())
+    code = Supervisor([server], ui, log=lambda _: None, sleep=clock.sleep).run()
+    assert code == 0
+    assert order == ["probe", "probe", "probe ok", "ui"]
+    assert server.process.terminated                    # закрытие интерфейса останавливает сервер
+
+
+def test_crashed_server_is_restarted_with_backoff():
+    clock = Clock()
+    crashing = FakeProcess(exit_after=3)
+    server, started = fake_child("server", [crashing, FakeProcess()], ready=lambda: True, clock=clock)
+    supervisor = Supervisor([server], log=lambda _: None, sleep=clock.sleep, poll=1)
+    steps = iter(range(20))
+    original = supervisor._sleep
+
+    def sleep(seconds):
+        original(seconds)
+        if next(steps) >= 10:
+            supervisor.request_stop()
+
+    supervisor._sleep = sleep
+    assert supervisor.run() == 0
+    assert len(started) == 2 and started[1].terminated
+    assert server.backoff.failures == 1
+
+
+def test_supervisor_gives_up_after_repeated_failures():
+    clock = Clock()
+    processes = [FakeProcess(exit_after=0) for _ in range(10)]
+    server, started = fake_child("server", processes, ready=lambda: True, clock=clock)
+    ui, ui_started = fake_child("ui", [FakeProcess()], clock=clock)
+    assert Supervisor([server], ui, max_failures=3, log=lambda _: None, sleep=clock.sleep).run() == 1
+    assert len(started) == 4 and not ui_started
+
+
+def test_build_uses_shared_store_for_several_workers():
+    args = launch.argparse.Namespace(host="127.0.0.1", port=8123, workers=4, headless=False,
+                                     ready_timeout=5, max_failures=2)
+    supervisor = launch.build(args, environ={})
+    server = supervisor.services[-1]
+    assert server.env["TIMETABLE_STORE"] == "snapshot"
+    assert server.argv[server.argv.index("--workers") + 1] == "4"
+    assert server.env["TIMETABLE_WORKERS"] == "4"
+    assert server.stop_timeout >= 2 * 30                 # досчёт задач + ожидание соединений
+    assert supervisor.ui.env["TIMETABLE_BACKEND_URL"] == "http://127.0.0.1:8123"
+
+    writer = launch.build(args, environ={"TIMETABLE_STORE": "writer", "TIMETABLE_STATE_DIR": "/tmp/x"})
+    assert [c.name for c in writer.services] == ["writer", "server"]
+    single = launch.build(launch.argparse.Namespace(**{**vars(args), "workers": 1, "headless": True}), environ={})
+    assert "TIMETABLE_STORE" not in single.services[0].env and single.ui is None
+
+
+def test_writer_readiness_needs_a_listening_socket(tmp_path):
+    address = str(tmp_path / "writer.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(address)
+    stale.close()                                   # файл остался, но никто не слушает
+    assert not launch.unix_socket_ready(address)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listening:
+        (tmp_path / "writer.sock").unlink()
+        listening.bind(address)
+        listening.listen()
+        assert launch.unix_socket_ready(address)
@@ -0,0 +1,43 @@
+import random
+
+from core.matching import hopcroft_karp
+
+
+def test_augmenting_path_beats_greedy():
+    # жадно a занимает r1, и b остаётся без аудитории; увеличивающий путь переставляет a в r2
+    adj = {"a": ["r1", "r2"], "b": ["r1"]}
+    assert hopcroft_karp(["a", "b"], adj) == {"a": "r2", "b": "r1"}
+
+
+def test_unmatched_and_isolated_vertices():
+    assert hopcroft_karp(["a", "b", "c"], {"a": ["r1"], "b": ["r1"]}) in ({"a": "r1"}, {"b": "r1"})
+    assert hopcroft_karp([], {}) == {}
+
+
+def _max_matching_brute(left, adj):
+    best = 0
+
+    def go(i, used, size):
+        nonlocal best
+        best = max(best, size)
+        if i == len(left):
+            return
+        go(i + 1, used, size)
+        for v in adj[left[i]]:
+            if v not in used:
+                go(i + 1, used | {v}, size + 1)
+
+    go(0, frozenset(), 0)
+    return best
+
+
+def test_matching_is_maximum_on_random_graphs():
+    rnd = random.Random(5)
+    for _ in range(50):
+        left = [f"c{i}" for i in range(rnd.randint(1, 7))]
+        right = [f"r{i}" for i in range(rnd.randint(1, 6))]
+        adj = {u: [v for v in right if rnd.random() < 0.35] for u in left}
+        matching = hopcroft_karp(left, adj)
+        assert len(set(matching.values())) == len(matching)
+        assert all(v in adj[u] for u, v in matching.items())
+        assert len(matching) == _max_matching_brute(left, adj)
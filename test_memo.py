@@ -41,3 +41,32 @@ def test_measure_cache_performance_reads_json():
 def test_compute_timetable_stats_cache_speed():
     compute_timetable_stats.cache_clear()
     assert measure_cache_performance()[1] < measure_cache_performance()[0]
+
+
+def pairwise_conflicts(classes):
+    # прежнее определение: пары в одном непустом слоте с общей группой, преподавателем или аудиторией
+    return sum(1 for x, a in enumerate(classes) for b in classes[x + 1:]
+               if a.slot_id and a.slot_id == b.slot_id
+               and (a.group_id == b.group_id or a.teacher_id == b.teacher_id or a.room_id == b.room_id))
+
+
+def test_count_conflicts_matches_pairwise_check():
+    import random
+    rnd = random.Random(3)
+    slots = tuple(Slot(id=f"S{i}", day="monday", start=f"{8 + i}:00", end=f"{8 + i}:50") for i in range(5))
+    for attempt in range(20):
+        classes = tuple(
+            Class(id=f"c{i}", course_id="X", needs="", teacher_id=rnd.choice(["", "T1", "T2"]),
+                  group_id=rnd.choice(["G1", "G2", "G3"]), slot_id=rnd.choice(["", "S0", "S1", "S2", "S3", "S4"]),
+                  room_id=rnd.choice(["", "R1", "R2"]), status="")
+            for i in range(25)
+        )
+        assert count_conflicts(f"random-{attempt}", classes) == pairwise_conflicts(classes)
+        assert timetable_stats(classes, slots) == compute_timetable_stats(f"random-{attempt}", classes, slots)
+
+
+def test_count_conflicts_handles_long_schedules():
+    # рекурсия по хвостам упёрлась бы в предел глубины
+    classes = tuple(Class(id=f"c{i}", course_id="X", needs="", teacher_id=f"T{i}", group_id=f"G{i}",
+                          slot_id=f"S{i % 10}", room_id=f"R{i % 20}", status="") for i in range(5000))
+    assert count_conflicts("long", classes) == 20 * (250 * 249 // 2)      # 20 аудиторий по 250 занятий в одном слоте
@@ -0,0 +1,84 @@
+import pytest
+from core import metrics
+from core.metrics import Registry, instrument, measure, render_prometheus
+
+
+@pytest.fixture(autouse=True)
+def metrics_enabled():
+    metrics.enable()
+    yield
+    metrics.enable()
+
+
+def test_instrument_counts_calls_and_items():
+    reg = Registry()
+
+    @instrument("op", registry=reg)
+    def produce(n):
+        return tuple(range(n))
+
+    produce(3)
+    produce(5)
+    snap = reg.histogram("op").snapshot()
+    assert snap["count"] == 2
+    assert snap["items"] == 8
+    assert snap["errors"] == 0
+
+
+def test_instrument_records_recursive_function_once():
+    reg = Registry()
+
+    @instrument("rec", registry=reg)
+    def depth(n):
+        return () if n == 0 else (n,) + depth(n - 1)
+
+    assert depth(4) == (4, 3, 2, 1)
+    assert reg.histogram("rec").snapshot()["count"] == 1
+
+
+def test_instrument_disabled_records_nothing():
+    reg = Registry()
+
+    @instrument("off", registry=reg)
+    def f():
+        return [1]
+
+    metrics.disable()
+    f()
+    assert reg.histogram("off").snapshot()["count"] == 0
+
+
+def test_instrument_counts_errors():
+    reg = Registry()
+
+    @instrument("boom", registry=reg)
+    def f():
+        raise ValueError("x")
+
+    with pytest.raises(ValueError):
+        f()
+    assert reg.histogram("boom").snapshot()["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_instrument_async_function():
+    reg = Registry()
+
+    @instrument("async_op", items=lambda r: len(r["classes"]), registry=reg)
+    async def f():
+        return {"classes": (1, 2)}
+
+    await f()
+    snap = reg.histogram("async_op").snapshot()
+    assert snap["count"] == 1 and snap["items"] == 2
+
+
+def test_measure_and_prometheus_format():
+    reg = Registry()
+    with measure("block", registry=reg) as m:
+        m["items"] = 7
+    text = render_prometheus(reg)
+    assert '# TYPE timetable_op_duration_seconds histogram' in text
+    assert 'timetable_op_duration_seconds_bucket{op="block",le="+Inf"} 1' in text
+    assert 'timetable_op_duration_seconds_count{op="block"} 1' in text
+    assert 'timetable_op_items_total{op="block"} 7' in text
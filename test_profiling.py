@@ -0,0 +1,90 @@
+import time
+from core import memo
+from core.profiling import Profiler, StackSampler, profile_call, build_arguments, resolve_function
+
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+
+def test_profile_call_returns_result_and_hotspots():
+    result, report = profile_call(busy, 10000, top=5)
+    assert result == busy(10000)
+    assert report is not None
+    assert 0 < len(report.hotspots) <= 5
+    assert report.duration_ms > 0
+    assert any("busy" in h["function"] or "genexpr" in h["function"] for h in report.hotspots)
+
+
+def test_profile_call_runs_coroutines_and_generators():
+    async def coro():
+        return 42
+
+    def gen():
+        yield 1
+        yield 2
+
+    assert profile_call(coro)[0] == 42
+    assert profile_call(gen)[0] == (1, 2)
+
+
+def test_nested_profiler_is_skipped():
+    with Profiler(memory=False) as outer:
+        with Profiler(memory=False) as inner:
+            busy(100)
+    assert outer.report is not None
+    assert inner.report is None
+
+
+def test_stack_sampler_writes_collapsed_stacks():
+    sampler = StackSampler(interval=0.0005)
+    with sampler:
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            busy(1000)
+    lines = sampler.collapsed().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) >= 1
+    assert ";" in stack
+
+
+def test_build_arguments_from_dataset():
+    func = resolve_function("memo.compute_timetable_stats")
+    assert func is memo.compute_timetable_stats
+    kwargs = build_arguments(func, "./data/seed.json", {"key": "cli"})
+    assert kwargs["key"] == "cli"
+    assert len(kwargs["classes_index"]) > 0
+    assert len(kwargs["slots_index"]) > 0
+
+
+def test_in_thread_work_is_added_to_the_report():
+    import asyncio
+    from core.profiling import in_thread
+    from core.store import MemoryStore
+
+    store = MemoryStore()
+
+    async def request():
+        await asyncio.to_thread(in_thread(store.apply), "load_seed", path="./data/seed.json")
+
+    with Profiler(top=200, memory=False) as profiler:
+        asyncio.run(request())
+    functions = [h["function"] for h in profiler.report.hotspots]
+    assert any(f.startswith("transforms.py") and "(load_seed)" in f for f in functions)
+    assert any(f.startswith("store.py") and "(apply)" in f for f in functions)
+    assert in_thread(busy) is busy                          # вне профиля обёртки нет
+
+
+def test_server_profile_includes_worker_thread(monkeypatch):
+    from fastapi.testclient import TestClient
+    import server
+    from core.store import MemoryStore
+
+    monkeypatch.setattr(server, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(server, "store", MemoryStore())
+    with TestClient(server.app) as client:
+        response = client.post("/load_seed", headers={"X-Profile": "1", "X-Profile-Top": "200"})
+    profile = next(p for p in server.profiles if p["id"] == response.headers["X-Profile-Id"])
+    functions = [h["function"] for h in profile["hotspots"]]
+    assert any("(load_seed)" in f and f.startswith("transforms.py") for f in functions)
@@ -0,0 +1,56 @@
+import pytest
+from core.domain import Building, Class, Room, Slot
+from core.query import query_classes, query_page, MAX_PAGE_SIZE
+from paged_table import reuse_rows
+
+SLOTS = (
+    Slot(id="MON1", day="monday", start="8:00", end="9:30"),
+    Slot(id="TUE1", day="tuesday", start="8:00", end="9:30"),
+)
+ROOMS = (
+    Room(id="R1", building_id="B1", name="101", capacity=30, features=()),
+    Room(id="R2", building_id="B2", name="201", capacity=30, features=()),
+)
+CLASSES = tuple(
+    Class(id=f"C{i}", course_id="CS1", needs="", teacher_id=f"T{i % 2}", group_id="G1",
+          slot_id="MON1" if i < 6 else "TUE1", room_id="R1" if i % 3 else "R2", status="scheduled")
+    for i in range(10)
+)
+
+
+def test_page_counts_all_matches_and_slices_window():
+    page = query_classes(CLASSES, SLOTS, ROOMS, offset=2, limit=3, teacher_id="T0")
+    assert page.total == 5
+    assert [c.id for c in page.items] == ["C4", "C6", "C8"]
+
+
+def test_filters_combine():
+    page = query_classes(CLASSES, SLOTS, ROOMS, day="tuesday", building_id="B2")
+    assert [c.id for c in page.items] == ["C6", "C9"]
+
+
+def test_invalid_page_and_limit_cap():
+    with pytest.raises(ValueError):
+        query_classes(CLASSES, offset=-1)
+    with pytest.raises(ValueError):
+        query_classes(CLASSES, limit=0)
+    assert query_classes(CLASSES, limit=10_000).limit == MAX_PAGE_SIZE
+
+
+def test_query_page_returns_enriched_rows():
+    result = query_page(CLASSES, SLOTS, ROOMS, buildings=(Building(id="B1", name="Главный"),), limit=2)
+    assert result["total"] == 10
+    assert result["items"][1]["building_name"] == "Главный"
+    assert result["items"][0]["day"] == "monday"
+
+
+def test_unchanged_rows_are_reused_between_pages():
+    make_row = lambda values: list(values)
+    first, cache = reuse_rows({}, query_page(CLASSES, SLOTS, ROOMS, limit=4)["items"], make_row)
+
+    moved = Class(**{**{f: getattr(CLASSES[1], f) for f in CLASSES[1].__slots__}, "room_id": "R2"})
+    changed = (CLASSES[0], moved) + CLASSES[2:]
+    second, cache = reuse_rows(cache, query_page(changed, SLOTS, ROOMS, limit=4)["items"], make_row)
+    assert second[0] is first[0] and second[2] is first[2]
+    assert second[1] is not first[1] and second[1][5] == "201"
+    assert set(cache) == {"C0", "C1", "C2", "C3"}
@@ -0,0 +1,90 @@
+import pytest
+from dataclasses import replace
+from core.domain import Class, Group, Room, Slot
+from core.repair import ClassMoved, RoomClosed, TeacherAbsent, repair
+
+slots = (
+    Slot(id="MON1", day="monday", start="8:00", end="10:00"),
+    Slot(id="MON2", day="monday", start="10:00", end="12:00"),
+    Slot(id="TUE1", day="tuesday", start="8:00", end="10:00"),
+)
+rooms = (
+    Room(id="A", building_id="B1", name="A", capacity=30, features=frozenset({"projector"})),
+    Room(id="B", building_id="B1", name="B", capacity=30, features=frozenset()),
+    Room(id="GYM", building_id="B2", name="GYM", capacity=60, features=frozenset({"gym"})),
+)
+groups = (Group(id="G1", name="G1", size=25, track=""), Group(id="G2", name="G2", size=25, track=""))
+
+
+def cls(id, slot_id, room_id, teacher_id="T1", group_id="G1", needs=""):
+    return Class(id=id, course_id="C", needs=needs, teacher_id=teacher_id, group_id=group_id,
+                 slot_id=slot_id, room_id=room_id, status="scheduled")
+
+
+classes = (
+    cls("c1", "MON1", "A", needs="projector"),
+    cls("c2", "MON1", "B", teacher_id="T2", group_id="G2"),
+    cls("c3", "MON2", "A", teacher_id="T2", group_id="G2"),
+    cls("c4", "TUE1", "GYM", teacher_id="T3", group_id="G2", needs="gym"),
+)
+
+
+def by_id(result):
+    return {c.id: c for c in result.classes}
+
+
+def test_room_closed_moves_only_its_classes():
+    result = repair(classes, rooms, slots, groups, RoomClosed("A"))
+    assert result.affected == ("c1", "c3")
+    placed = by_id(result)
+    # c1 нужен проектор — он есть только в A, поэтому занятие снимается со слота
+    assert result.unplaced == ("c1",) and placed["c1"].slot_id == "" and placed["c1"].room_id == ""
+    assert placed["c1"].status == "planned"
+    # c3 в своём слоте уходит в свободную B
+    assert (placed["c3"].slot_id, placed["c3"].room_id, placed["c3"].status) == ("MON2", "B", "moved")
+    assert result.moved == 1
+    assert placed["c2"] is classes[1] and placed["c4"] is classes[3]
+
+
+def test_room_closed_only_in_listed_slots():
+    result = repair(classes, rooms, slots, groups, RoomClosed("A", frozenset({"MON2"})))
+    assert result.affected == ("c3",)
+    assert by_id(result)["c1"] is classes[0]
+
+
+def test_teacher_absent_moves_to_another_day():
+    result = repair(classes, rooms, slots, groups, TeacherAbsent("T1", day="monday"))
+    assert result.affected == ("c1",)
+    moved = by_id(result)["c1"]
+    # прежняя аудитория в первом свободном слоте другого дня
+    assert (moved.slot_id, moved.room_id) == ("TUE1", "A")
+    assert result.to_dict()["moves"] == [{"class_id": "c1", "old_slot_id": "MON1", "old_room_id": "A",
+                                          "new_slot_id": "TUE1", "new_room_id": "A"}]
+
+
+def test_class_moved_displaces_conflicting_classes():
+    # c1 вручную ставится в MON2/A, где уже идёт c3
+    result = repair(classes, rooms, slots, groups, ClassMoved("c1", slot_id="MON2"))
+    placed = by_id(result)
+    assert (placed["c1"].slot_id, placed["c1"].room_id) == ("MON2", "A")
+    assert result.affected == ("c3",)
+    # сначала перебирается свой слот: в MON2 свободна аудитория B
+    assert (placed["c3"].slot_id, placed["c3"].room_id) == ("MON2", "B")
+
+
+def test_cancelled_classes_are_not_affected():
+    cancelled = classes[:2] + (replace(classes[2], status="cancelled"),) + classes[3:]
+    result = repair(cancelled, rooms, slots, groups, RoomClosed("A"))
+    assert result.affected == ("c1",)
+    assert by_id(result)["c3"] is cancelled[2]
+
+
+def test_no_change_when_nothing_is_affected():
+    result = repair(classes, rooms, slots, groups, RoomClosed("GYM", frozenset({"MON1"})))
+    assert result.affected == () and result.moves == ()
+    assert result.classes == classes
+
+
+def test_unknown_class():
+    with pytest.raises(KeyError):
+        repair(classes, rooms, slots, groups, ClassMoved("nope", slot_id="MON1"))
@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from core import search, transforms
+from core.memo import timetable_stats
+
+buildings, rooms, teachers, groups, courses, slots, classes, constraints = transforms.load_seed("data/seed.json")
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday"]
+
+
+def test_attempts_are_reproducible_and_best_is_selected():
+    with ThreadPoolExecutor(4) as pool:
+        first = search.multi_start(DAYS, classes, rooms, slots, groups, attempts=6, seed=11, target=None, executor=pool)
+        second = search.multi_start(DAYS, classes, rooms, slots, groups, attempts=6, seed=11, target=None,
+                                    executor=pool)
+    assert first.stopped == "completed" and len(first.attempts) == 6
+    assert [a.score for a in first.attempts] == [a.score for a in second.attempts]
+    assert first.best.classes == second.best.classes
+    assert first.best.score == min(a.score for a in first.attempts)
+    # оценка попытки — те же показатели, что у memo
+    stats = dict(timetable_stats(first.best.classes, slots))
+    assert first.best.score[1:] == (stats["conflicts"], stats["windows"])
+    assert [c.id for c in first.best.classes] == [c.id for c in classes]
+
+
+def test_orderings():
+    assert [search.ordering_of(i) for i in range(5)] == ["input", "largest_group", "needs_first", "random", "random"]
+    size = {g.id: g.size for g in groups}
+    ordered = search.order_classes(classes, groups, 1, 0)
+    assert [size[c.group_id] for c in ordered] == sorted((size[c.group_id] for c in classes), reverse=True)
+    assert search.order_classes(classes, groups, 3, 0) != search.order_classes(classes, groups, 4, 0)
+
+
+def test_early_stop_waits_for_lower_attempts():
+    done = {1: search.Attempt(1, "x", (0, 0, 0), (), 0.0)}
+    assert not search._reached(done, (0, 0, 0))
+    done[0] = search.Attempt(0, "input", (2, 0, 0), (), 0.0)
+    assert search._reached(done, (0, 0, 0))
+    assert search._reached(done, (5, 0, 0))
+
+
+def test_budget_cancels_pending_attempts(monkeypatch):
+    real = search.run_attempt
+
+    def slow(index, *args):
+        if index > 0:
+            time.sleep(0.3)
+        return real(index, *args)
+
+    monkeypatch.setattr(search, "run_attempt", slow)
+    with ThreadPoolExecutor(1) as pool:
+        result = search.multi_start(DAYS, classes, rooms, slots, groups, attempts=5, budget=0.1, target=None,
+                                    executor=pool)
+    assert result.stopped == "budget"
+    assert [a.index for a in result.attempts] == [0]
+    # попытка 1 уже шла — её не отменить, остальные сняты с очереди
+    assert result.abandoned == 1 and result.to_dict()["abandoned"] == 1
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        search.multi_start(DAYS, classes, rooms, slots, groups, attempts=0)
+    with pytest.raises(ValueError):
+        search.multi_start([], classes, rooms, slots, groups)
@@ -0,0 +1,40 @@
+import subprocess
+import sys
+
+from core import startup
+
+
+def _loaded_after(code):
+    proc = subprocess.run([sys.executable, "-c", code + "\nimport sys\nprint(' '.join(sorted(sys.modules)))"],
+                          capture_output=True, text=True, check=True)
+    return set(proc.stdout.split())
+
+
+def test_core_submodules_load_on_first_access():
+    loaded = _loaded_after("import core")
+    assert "core.search" not in loaded and "core.db" not in loaded
+    loaded = _loaded_after("import core\ncore.search.ordering_of(0)")
+    assert "core.search" in loaded
+
+
+def test_server_is_headless_and_solvers_are_lazy():
+    loaded = _loaded_after("import server")
+    assert "flet" not in loaded
+    assert not {"core.search", "core.repair", "core.constraints", "core.db", "core.async_schedule"} & loaded
+
+
+def test_parse_importtime():
+    output = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |   json.decoder",
+        "import time:       300 |        420 | json",
+    ])
+    own, cumulative = startup.parse_importtime(output)
+    assert own == {"json.decoder": 0.12, "json": 0.3}
+    assert cumulative["json"] == 0.42
+
+
+def test_measure_import():
+    report = startup.measure_import("json", runs=1, top=2)
+    assert report.total_ms > 0 and "json" in report.loaded
+    assert len(report.heaviest) <= 2
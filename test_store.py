@@ -0,0 +1,110 @@
+import json
+import multiprocessing
+import os
+import stat
+from dataclasses import replace
+
+import pytest
+from core.domain import Room
+from core.store import MemoryStore, SnapshotStore, WriterStore, load_authkey, run_writer
+
+ROOM = Room(id="R1", building_id="B1", name="101", capacity=30, features=())
+
+
+def _replace_rooms(directory, capacity):
+    SnapshotStore(directory).apply("replace", rooms=(Room(id="R1", building_id="B1", name="101",
+                                                          capacity=capacity, features=()),))
+
+
+def test_memory_store_versions_snapshots():
+    store = MemoryStore()
+    assert store.snapshot().version == 0 and "rooms" not in store.snapshot()
+    first = store.apply("replace", rooms=(ROOM,))
+    assert first.version == 1 and first["rooms"] == (ROOM,)
+    store.apply("load_seed", path="data/seed.json")
+    assert store.snapshot().version == 2 and first["rooms"] == (ROOM,)
+    with pytest.raises(ValueError):
+        store.apply("drop_everything")
+
+
+def test_snapshot_store_is_shared_between_processes(tmp_path):
+    reader = SnapshotStore(str(tmp_path))
+    reader.apply("load_seed", path="data/seed.json")
+    cached = reader.snapshot()
+    assert reader.snapshot() is cached
+
+    ctx = multiprocessing.get_context("spawn")
+    worker = ctx.Process(target=_replace_rooms, args=(str(tmp_path), 99))
+    worker.start()
+    worker.join(30)
+    assert worker.exitcode == 0
+
+    snap = reader.snapshot()
+    assert snap.version == cached.version + 1
+    assert snap["rooms"][0].capacity == 99
+    assert snap["classes"] == cached["classes"]
+    # новый процесс-читатель видит ту же версию
+    assert SnapshotStore(str(tmp_path)).snapshot().version == snap.version
+
+
+def test_writer_process_applies_mutations(tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Event()
+    writer = ctx.Process(target=run_writer, args=(str(tmp_path),), kwargs={"ready": ready})
+    writer.start()
+    try:
+        assert ready.wait(30)
+        store = WriterStore(str(tmp_path))
+        snap = store.apply("load_seed", path="data/seed.json")
+        assert snap.version == 1 and snap["rooms"]
+        with pytest.raises(ValueError):
+            store.apply("replace", lecturers=())
+        assert store.snapshot().version == 1
+        store.shutdown_writer()
+        writer.join(30)
+        assert writer.exitcode == 0
+    finally:
+        if writer.is_alive():
+            writer.terminate()
+
+
+def test_events_update_only_touched_tables():
+    store = MemoryStore()
+    before = store.apply("load_seed", path="data/seed.json")
+    target = before["classes"][0]
+    after = store.apply("event", name="CANCEL_CLASS", payload={"class_id": target.id})
+    assert after["classes"][0].status == "cancelled" and after["classes"][1:] == before["classes"][1:]
+    assert after["rooms"] is before["rooms"]
+    after = store.apply("event", name="ADD_ROOM", payload={"id": "NEW", "building_id": "B01", "name": "999",
+                                                           "capacity": 10, "features": ["lab"]})
+    assert after["rooms"][-1] == Room(id="NEW", building_id="B01", name="999", capacity=10, features=("lab",))
+    with pytest.raises(ValueError):
+        store.apply("event", name="DROP_TABLE", payload={})
+
+
+def test_state_dir_is_private_and_snapshot_is_json(tmp_path):
+    directory = tmp_path / "state"
+    store = SnapshotStore(str(directory))
+    store.apply("replace", rooms=(ROOM,))
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+    assert len(load_authkey(str(directory))) == 32 and load_authkey(str(directory)) == load_authkey(str(directory))
+    with open(store.snapshot_path, "rb") as f:
+        body = f.read()[16:]
+    assert json.loads(body)["rooms"][0]["id"] == "R1"
+
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError):
+        SnapshotStore(str(shared))
+
+
+def test_update_classes_keeps_concurrent_edits():
+    store = MemoryStore()
+    before = store.apply("load_seed", path="data/seed.json")
+    first, second = before["classes"][0], before["classes"][1]
+    store.apply("event", name="CANCEL_CLASS", payload={"class_id": second.id})
+    after = store.apply("update_classes", classes=[replace(first, room_id="", slot_id="")])
+    assert after["classes"][0].room_id == "" and after["classes"][1].status == "cancelled"
+    with pytest.raises(ValueError):
+        store.apply("update_classes", classes=[replace(first, id="missing")])
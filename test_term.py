@@ -0,0 +1,90 @@
+from datetime import date
+import pytest
+from core.domain import Class, Slot
+from core.term import (
+    Term, Recurrence, Override, term_weeks, week_number, week_parity,
+    iter_occurrences, iter_week_reports, aggregate_term,
+)
+
+SLOTS = (
+    Slot(id="MON1", day="monday", start="8:00", end="10:00"),
+    Slot(id="MON2", day="monday", start="10:00", end="12:00"),
+    Slot(id="WED1", day="wednesday", start="8:00", end="10:00"),
+)
+
+CLASSES = (
+    Class(id="A", course_id="X", needs="", teacher_id="T1", group_id="G1", slot_id="MON1", room_id="R1", status="scheduled"),
+    Class(id="B", course_id="X", needs="", teacher_id="T2", group_id="G2", slot_id="WED1", room_id="R2", status="scheduled"),
+    Class(id="U", course_id="X", needs="", teacher_id="T3", group_id="G3", slot_id="", room_id="", status="planned"),
+)
+
+# 2026-09-07 — понедельник
+TERM = term_weeks(date(2026, 9, 9), 16)
+
+
+def test_term_weeks_starts_on_monday():
+    assert TERM.start == date(2026, 9, 7)
+    assert TERM.end == date(2026, 12, 27)
+    assert week_number(TERM, date(2026, 9, 13)) == 1
+    assert week_number(TERM, date(2026, 9, 14)) == 2
+    assert week_parity(1) == "odd" and week_parity(2) == "even"
+
+
+def test_term_rejects_inverted_dates():
+    with pytest.raises(ValueError):
+        Term(date(2026, 2, 1), date(2026, 1, 1))
+
+
+def test_occurrences_are_lazy_and_dated():
+    occ = iter_occurrences(TERM, CLASSES, SLOTS)
+    first = next(occ)
+    assert first.date == date(2026, 9, 7) and first.class_id == "A"
+    second = next(occ)
+    assert second.date == date(2026, 9, 9) and second.class_id == "B"
+
+
+def test_parity_holidays_and_overrides():
+    term = Term(date(2026, 9, 7), date(2026, 9, 20), holidays={date(2026, 9, 9)})
+    occ = tuple(iter_occurrences(
+        term, CLASSES, SLOTS,
+        recurrences=(Recurrence("A", "even"),),
+        overrides=(Override("B", date(2026, 9, 16), "move", slot_id="MON2", room_id="R9"),),
+    ))
+    # перенос на понедельничный слот переносит и дату: среда 16.09 -> понедельник 14.09
+    assert [(o.class_id, o.date) for o in occ] == [("A", date(2026, 9, 14)), ("B", date(2026, 9, 14))]
+    moved = occ[1]
+    assert moved.status == "moved" and moved.room_id == "R9" and moved.start == "10:00"
+
+
+def test_moved_dates_respect_holidays_and_term_bounds():
+    # 14.09 — праздник, 21.09 — понедельник после конца семестра
+    term = Term(date(2026, 9, 9), date(2026, 9, 20), holidays={date(2026, 9, 14)})
+    overrides = (
+        Override("B", date(2026, 9, 9), "move", slot_id="MON2"),   # на понедельник 07.09 — до начала
+        Override("B", date(2026, 9, 16), "move", slot_id="MON2"),  # на праздник 14.09
+        Override("A", date(2026, 9, 14), "move", slot_id="WED1"),  # с праздника на среду 16.09
+    )
+    occ = tuple(iter_occurrences(term, CLASSES, SLOTS, overrides=overrides))
+    assert [(o.class_id, o.date, o.status) for o in occ] == [("A", date(2026, 9, 16), "moved")]
+
+
+def test_week_reports_aggregate_incrementally():
+    overrides = (Override("A", date(2026, 9, 14), "cancel"),)
+    reports = list(iter_week_reports(iter_occurrences(TERM, CLASSES, SLOTS, overrides=overrides), TERM))
+    assert len(reports) == 16
+    assert reports[0]["occurrences"] == 2 and reports[0]["per_day"] == {"monday": 1, "wednesday": 1}
+    assert reports[1]["cancelled"] == 1 and reports[1]["held"] == 1
+    assert reports[1]["start"] == date(2026, 9, 14)
+    totals = aggregate_term(reports)
+    assert totals == {"weeks": 16, "occurrences": 32, "held": 31, "cancelled": 1, "moved": 0}
+
+
+def test_week_reports_include_weeks_without_classes():
+    # вторая неделя целиком праздничная, последняя — без занятий из-за правила чётности
+    week2 = {date(2026, 9, 14 + i) for i in range(7)}
+    term = term_weeks(date(2026, 9, 7), 4, holidays=week2)
+    reports = list(iter_week_reports(iter_occurrences(term, CLASSES[:1], SLOTS, recurrences=(Recurrence("A", "odd"),)), term))
+    assert [r["week"] for r in reports] == [1, 2, 3, 4]
+    assert [r["occurrences"] for r in reports] == [1, 0, 1, 0]
+    assert reports[1]["holidays"] == sorted(week2)
+    assert aggregate_term(reports)["weeks"] == 4
@@ -0,0 +1,100 @@
+import pytest
+from core.domain import Slot, Class
+from core.timeline import parse_time, format_time, parse_slot, SlotIndex, slot_index
+from core.recursion import find_conflicts_recursive
+from core.memo import compute_timetable_stats
+
+# нерегулярная сетка: пары разной длины и нестандартные id
+SLOTS = (
+    Slot(id="A-early", day="Monday", start="8:00", end="9:30"),
+    Slot(id="A-mid", day="monday", start="9:40", end="11:10"),
+    Slot(id="B-long", day="monday", start="9:00", end="12:00"),
+    Slot(id="A-late", day="monday", start="14:00", end="15:30"),
+    Slot(id="T1", day="tuesday", start="8:00", end="9:30"),
+)
+
+
+def test_parse_time():
+    assert parse_time("8:00") == 480
+    assert parse_time("08:05") == 485
+    assert parse_time("9.30") == 570
+    assert format_time(570) == "9:30"
+    with pytest.raises(ValueError):
+        parse_time("8h")
+    with pytest.raises(ValueError):
+        parse_slot(Slot(id="X", day="monday", start="10:00", end="9:00"))
+
+
+def test_overlapping_and_adjacent_queries():
+    index = SlotIndex(SLOTS)
+    assert [s.id for s in index.overlapping("A-mid")] == ["B-long", "A-mid"]
+    assert [s.id for s in index.overlapping("A-early")] == ["A-early", "B-long"]
+    assert index.overlaps("A-early", "B-long")
+    assert not index.overlaps("A-early", "T1")
+    day = index.days["monday"]
+    assert [s.id for s in day.adjacent(parse_time("11:10"), parse_time("14:00"))] == ["A-mid", "A-late"]
+    assert day.gaps() == ((720, 840),)
+
+
+def test_positions_do_not_depend_on_id_format():
+    index = SlotIndex(tuple(Slot(id=f"MON{i}", day="monday", start=f"{7 + i}:00", end=f"{7 + i}:50") for i in range(1, 12)))
+    assert index.position("MON10") == 9
+    assert index.position("MON11") == 10
+    assert index.windows(("MON1", "MON11")) == 9
+
+
+def test_slot_index_is_cached_for_same_slots():
+    assert slot_index(SLOTS) is slot_index(list(SLOTS))
+
+
+def test_conflicts_use_time_overlap_not_string_equality():
+    mk = lambda id, slot, room, teacher: Class(id=id, course_id="X", needs="", teacher_id=teacher,
+                                               group_id=id, slot_id=slot, room_id=room, status="")
+    classes = (
+        mk("C1", "A-early", "R1", "T1"),
+        mk("C2", "B-long", "R1", "T2"),   # пересекается по времени, та же аудитория
+        mk("C3", "T1", "R1", "T3"),       # то же время, но другой день
+    )
+    result = find_conflicts_recursive(classes, SLOTS)
+    assert [(a.id, b.id) for a, b in result] == [("C1", "C2")]
+
+
+def test_windows_beyond_nine_slots_per_day():
+    slots = tuple(Slot(id=f"MON{i}", day="monday", start=f"{7 + i}:00", end=f"{7 + i}:50") for i in range(1, 12))
+    classes = (
+        Class(id="A", course_id="X", needs="", teacher_id="T1", group_id="G1", slot_id="MON9", room_id="R1", status=""),
+        Class(id="B", course_id="X", needs="", teacher_id="T2", group_id="G1", slot_id="MON11", room_id="R2", status=""),
+    )
+    assert compute_timetable_stats("positions", classes, slots) == (("conflicts", 0), ("windows", 1))
+
+
+def test_malformed_slot_is_skipped_and_reported():
+    slots = SLOTS + (Slot(id="BAD", day="monday", start="8:xx", end="9:00"),)
+    index = SlotIndex(slots)
+    assert index.get("BAD") is None and "BAD" in index.invalid
+    assert index.overlaps("BAD", "A-early") is False
+
+
+def test_conflicts_are_found_without_recursion():
+    slots = (Slot(id="MON1", day="monday", start="8:00", end="9:00"),)
+    classes = tuple(Class(id=f"C{i}", course_id="X", needs="", teacher_id=f"T{i}", group_id="G",
+                          slot_id="MON1", room_id="R1", status="") for i in range(3000))
+    result = find_conflicts_recursive(classes[:5], slots)
+    assert [(a.id, b.id) for a, b in result][:5] == [("C0", "C1"), ("C0", "C2"), ("C0", "C3"), ("C0", "C4"), ("C1", "C2")]
+    spread = tuple(Class(id=c.id, course_id="X", needs="", teacher_id=c.teacher_id, group_id="G",
+                         slot_id="MON1", room_id=f"R{i}", status="") for i, c in enumerate(classes))
+    assert find_conflicts_recursive(spread, slots) == ()
+
+    # сдвинутые на 10 минут пары по 25 минут: каждая пересекается с двумя соседями с каждой стороны;
+    # в каждой из 50 аудиторий по одному занятию в каждом из 60 слотов
+    staggered = tuple(Slot(id=f"S{k}", day="monday", start=format_time(480 + 10 * k), end=format_time(505 + 10 * k))
+                      for k in range(60))
+    shifted = tuple(Class(id=f"C{i}", course_id="X", needs="", teacher_id=f"T{i}", group_id="G",
+                          slot_id=f"S{i // 50}", room_id=f"R{i % 50}", status="") for i in range(3000))
+    result = find_conflicts_recursive(shifted, staggered)
+    assert len(result) == 50 * (59 + 58)
+    assert [(a.id, b.id) for a, b in result][:2] == [("C0", "C50"), ("C0", "C100")]
+    index = SlotIndex(staggered)
+    brute = [(a.id, b.id) for x, a in enumerate(shifted[:400]) for b in shifted[x + 1:400]
+             if a.room_id == b.room_id and index.overlaps(a.slot_id, b.slot_id)]
+    assert [(a.id, b.id) for a, b in find_conflicts_recursive(shifted[:400], staggered)] == brute
@@ -1,5 +1,6 @@
 from core.domain import Class, Group, Room
-from core.transforms import add_class, assign_room, assign_slot, map_groups, total_room_capacity
+import pytest
+from core.transforms import add_class, assign_room, assign_slot, map_groups, total_room_capacity, to_tuple, serialize_tuple
 
 #Тесты функции add_class
 def test_add_class_to_empty_list():
@@ -284,4 +285,73 @@ def test_total_room_capacity_no_rooms():
     rooms = ()
     result = total_room_capacity(rooms)
     assert isinstance(result, int)
-    assert result == 0
\ No newline at end of file
+    assert result == 0
+
+#Тесты быстрой загрузки сущностей
+def test_to_tuple_builds_slotted_entities_with_interned_ids():
+    items = [
+        {"id": "C1", "course_id": "CS101", "needs": "", "teacher_id": "".join(["T", "01"]), "group_id": "G01",
+         "slot_id": "MON1", "room_id": "R01", "status": "scheduled"},
+        {"id": "C2", "course_id": "CS101", "needs": "", "teacher_id": "".join(["T", "01"]), "group_id": "G01",
+         "slot_id": "MON2", "room_id": "R01", "status": "scheduled"},
+    ]
+    c1, c2 = to_tuple(Class, items)
+    assert not hasattr(c1, "__dict__")
+    assert c1.teacher_id is c2.teacher_id
+    assert c1 == Class(**items[0])
+
+def test_to_tuple_missing_field_raises():
+    with pytest.raises(TypeError):
+        to_tuple(Group, [{"id": "G1", "name": "G1", "size": 10}])
+
+def test_room_features_frozenset_and_serialized_sorted():
+    room = to_tuple(Room, [{"id": "R1", "building_id": "B1", "name": "1", "capacity": 10,
+                            "features": ["projector", "lab", "lab"]}])[0]
+    assert room.features == frozenset({"lab", "projector"})
+    assert serialize_tuple((room,))[0]["features"] == ["lab", "projector"]
+
+def test_room_single_feature_string_is_not_split():
+    row = {"id": "R1", "building_id": "B1", "name": "1", "capacity": 10, "features": "projector"}
+    assert to_tuple(Room, [row])[0].features == frozenset({"projector"})
+    assert Room(**{**row, "features": ""}).features == frozenset()
+
+
+#Тесты единой границы приведения типов (core.domain.entities)
+def _class_dict(i):
+    return {"id": f"C{i}", "course_id": "X", "needs": "", "teacher_id": "T1", "group_id": "G1",
+            "slot_id": "", "room_id": "", "status": ""}
+
+def test_entities_are_converted_once():
+    import pickle
+    from core.domain import EntityTuple, entities
+    rows = [_class_dict(i) for i in range(3)]
+    typed = to_tuple(Class, rows)
+    assert isinstance(typed, EntityTuple) and typed.type is Class
+    # уже приведённый кортеж возвращается без копирования
+    assert entities(Class, typed) is typed
+    # список приводится каждый раз заново: изменение на месте не даёт устаревший результат
+    rows[0] = {**rows[0], "room_id": "R99"}
+    assert to_tuple(Class, rows)[0].room_id == "R99"
+    assert pickle.loads(pickle.dumps(typed)) == typed and pickle.loads(pickle.dumps(typed)).type is Class
+
+def test_entities_check_every_item():
+    from core.domain import entities
+    first = Class(**_class_dict(0))
+    mixed = (first, _class_dict(1))
+    typed = entities(Class, mixed)
+    assert typed[0] is first and typed[1] == Class(**_class_dict(1))
+    with pytest.raises(TypeError):
+        entities(Class, (first, "C2"))
+
+def test_to_tuple_rejects_unknown_field():
+    row = {"id": "G1", "name": "G1", "size": 10, "track": "x", "colour": "red"}
+    with pytest.raises(TypeError):
+        to_tuple(Group, [row])
+
+def test_serialize_copies_constraint_payload():
+    from core.domain import Constraint
+    constraint = Constraint(id="K1", kind="max_windows_per_day", payload={"group_id": "G1", "max": 2})
+    first, = serialize_tuple((constraint,))
+    first["payload"]["max"] = 5
+    assert constraint.payload["max"] == 2
+    assert serialize_tuple((constraint,))[0]["payload"] is not first["payload"]
@@ -0,0 +1,33 @@
+import json
+
+from core.frp import Event, cancel_class, move_class
+from view_model import view_model
+
+
+def load_state():
+    with open("data/seed.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_view_model_is_shared_until_state_lists_change():
+    state = load_state()
+    vm = view_model(state)
+    assert view_model(state) is vm
+    assert view_model(dict(state)) is vm
+
+    state.update(move_class(Event("MOVE_CLASS", {"class_id": state["classes"][0]["id"], "new_room": "R999"}), state))
+    assert view_model(state) is not vm
+
+
+def test_groupings_match_full_scans():
+    state = load_state()
+    state.update(cancel_class(Event("CANCEL_CLASS", {"class_id": state["classes"][0]["id"]}), state))
+    vm = view_model(state)
+    for room in state["rooms"]:
+        expected = [c for c in state["classes"]
+                    if c.get("room_id") == room["id"] and c.get("status") in ("scheduled", "moved")]
+        assert list(vm.room_occupancy(room["id"])) == expected
+        building = next(b["name"] for b in state["buildings"] if b["id"] == room["building_id"])
+        assert vm.room_label(room) == f"{room['name']} ({building})"
+    assert sum(len(v) for v in vm.classes_by_room.values()) == len(state["classes"])
+    assert vm.days == tuple(dict.fromkeys(s["day"] for s in state["slots"]))
@@ -0,0 +1,40 @@
+from core.domain import Class, Slot
+from core.windows import compute_windows
+from core.memo import compute_timetable_stats
+
+SLOTS = tuple(
+    Slot(id=f"{d.upper()[:3]}{i}", day=d, start=f"{6 + 2 * i}:00", end=f"{8 + 2 * i}:00")
+    for d in ("monday", "tuesday") for i in range(1, 6)
+)
+
+
+def mk(id, group, teacher, slot):
+    return Class(id=id, course_id="X", needs="", teacher_id=teacher, group_id=group, slot_id=slot, room_id="R", status="")
+
+
+def test_windows_per_group_and_teacher():
+    classes = (
+        mk("A", "G1", "T1", "MON1"),
+        mk("B", "G1", "T2", "MON4"),
+        mk("C", "G1", "T1", "MON5"),
+        mk("D", "G2", "T1", "TUE1"),
+        mk("E", "G2", "T1", "TUE3"),
+    )
+    report = compute_windows(classes, SLOTS)
+    assert report.by_group_day == {("G1", "monday"): 2, ("G2", "tuesday"): 1}
+    assert report.by_teacher_day == {("T1", "monday"): 3, ("T1", "tuesday"): 1}
+    assert report.by_group() == {"G1": 2, "G2": 1}
+    assert report.by_teacher() == {"T1": 4}
+    assert report.group_total == 3 and report.teacher_total == 4
+
+
+def test_unscheduled_and_unknown_slots_are_ignored():
+    classes = (mk("A", "G1", "T1", ""), mk("B", "G1", "T1", "NOPE"), mk("C", "G1", "T1", "MON2"))
+    report = compute_windows(classes, SLOTS)
+    assert report.group_total == 0 and report.by_group_day == {}
+
+
+def test_memo_counts_each_group_day_once():
+    # три занятия одной группы с окнами: раньше окна считались заново для каждого занятия дня
+    classes = (mk("A", "G1", "T1", "MON1"), mk("B", "G1", "T2", "MON3"), mk("C", "G1", "T3", "MON5"))
+    assert compute_timetable_stats("windows-once", classes, SLOTS) == (("conflicts", 0), ("windows", 2))
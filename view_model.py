@@ -0,0 +1,103 @@
+# view_model.py
+# Производные представления клиентского состояния: словари id -> сущность и группировки
+# (занятия по аудиториям, слоты по дням). Строятся один раз на версию состояния и общие для всех
+# вкладок, поэтому перерисовка после FRP-события линейна по размеру данных.
+#
+# Версия состояния — набор самих списков: обработчики событий и загрузка данных не меняют списки
+# на месте, а подменяют их новыми, так что совпадение по `is` означает, что данные те же.
+from functools import cached_property
+from typing import Any, Dict, List, Tuple
+
+from core.domain import Building, Class, Course, EntityTuple, Group, Room, Slot, Teacher, entities
+
+TABLES = ("buildings", "rooms", "teachers", "groups", "courses", "slots", "classes")
+TYPES = dict(zip(TABLES, (Building, Room, Teacher, Group, Course, Slot, Class)))
+
+# статусы занятий, при которых аудитория считается занятой
+OCCUPYING_STATUSES = ("scheduled", "moved")
+
+
+def _by_key(items, key: str = "id") -> Dict[str, dict]:
+    return {it[key]: it for it in items}
+
+
+class ViewModel:
+    def __init__(self, state: dict):
+        # держим ссылки на исходные списки: это и ключ версии, и защита от повторного использования id()
+        self.sources: Tuple[Any, ...] = tuple(state.get(name) for name in TABLES)
+        self.buildings, self.rooms, self.teachers, self.groups, self.courses, self.slots, self.classes = (
+            source or () for source in self.sources
+        )
+
+    def matches(self, state: dict) -> bool:
+        return all(state.get(name) is source for name, source in zip(TABLES, self.sources))
+
+    @cached_property
+    def entities(self) -> Dict[str, EntityTuple]:
+        #Таблицы в виде доменных сущностей для вызовов ядра — приводятся один раз на версию состояния
+        return {name: entities(TYPES[name], source or ()) for name, source in zip(TABLES, self.sources)}
+
+    @cached_property
+    def buildings_by_id(self) -> Dict[str, dict]:
+        return _by_key(self.buildings)
+
+    @cached_property
+    def rooms_by_id(self) -> Dict[str, dict]:
+        return _by_key(self.rooms)
+
+    @cached_property
+    def teachers_by_id(self) -> Dict[str, dict]:
+        return _by_key(self.teachers)
+
+    @cached_property
+    def groups_by_id(self) -> Dict[str, dict]:
+        return _by_key(self.groups)
+
+    @cached_property
+    def courses_by_code(self) -> Dict[str, dict]:
+        return _by_key(self.courses, "code")
+
+    @cached_property
+    def slots_by_id(self) -> Dict[str, dict]:
+        return _by_key(self.slots)
+
+    @cached_property
+    def classes_by_id(self) -> Dict[str, dict]:
+        return _by_key(self.classes)
+
+    @cached_property
+    def classes_by_room(self) -> Dict[str, Tuple[dict, ...]]:
+        # одна группировка за проход по занятиям вместо сканирования всех занятий для каждой аудитории
+        grouped: Dict[str, List[dict]] = {}
+        for c in self.classes:
+            grouped.setdefault(c.get("room_id") or "", []).append(c)
+        return {room_id: tuple(items) for room_id, items in grouped.items()}
+
+    @cached_property
+    def days(self) -> Tuple[str, ...]:
+        # дни в порядке первого появления в списке слотов
+        return tuple(dict.fromkeys(s["day"] for s in self.slots))
+
+    def building_name(self, building_id: str) -> str:
+        building = self.buildings_by_id.get(building_id)
+        return building["name"] if building else ""
+
+    def room_label(self, room: dict) -> str:
+        return f"{room['name']} ({self.building_name(room['building_id'])})"
+
+    def slot_label(self, slot: dict) -> str:
+        return f"{slot['day']} {slot['start']}-{slot['end']}"
+
+    def room_occupancy(self, room_id: str) -> Tuple[dict, ...]:
+        return tuple(c for c in self.classes_by_room.get(room_id, ()) if c.get("status") in OCCUPYING_STATUSES)
+
+
+_current: Dict[str, ViewModel] = {}
+
+
+def view_model(state: dict) -> ViewModel:
+    # общий экземпляр: пересобирается только когда в state подменили какой-то из списков
+    vm = _current.get("vm")
+    if vm is None or not vm.matches(state):
+        vm = _current["vm"] = ViewModel(state)
+    return vm